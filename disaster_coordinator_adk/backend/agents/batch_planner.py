@@ -0,0 +1,228 @@
+# backend/agents/batch_planner.py
+"""
+Planning many alerts at once.
+
+- SharedToolCalls: per-batch memo for tool calls. Alerts in the same place ask for the same
+  geocode / nearby shelters / route matrix; within a batch the first call runs and every other
+  alert (concurrent or later) reuses its result
+- AutoPlanner: background scheduler that plans high-risk alerts before anyone asks. Alerts are
+  offered by the producer; those at or above AUTOPLAN_MIN_RISK wait in a priority queue ordered
+  by risk plus an age bonus (AUTOPLAN_AGE_WEIGHT per minute since the alert's time), and
+  AUTOPLAN_WORKERS threads take up to AUTOPLAN_BATCH of them at a time through the batch planner.
+  AUTOPLAN_LLM_CALLS_PER_MIN caps the model calls it may cause (each plan is charged
+  LLM_CALLS_PER_PLAN: risk + planner); 0 means no budget
+
+Auto-planning is off unless AUTOPLAN=1: plans reserve volunteers.
+"""
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from memory.alert_store import alert_timestamp
+from tools.cache import SingleFlight
+from tools.http_client import RateLimiter
+from tools.tracing import start_trace
+
+logger = logging.getLogger("disaster-backend.autoplan")
+
+AUTOPLAN_ENABLED = os.getenv("AUTOPLAN", "0").lower() in ("1", "true", "yes")
+AUTOPLAN_MIN_RISK = float(os.getenv("AUTOPLAN_MIN_RISK", "0.7"))
+AUTOPLAN_WORKERS = int(os.getenv("AUTOPLAN_WORKERS", "2"))
+AUTOPLAN_BATCH = int(os.getenv("AUTOPLAN_BATCH", "16"))
+AUTOPLAN_LLM_CALLS_PER_MIN = float(os.getenv("AUTOPLAN_LLM_CALLS_PER_MIN", "60"))
+AUTOPLAN_AGE_WEIGHT = float(os.getenv("AUTOPLAN_AGE_WEIGHT", "0.01"))
+AUTOPLAN_QUEUE_MAX = int(os.getenv("AUTOPLAN_QUEUE_MAX", "5000"))
+
+LLM_CALLS_PER_PLAN = 2
+
+
+class SharedToolCalls:
+    def __init__(self):
+        self._flight = SingleFlight()
+        self._done: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.calls: Dict[str, int] = {}
+
+    def call(self, kind: str, key, fn: Callable[[], object]):
+        """fn() once per (kind, key) in this batch; errors are shared by concurrent callers only."""
+        k = (kind, key)
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+            if k in self._done:
+                return self._done[k]
+
+        def run():
+            with self._lock:
+                self.calls[kind] = self.calls.get(kind, 0) + 1
+            value = fn()
+            with self._lock:
+                self._done[k] = value
+            return value
+
+        return self._flight.do(k, run)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {kind: {"requests": n, "calls": self.calls.get(kind, 0)} for kind, n in self.requests.items()}
+
+
+class AutoPlanner:
+    def __init__(self, plan_many: Callable[[List[Tuple[str, Dict]]], Tuple[Dict, Dict]],
+                 lookup: Callable[[str], Optional[Dict]], skip: Optional[Callable[[str, Dict], bool]] = None,
+                 min_risk: float = AUTOPLAN_MIN_RISK, workers: int = AUTOPLAN_WORKERS,
+                 batch_size: int = AUTOPLAN_BATCH, llm_calls_per_min: float = AUTOPLAN_LLM_CALLS_PER_MIN,
+                 age_weight: float = AUTOPLAN_AGE_WEIGHT, max_queue: int = AUTOPLAN_QUEUE_MAX):
+        """
+        plan_many(items) plans [(alert_id, alert)] (PlanManager.get_many); lookup(alert_id) returns the
+        current alert or None; skip(alert_id, alert) is True when a plan already exists.
+        """
+        self.plan_many = plan_many
+        self.lookup = lookup
+        self.skip = skip
+        self.min_risk = min_risk
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.age_weight = age_weight
+        self.max_queue = max_queue
+        self.budget = RateLimiter(llm_calls_per_min / 60.0, burst=max(LLM_CALLS_PER_PLAN, int(llm_calls_per_min))) \
+            if llm_calls_per_min > 0 else None
+        self._heap: List[Tuple[float, int, str]] = []
+        self._queued: Dict[str, float] = {}     # alert_id -> priority key of its live heap entry
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.offered = 0
+        self.dropped = 0
+        self.planned = 0
+        self.failed = 0
+        self.batches = 0
+        self.budget_wait_s = 0.0
+
+    def priority(self, alert: Dict) -> float:
+        """
+        Heap key (smaller first) for risk + age_weight * minutes since the alert's time. Every queued
+        alert ages at the same rate, so the key can be computed once at offer time.
+        """
+        risk = float(alert.get("risk", alert.get("confidence", 0.0)) or 0.0)
+        return -(risk - self.age_weight * alert_timestamp(alert) / 60.0)
+
+    def offer(self, alerts) -> int:
+        """Queue the high-risk alerts among `alerts` (re-queued with a new key if their risk changed)."""
+        queued = 0
+        with self._cond:
+            for a in alerts:
+                risk = float(a.get("risk", 0.0) or 0.0)
+                alert_id = a.get("id")
+                if risk < self.min_risk or not alert_id:
+                    continue
+                self.offered += 1
+                key = self.priority(a)
+                if self._queued.get(alert_id) == key:
+                    continue
+                if alert_id not in self._queued and len(self._queued) >= self.max_queue:
+                    self.dropped += 1
+                    continue
+                # an older entry for this alert stays in the heap and is skipped when popped
+                self._queued[alert_id] = key
+                heapq.heappush(self._heap, (key, next(self._seq), alert_id))
+                queued += 1
+            if queued:
+                self._cond.notify_all()
+        return queued
+
+    def _take(self) -> List[str]:
+        with self._cond:
+            while not self._heap and not self._stop.is_set():
+                self._cond.wait(1.0)
+            ids = []
+            while self._heap and len(ids) < self.batch_size:
+                key, _, alert_id = heapq.heappop(self._heap)
+                if self._queued.get(alert_id) == key:
+                    del self._queued[alert_id]
+                    ids.append(alert_id)
+            return ids
+
+    def _wait_for_budget(self, n_plans: int):
+        if self.budget is None:
+            return
+        wait = max(self.budget.reserve() for _ in range(n_plans * LLM_CALLS_PER_PLAN))
+        if wait > 0:
+            self.budget_wait_s += wait
+            self._stop.wait(wait)
+
+    def run_batch(self, ids: List[str]):
+        items = []
+        for alert_id in ids:
+            alert = self.lookup(alert_id)
+            if alert is None or (self.skip is not None and self.skip(alert_id, alert)):
+                continue
+            items.append((alert_id, alert))
+        if not items:
+            return
+        self._wait_for_budget(len(items))
+        if self._stop.is_set():
+            return
+        started = time.perf_counter()
+        with start_trace("autoplan_batch", **{"plan.batch_size": len(items)}):
+            results, errors = self.plan_many(items)
+        self.batches += 1
+        self.planned += len(results)
+        self.failed += len(errors)
+        logger.info("autoplan: planned %d alerts (%d failed) in %.1f ms", len(results), len(errors),
+                    (time.perf_counter() - started) * 1000.0)
+
+    def _worker(self):
+        while not self._stop.is_set():
+            ids = self._take()
+            if not ids:
+                continue
+            try:
+                self.run_batch(ids)
+            except Exception:
+                logger.exception("autoplan batch failed")
+
+    # --------------------------
+    # Lifecycle / stats
+    # --------------------------
+    def start(self):
+        if any(t.is_alive() for t in self._threads):
+            return
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._worker, name=f"autoplan-{i}", daemon=True)
+                         for i in range(self.workers)]
+        for t in self._threads:
+            t.start()
+        logger.info("auto-planner started (%d workers, min risk %.2f)", self.workers, self.min_risk)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout)
+
+    def is_running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            queued = len(self._queued)
+        return {
+            "running": self.is_running(),
+            "workers": self.workers,
+            "batch_size": self.batch_size,
+            "min_risk": self.min_risk,
+            "queued": queued,
+            "offered": self.offered,
+            "dropped": self.dropped,
+            "planned": self.planned,
+            "failed": self.failed,
+            "batches": self.batches,
+            "budget_wait_s": round(self.budget_wait_s, 3),
+        }
@@ -0,0 +1,19 @@
+# backend/agents/coordinator_agent.py
+import os
+from agents.registry import AGENTS, function_tool
+from tools.weather_api_tool import poll_alerts_tool_func
+from tools.volunteer_api_tool import assign_volunteers_tool_func
+
+MODEL = os.getenv("ADK_MODEL", "gemini-2.0-flash")
+
+# coordinator agent object for observability (nothing relies on its runtime methods); built on first use
+def _build_coordinator_agent():
+    Agent, _ = AGENTS.adk()
+    return Agent(
+        name="coordinator_agent",
+        model=MODEL,
+        instruction="Coordinator agent for disaster relief. Use tools to poll alerts and assign volunteers.",
+        tools=[function_tool(poll_alerts_tool_func), function_tool(assign_volunteers_tool_func)],
+    )
+
+AGENTS.register("coordinator_agent", _build_coordinator_agent)
@@ -0,0 +1,193 @@
+# backend/agents/llm_cache.py
+"""
+Content-addressed cache for agent (LLM) responses.
+
+Two alerts that differ only in id / time / source produce the same prompt for all practical
+purposes, so responses are keyed on a canonical fingerprint of the alert:
+
+    (type, location, severity band, bucketed payload) + model name + prompt version (+ extras)
+
+hashed to a stable sha256. Lookups go through an in-process LRU and, when LLM_CACHE_DB is set,
+a SQLite tier that survives restarts. Concurrent misses for the same key share one model call.
+Only parsed model output is cached; heuristic fallbacks never are.
+
+Actual model round trips are wrapped in llm_call(agent), which feeds the llm_calls_total /
+llm_call_duration_seconds metrics (tools/metrics.py) and opens an llm.<agent> trace span.
+
+Env:
+    LLM_CACHE_ENABLED       1 (default) / 0 to disable globally
+    LLM_CACHE_TTL_SECONDS   default 3600
+    LLM_CACHE_SIZE          in-memory entries per agent, default 2000
+    LLM_CACHE_DB            optional path of the on-disk tier (unset = memory only)
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from tools.cache import SingleFlight, SQLiteCache, TTLCache
+from tools.metrics import REGISTRY
+from tools.tracing import span
+
+logger = logging.getLogger("disaster-backend.llm-cache")
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "2000"))
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "")
+
+LLM_CALLS = REGISTRY.counter("llm_calls_total", "Agent (LLM) calls by agent and outcome", ("agent", "outcome"))
+LLM_LATENCY = REGISTRY.histogram("llm_call_duration_seconds", "Agent (LLM) call latency", ("agent",))
+
+
+@contextmanager
+def llm_call(agent: str):
+    """Time one model round trip (as a metric and a trace span) and count it as ok / error."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        with span(f"llm.{agent}", kind="CLIENT"):
+            yield
+        outcome = "ok"
+    finally:
+        LLM_LATENCY.observe(time.perf_counter() - started, agent=agent)
+        LLM_CALLS.inc(agent=agent, outcome=outcome)
+
+# fields that identify an alert instance (or were derived from it) rather than describe the hazard
+_VOLATILE_FIELDS = ("id", "time", "source", "seq", "risk", "risk_source")
+
+# explicit bucket widths for known payload fields; other numbers keep 2 significant figures
+_PAYLOAD_BUCKETS = {
+    "rain_mm": 10.0,
+    "lat": 0.01,     # ~1 km
+    "lon": 0.01,
+}
+
+
+def _bucket(key: str, value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return value.strip().lower() if isinstance(value, str) else value
+    width = _PAYLOAD_BUCKETS.get(key)
+    if width is not None:
+        return round(math.floor(value / width) * width, 6)
+    if value == 0:
+        return 0
+    # 2 significant figures: population 123456 -> 120000, 0.734 -> 0.73
+    return float(f"{value:.2g}")
+
+
+def severity_band(alert: Dict) -> str:
+    """Explicit payload severity if present, otherwise a band derived from confidence."""
+    severity = (alert.get("payload") or {}).get("severity")
+    if isinstance(severity, str) and severity:
+        return severity.strip().lower()
+    try:
+        conf = float(alert.get("confidence", 0.5))
+    except (TypeError, ValueError):
+        conf = 0.5
+    return "high" if conf >= 0.85 else "medium" if conf >= 0.6 else "low"
+
+
+def alert_fingerprint(alert: Dict) -> Dict:
+    """Canonical, JSON-serializable description of what the model actually reasons about."""
+    payload = alert.get("payload") or {}
+    return {
+        "type": str(alert.get("type") or "").strip().lower(),
+        "location": str(alert.get("location") or "").strip().lower(),
+        "severity": severity_band(alert),
+        "payload": {k: _bucket(k, v) for k, v in sorted(payload.items()) if k != "severity"},
+        "extra": {
+            k: _bucket(k, v) for k, v in sorted(alert.items())
+            if k not in _VOLATILE_FIELDS and k not in ("type", "location", "payload", "confidence")
+            and isinstance(v, (str, int, float, bool))
+        },
+    }
+
+
+def cache_key(alert: Dict, model: str, prompt_version: str, **extra) -> str:
+    material = {"alert": alert_fingerprint(alert), "model": model, "prompt": prompt_version, "extra": extra}
+    encoded = json.dumps(material, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    get_or_call(key, fn, bypass=False): cached value for key, else fn() (stored unless it returns None).
+    bypass=True skips the lookup but still stores the fresh response.
+    """
+
+    def __init__(self, name: str, maxsize: int = LLM_CACHE_SIZE, ttl_seconds: float = LLM_CACHE_TTL,
+                 db_path: str = LLM_CACHE_DB, enabled: bool = LLM_CACHE_ENABLED):
+        self.name = name
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.memory = TTLCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+        self.disk: Optional[SQLiteCache] = None
+        self.calls = 0
+        self.bypassed = 0
+        self._flight = SingleFlight()
+        if enabled and db_path:
+            try:
+                self.disk = SQLiteCache(db_path, table=f"llm_{name}", ttl_seconds=ttl_seconds)
+            except Exception:
+                logger.exception("LLM cache %s: on-disk tier unavailable at %s", name, db_path)
+
+    def get(self, key: str):
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value)
+            except Exception:
+                logger.exception("LLM cache %s: disk write failed", self.name)
+
+    def get_or_call(self, key: str, fn: Callable[[], Any], bypass: bool = False):
+        if not self.enabled:
+            self.calls += 1
+            return fn()
+        if bypass:
+            self.bypassed += 1
+        else:
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+
+        def call():
+            self.calls += 1
+            value = fn()
+            if value is not None:
+                self.set(key, value)
+            return value
+
+        # bypassing callers still share an in-flight call rather than stampeding the model
+        return self._flight.do(key, call)
+
+    def invalidate(self, key: str):
+        self.memory.pop(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def clear(self):
+        self.memory.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl_seconds,
+            "memory": self.memory.stats(),
+            "disk": self.disk.stats() if self.disk is not None else None,
+            "llm_calls": self.calls,
+            "bypassed": self.bypassed,
+            "coalesced": self._flight.coalesced,
+        }
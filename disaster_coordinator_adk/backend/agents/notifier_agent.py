@@ -1,14 +1,19 @@
 # backend/agents/notifier_agent.py
-from google.adk.agents import Agent
+from agents.registry import AGENTS
 import os
 MODEL = os.getenv("ADK_MODEL", "gemini-2.0-flash")
 
-notifier_agent = Agent(
-    name="notifier_agent",
-    model=MODEL,
-    instruction="NotifierAgent: format short messages and notifications for ops teams."
-)
+# built on first use (agents/registry.py)
+def _build_notifier_agent():
+    Agent, _ = AGENTS.adk()
+    return Agent(
+        name="notifier_agent",
+        model=MODEL,
+        instruction="NotifierAgent: format short messages and notifications for ops teams."
+    )
+
+AGENTS.register("notifier_agent", _build_notifier_agent)
 
 def format_notification(plan: dict) -> dict:
-    # For now return simple dict; can call notifier_agent.run for LLM-crafted messages
+    # For now return simple dict; can call AGENTS.get("notifier_agent").run for LLM-crafted messages
     return {"subject": f"Plan for {plan['event_id']}", "body": f"Risk {plan['risk']}, tasks: {plan.get('tasks', [])}"}
@@ -0,0 +1,287 @@
+# backend/agents/plan_manager.py
+"""
+Single-flight, memoized plans per alert.
+
+- concurrent requests for the same alert (same content) share one in-flight plan computation
+  instead of each running risk / planner / volunteers / shelters / routes (and reserving
+  volunteers, and writing a plan to MemoryBank) on their own
+- finished plans are kept per alert id together with a fingerprint of the alert content they were
+  built from; later requests get the stored plan until the alert changes (new fingerprint), the
+  plan is older than PLAN_TTL_SECONDS, or the caller forces a replan
+- a forced replan still joins a computation that is already in flight (it is fresh anyway)
+- get_many() plans a whole batch with one build_many() call, joining computations other
+  requests already have in flight for some of its alerts
+- with a shared-state backend (memory/shared_state.py, several workers) finished plans are
+  written through and the shared copy is the one served, so invalidate() on any worker drops
+  the plan everywhere (the local copy only covers a backend outage); a short per-plan lease makes
+  a worker wait for a plan another worker is already computing instead of computing it again
+  (single plans; a batch coordinates within its own worker only)
+
+The fingerprint covers what the plan is computed from (type, location, severity payload,
+confidence, time, ...). It leaves out store bookkeeping (seq), scores the producer writes back
+(risk, risk_source), the dedup report trail, and the coordinates the plan itself geocodes
+into the payload, so planning an alert does not invalidate its own plan.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+from tools.cache import TTLCache
+
+logger = logging.getLogger("disaster-backend.plan")
+
+PLAN_TTL_SECONDS = float(os.getenv("PLAN_TTL_SECONDS", "300"))
+PLAN_STORE_MAX = int(os.getenv("PLAN_STORE_MAX", "5000"))
+# how long a worker waits on another worker's computation of the same plan
+PLAN_LEASE_SECONDS = float(os.getenv("PLAN_LEASE_SECONDS", "15"))
+
+_VOLATILE_FIELDS = ("seq", "risk", "risk_source", "reports", "report_count", "sources")
+_DERIVED_PAYLOAD_FIELDS = ("lat", "lon")
+
+HIT, MISS, COALESCED, REFRESH = "hit", "miss", "coalesced", "refresh"
+
+
+def plan_fingerprint(alert: Dict) -> str:
+    """Stable hash of the alert content a plan depends on."""
+    content = {k: v for k, v in alert.items() if k not in _VOLATILE_FIELDS}
+    payload = content.get("payload")
+    if isinstance(payload, dict):
+        content["payload"] = {k: v for k, v in payload.items() if k not in _DERIVED_PAYLOAD_FIELDS}
+    blob = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+class PlanManager:
+    def __init__(self, build: Callable[[str, Dict, bool], Dict],
+                 build_many: Optional[Callable[[List[Tuple[str, Dict]], bool], Dict]] = None,
+                 ttl_seconds: float = PLAN_TTL_SECONDS, maxsize: int = PLAN_STORE_MAX,
+                 shared=None, owner: str = ""):
+        """
+        build(alert_id, alert, refresh) computes (and persists) one plan; build_many(items, refresh)
+        does the same for [(alert_id, alert)] and returns {alert_id: plan or Exception}.
+        `shared` is an optional shared-state backend, `owner` this worker's id for its leases.
+        """
+        self._build = build
+        self._build_many = build_many
+        self.shared = shared
+        self.owner = owner
+        self.ttl_seconds = ttl_seconds
+        self._plans = TTLCache(maxsize=maxsize, ttl_seconds=ttl_seconds if ttl_seconds > 0 else None)
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self.computed = 0
+        self.stale = 0
+        self.forced = 0
+        self.coalesced = 0
+        self.shared_hits = 0
+
+    def _entry(self, alert_id: str) -> Optional[Dict]:
+        if self.shared is None:
+            return self._plans.get(alert_id)
+        try:
+            entry = self.shared.get_plan(alert_id)
+        except Exception:
+            logger.exception("shared plan lookup failed for %s; using the local copy", alert_id)
+            return self._plans.get(alert_id)
+        if entry is None:
+            self._plans.pop(alert_id)
+            return None
+        if self.ttl_seconds > 0 and entry["computed_at"] < time.time() - self.ttl_seconds:
+            return None
+        local = self._plans.get(alert_id)
+        if local is None or local["computed_at"] != entry["computed_at"]:
+            # computed by another worker
+            self.shared_hits += 1
+            self._plans.set(alert_id, entry)
+        return entry
+
+    def _stored(self, alert_id: str, fingerprint: str) -> Optional[Dict]:
+        entry = self._entry(alert_id)
+        if entry is None:
+            return None
+        if entry["fingerprint"] != fingerprint:
+            self.stale += 1
+            return None
+        return entry
+
+    def _shared_plan(self, alert_id: str, fingerprint: str, since: float = 0.0) -> Optional[Dict]:
+        """A plan another worker stored for this alert content (fresh, computed after `since`)."""
+        if self.shared is None:
+            return None
+        try:
+            entry = self.shared.get_plan(alert_id)
+        except Exception:
+            logger.exception("shared plan lookup failed for %s", alert_id)
+            return None
+        if entry is None or entry.get("fingerprint") != fingerprint or entry["computed_at"] < since:
+            return None
+        if self.ttl_seconds > 0 and entry["computed_at"] < time.time() - self.ttl_seconds:
+            return None
+        self.shared_hits += 1
+        self._plans.set(alert_id, entry)
+        return entry
+
+    def _build_once(self, alert_id: str, alert: Dict, fingerprint: str, force: bool):
+        """
+        (plan, None) built here, or (None, entry) when another worker computed it meanwhile.
+        Without shared state this is just build().
+        """
+        if self.shared is None:
+            return self._build(alert_id, alert, force), None
+        lease = f"plan:{alert_id}:{fingerprint}"
+        started, deadline = time.time(), time.monotonic() + PLAN_LEASE_SECONDS
+        held = False
+        try:
+            while not (held := self.shared.acquire_lease(lease, self.owner, PLAN_LEASE_SECONDS)):
+                entry = self._shared_plan(alert_id, fingerprint, since=started)
+                if entry is not None:
+                    return None, entry
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(0.05)
+        except Exception:
+            logger.exception("plan lease failed for %s; planning locally", alert_id)
+        try:
+            return self._build(alert_id, alert, force), None
+        finally:
+            if held:
+                self.shared.release_lease(lease, self.owner)
+
+    def _claim(self, keys) -> Tuple[list, Dict]:
+        """Split keys into ones this caller now computes and {key: future} of ones already in flight."""
+        mine, theirs = [], {}
+        with self._lock:
+            for key in keys:
+                future = self._inflight.get(key)
+                if future is None:
+                    self._inflight[key] = Future()
+                    mine.append(key)
+                else:
+                    theirs[key] = future
+                    self.coalesced += 1
+        return mine, theirs
+
+    def _settle(self, key, plan=None, error: Optional[BaseException] = None,
+                entry: Optional[Dict] = None) -> Optional[Dict]:
+        """Finish an in-flight key with a newly built plan, another worker's entry, or an error."""
+        if error is None and entry is None:
+            self.computed += 1
+            entry = {"plan": plan, "fingerprint": key[1], "computed_at": time.time()}
+            self._plans.set(key[0], entry)
+            if self.shared is not None:
+                try:
+                    self.shared.put_plan(key[0], entry)
+                except Exception:
+                    logger.exception("shared plan write failed for %s", key[0])
+        with self._lock:
+            future = self._inflight.pop(key)
+        if error is None:
+            future.set_result(entry)
+        else:
+            future.set_exception(error)
+        return entry
+
+    def get_plan(self, alert_id: str, alert: Dict, force: bool = False) -> Tuple[Dict, str]:
+        """
+        (entry, status): entry is {"plan", "fingerprint", "computed_at"}; status is "hit" (stored
+        plan), "miss" / "refresh" (computed by this call) or "coalesced" (shared another call's).
+        """
+        fingerprint = plan_fingerprint(alert)
+        if force:
+            self.forced += 1
+        else:
+            entry = self._stored(alert_id, fingerprint)
+            if entry is not None:
+                return entry, HIT
+
+        key = (alert_id, fingerprint)
+        mine, theirs = self._claim([key])
+        if theirs:
+            return theirs[key].result(), COALESCED
+        try:
+            plan, remote = self._build_once(alert_id, alert, fingerprint, force)
+        except BaseException as e:
+            self._settle(key, error=e)
+            raise
+        if remote is not None:
+            return self._settle(key, entry=remote), COALESCED
+        return self._settle(key, plan), REFRESH if force else MISS
+
+    def get_many(self, items: List[Tuple[str, Dict]], force: bool = False) -> Tuple[Dict, Dict]:
+        """
+        Plans for [(alert_id, alert)] -> ({alert_id: (entry, status)}, {alert_id: error message}).
+        Stored plans are reused, alerts already being planned elsewhere are waited for, and the
+        rest go to build_many() together.
+        """
+        results, errors = {}, {}
+        keys, alerts = [], {}
+        for alert_id, alert in items:
+            if alert_id in alerts:
+                continue
+            alerts[alert_id] = alert
+            fingerprint = plan_fingerprint(alert)
+            if force:
+                self.forced += 1
+            else:
+                entry = self._stored(alert_id, fingerprint)
+                if entry is not None:
+                    results[alert_id] = (entry, HIT)
+                    continue
+            keys.append((alert_id, fingerprint))
+
+        mine, theirs = self._claim(keys)
+        if mine:
+            try:
+                built = self._build_many([(key[0], alerts[key[0]]) for key in mine], force)
+            except BaseException as e:
+                built = {key[0]: e for key in mine}
+            for key in mine:
+                plan = built.get(key[0], RuntimeError("no plan returned"))
+                if isinstance(plan, BaseException):
+                    self._settle(key, error=plan)
+                    errors[key[0]] = f"{type(plan).__name__}: {plan}"
+                else:
+                    results[key[0]] = (self._settle(key, plan), REFRESH if force else MISS)
+        for key, future in theirs.items():
+            try:
+                results[key[0]] = (future.result(), COALESCED)
+            except Exception as e:
+                errors[key[0]] = f"{type(e).__name__}: {e}"
+        return results, errors
+
+    def has_plan(self, alert_id: str, alert: Dict) -> bool:
+        """True when a stored plan for this alert content exists or one is being computed."""
+        fingerprint = plan_fingerprint(alert)
+        with self._lock:
+            if (alert_id, fingerprint) in self._inflight:
+                return True
+        entry = self._entry(alert_id)
+        return entry is not None and entry["fingerprint"] == fingerprint
+
+    def invalidate(self, alert_id: str):
+        """Drop the stored plan (e.g. after its volunteers were released), on every worker."""
+        self._plans.pop(alert_id)
+        if self.shared is not None:
+            self.shared.delete_plan(alert_id)
+
+    def clear(self):
+        self._plans.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            in_flight = len(self._inflight)
+        return {
+            "store": self._plans.stats(),
+            "ttl_seconds": self._plans.ttl_seconds,
+            "computed": self.computed,
+            "stale": self.stale,
+            "forced": self.forced,
+            "coalesced": self.coalesced,
+            "shared_hits": self.shared_hits,
+            "in_flight": in_flight,
+        }
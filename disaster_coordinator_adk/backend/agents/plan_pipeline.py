@@ -0,0 +1,105 @@
+# backend/agents/plan_pipeline.py
+"""
+Tiny dependency-graph runner for the plan path.
+
+Each Stage names the stages it depends on, a deadline and a fallback. Independent stages run
+concurrently on a shared thread pool; a stage that errors or misses its deadline (or the
+overall SLA) resolves to its fallback so dependents and the response are never held up.
+A timed-out stage's thread is not interrupted; its late result is simply ignored.
+Each stage runs in a plan.<name> trace span, a child of the caller's current span.
+"""
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from tools.tracing import run_in_context, span
+
+logger = logging.getLogger("disaster-backend.plan")
+
+
+class Stage:
+    def __init__(self, name: str, fn: Callable[[Dict], Any], deps: Iterable[str] = (),
+                 deadline: Optional[float] = None, fallback: Optional[Callable[[Dict], Any]] = None):
+        self.name = name
+        self.fn = fn                    # fn(results) -> value; results holds every dependency's value
+        self.deps = tuple(deps)
+        self.deadline = deadline        # seconds, measured from the stage's start
+        self.fallback = fallback        # fallback(results) -> value used on error / timeout
+
+
+def _run_stage(stage: Stage, results: Dict):
+    with span(f"plan.{stage.name}"):
+        return stage.fn(results)
+
+
+def run_stages(stages, executor, sla_seconds: Optional[float] = None) -> Tuple[Dict, Dict]:
+    """
+    Run `stages` (a list of Stage) respecting dependencies.
+    Returns (results, timings) where timings[name] = {"ms": float, "status": "ok"|"error"|"timeout"|"skipped"}.
+    """
+    by_name = {s.name: s for s in stages}
+    results: Dict[str, Any] = {}
+    timings: Dict[str, Dict] = {}
+    start = time.perf_counter()
+    sla_end = start + sla_seconds if sla_seconds else None
+
+    pending = dict(by_name)
+    running = {}    # future -> (stage, started_at, deadline_at)
+
+    def finish(stage, status, value, started_at):
+        results[stage.name] = value
+        timings[stage.name] = {"ms": (time.perf_counter() - started_at) * 1000.0, "status": status}
+
+    def use_fallback(stage, status, started_at):
+        value = None
+        if stage.fallback is not None:
+            try:
+                value = stage.fallback(dict(results))
+            except Exception:
+                value = None
+        finish(stage, status, value, started_at)
+
+    while pending or running:
+        # launch every stage whose dependencies have resolved
+        for name in list(pending):
+            stage = pending[name]
+            if all(d in results for d in stage.deps):
+                del pending[name]
+                now = time.perf_counter()
+                if sla_end is not None and now >= sla_end:
+                    use_fallback(stage, "skipped", now)
+                    continue
+                deadline_at = now + stage.deadline if stage.deadline else None
+                if sla_end is not None:
+                    deadline_at = min(deadline_at, sla_end) if deadline_at else sla_end
+                future = executor.submit(run_in_context(_run_stage, stage, dict(results)))
+                running[future] = (stage, now, deadline_at)
+
+        if not running:
+            if pending:
+                # unresolvable dependencies (unknown stage name): fall back rather than hang
+                for name in list(pending):
+                    use_fallback(pending.pop(name), "skipped", time.perf_counter())
+            break
+
+        deadlines = [d for _, _, d in running.values() if d is not None]
+        timeout = max(0.0, min(deadlines) - time.perf_counter()) if deadlines else None
+        done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            stage, started_at, _ = running.pop(future)
+            try:
+                finish(stage, "ok", future.result(), started_at)
+            except Exception as e:
+                logger.warning("plan stage %s failed: %s", stage.name, e)
+                use_fallback(stage, "error", started_at)
+
+        now = time.perf_counter()
+        for future in [f for f, (_, _, d) in running.items() if d is not None and now >= d]:
+            stage, started_at, _ = running.pop(future)
+            future.cancel()
+            logger.warning("plan stage %s missed its deadline", stage.name)
+            use_fallback(stage, "timeout", started_at)
+
+    return results, timings
@@ -1,38 +1,71 @@
 # backend/agents/planner_agent.py
 import os
-from google.adk.agents import Agent
-from google.adk.tools import FunctionTool
 from tools.volunteer_api_tool import assign_volunteers_tool_func
+from agents.llm_cache import LLMResponseCache, cache_key, llm_call
+from agents.registry import AGENTS, function_tool
 
 MODEL = os.getenv("ADK_MODEL", "gemini-2.0-flash")
-vol_tool = FunctionTool(assign_volunteers_tool_func)
-
-planner_agent = Agent(
-    name="planner_agent",
-    model=MODEL,
-    instruction=(
-        "PlannerAgent: Given alert + risk produce a JSON plan with tasks. Use assign_volunteers tool to allocate volunteers."
-    ),
-    tools=[vol_tool],
-)
-
-def plan_via_adk(alert: dict, risk: float):
+# bump whenever the prompt / instruction changes so cached responses are not reused
+PROMPT_VERSION = "planner-v1"
+PLAN_CACHE = LLMResponseCache("planner")
+
+# built on first use (agents/registry.py)
+def _build_planner_agent():
+    Agent, _ = AGENTS.adk()
+    return Agent(
+        name="planner_agent",
+        model=MODEL,
+        instruction=(
+            "PlannerAgent: Given alert + risk produce a JSON plan with tasks. Use assign_volunteers tool to allocate volunteers."
+        ),
+        tools=[function_tool(assign_volunteers_tool_func)],
+    )
+
+AGENTS.register("planner_agent", _build_planner_agent)
+
+def get_planner_agent():
+    """The PlannerAgent; raises RuntimeError when it can't be built (plan_via_adk falls back)."""
+    agent = AGENTS.get("planner_agent")
+    if agent is None:
+        raise RuntimeError("planner_agent unavailable")
+    return agent
+
+def _ask_planner_agent(alert: dict, risk: float):
+    prompt = f"Alert: {alert}\nRisk: {risk}\nProduce JSON plan with tasks and call assign_volunteers tool when needed."
+    with llm_call("planner_agent"):
+        resp = get_planner_agent().run(prompt)
+    text = resp.output_text if hasattr(resp, "output_text") else str(resp)
+    import re, json
+    m = re.search(r"\{.*\}", text, re.S)
+    return json.loads(m.group(0)) if m else None
+
+def plan_via_adk(alert: dict, risk: float, use_cache: bool = True):
     """
     Ask planner_agent to produce plan JSON. If ADK method signatures differ, adapt.
     Returns a dict plan.
+    Plans are cached by alert fingerprint + risk (see agents/llm_cache.py); use_cache=False forces a fresh call.
     """
     try:
-        prompt = f"Alert: {alert}\nRisk: {risk}\nProduce JSON plan with tasks and call assign_volunteers tool when needed."
-        resp = planner_agent.run(prompt)
-        text = resp.output_text if hasattr(resp, "output_text") else str(resp)
-        import re, json
-        m = re.search(r"\{.*\}", text, re.S)
-        if m:
-            return json.loads(m.group(0))
+        import copy
+        fresh = {}
+
+        def ask():
+            plan = _ask_planner_agent(alert, risk)
+            if not isinstance(plan, dict):
+                return None
+            fresh["plan"] = plan
+            # the assignment is a side effect of this call (a volunteer reservation for this alert),
+            # so only the reusable part of the plan is cached
+            return {k: v for k, v in plan.items() if k not in ("assignment", "event_id", "risk")}
+
+        key = cache_key(alert, MODEL, PROMPT_VERSION, risk=round(float(risk), 2))
+        cached = PLAN_CACHE.get_or_call(key, ask, bypass=not use_cache)
+        if "plan" in fresh:
+            return fresh["plan"]
+        if cached is not None:
+            return dict(copy.deepcopy(cached), event_id=alert.get("id"), risk=risk)
     except Exception:
-        # fallback simple plan
-        required = 40 if risk > 0.8 else 12 if risk > 0.5 else 0
-        assignment = None
-        if required > 0:
-            assignment = assign_volunteers_tool_func({"location": alert["location"], "required": required})
-        return {"event_id": alert.get("id"), "risk": risk, "tasks": [{"task":"monitor" if required==0 else "assign_volunteers","details":""}], "assignment": assignment}
+        # fallback simple plan: text only. Volunteers are reserved by the plan's volunteers stage
+        # (or jointly for a batch), never here, so a failed agent call can't double-reserve
+        tasks = [{"task": "monitor", "details": ""}] if risk <= 0.5 else []
+        return {"event_id": alert.get("id"), "risk": risk, "tasks": tasks, "assignment": None}
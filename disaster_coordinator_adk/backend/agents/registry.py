@@ -0,0 +1,174 @@
+# backend/agents/registry.py
+"""
+Lazy registry for the ADK agents.
+
+Importing google.adk (and google.genai behind it) takes about a second and building an Agent
+validates its tools, so agent modules no longer do either at import time. Each one registers a
+factory instead:
+
+    AGENTS.register("risk_agent", _build_risk_agent)
+    ...
+    agent = AGENTS.get("risk_agent")      # built on first use, once, under a per-agent lock
+
+- get() returns None when the factory failed (e.g. ADK not installed); the failure is cached so
+  callers fall straight back to their heuristics instead of retrying the import on every call
+- prewarm() builds every registered agent on a background thread (AGENT_PREWARM, on by default),
+  so the first /api/plan does not pay for the import while /api/health is already answering
+- adk() imports the ADK classes once, timing each module; stats() reports those import timings
+  and per-agent build times for /api/agents
+- override(name, agent) installs a ready-made agent (tests, benchmarks)
+"""
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger("disaster-backend.agents")
+
+AGENT_PREWARM = os.getenv("AGENT_PREWARM", "1").lower() not in ("0", "false", "no", "")
+
+PENDING, READY, FAILED = "pending", "ready", "failed"
+
+
+class _Entry:
+    __slots__ = ("name", "factory", "agent", "state", "error", "init_ms", "built_at", "lock")
+
+    def __init__(self, name: str, factory: Callable[[], object]):
+        self.name = name
+        self.factory = factory
+        self.agent = None
+        self.state = PENDING
+        self.error = ""
+        self.init_ms = 0.0
+        self.built_at: Optional[float] = None
+        self.lock = threading.Lock()
+
+
+class AgentRegistry:
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._imports: Dict[str, float] = {}
+        self._import_errors: Dict[str, str] = {}
+        self._prewarm: Optional[threading.Thread] = None
+        self.prewarm_ms: Optional[float] = None
+
+    def register(self, name: str, factory: Callable[[], object]):
+        """Register (or replace) the factory for `name`; nothing is built until get()."""
+        with self._lock:
+            self._entries[name] = _Entry(name, factory)
+
+    def override(self, name: str, agent):
+        """Install a ready-made agent under `name`, skipping its factory."""
+        entry = _Entry(name, lambda: agent)
+        entry.agent, entry.state, entry.built_at = agent, READY, time.time()
+        with self._lock:
+            self._entries[name] = entry
+
+    def get(self, name: str):
+        """The agent, built on first call; None if its factory failed."""
+        entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"unknown agent {name!r}")
+        if entry.state != PENDING:
+            return entry.agent
+        with entry.lock:
+            if entry.state == PENDING:
+                self._build(entry)
+        return entry.agent
+
+    def _build(self, entry: _Entry):
+        started = time.perf_counter()
+        try:
+            entry.agent = entry.factory()
+            entry.state = READY
+        except Exception as e:
+            entry.error = f"{type(e).__name__}: {e}"
+            entry.state = FAILED
+            logger.warning("agent %s unavailable, using fallbacks: %s", entry.name, entry.error)
+        entry.init_ms = (time.perf_counter() - started) * 1000.0
+        entry.built_at = time.time()
+        if entry.state == READY:
+            logger.info("agent %s ready in %.1f ms", entry.name, entry.init_ms)
+
+    def ready(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return entry is not None and entry.state == READY
+
+    # --------------------------
+    # ADK imports
+    # --------------------------
+    def timed_import(self, module: str, attr: Optional[str] = None):
+        """
+        importlib.import_module (plus getattr(module, attr) when given) with the first, cold import
+        time recorded per module. The attribute is part of the timing because google.adk resolves
+        its public classes lazily on first access.
+        """
+        if module in self._imports:
+            mod = importlib.import_module(module)
+            return getattr(mod, attr) if attr else mod
+        started = time.perf_counter()
+        try:
+            mod = importlib.import_module(module)
+            value = getattr(mod, attr) if attr else mod
+        except Exception as e:
+            self._import_errors[module] = f"{type(e).__name__}: {e}"
+            raise
+        self._imports.setdefault(module, (time.perf_counter() - started) * 1000.0)
+        return value
+
+    def adk(self) -> Tuple[type, type]:
+        """(Agent, FunctionTool) from google.adk; raises ImportError if ADK is not installed."""
+        return self.timed_import("google.adk.agents", "Agent"), self.timed_import("google.adk.tools", "FunctionTool")
+
+    # --------------------------
+    # Pre-warm / stats
+    # --------------------------
+    def prewarm(self, names=None) -> threading.Thread:
+        """Build `names` (default: all registered agents) on a daemon thread; returns the thread."""
+        with self._lock:
+            if self._prewarm is not None and self._prewarm.is_alive():
+                return self._prewarm
+            targets = list(names) if names is not None else list(self._entries)
+
+            def run():
+                started = time.perf_counter()
+                for name in targets:
+                    try:
+                        self.get(name)
+                    except KeyError:
+                        pass
+                self.prewarm_ms = (time.perf_counter() - started) * 1000.0
+                logger.info("agent pre-warm finished in %.1f ms", self.prewarm_ms)
+
+            self._prewarm = threading.Thread(target=run, name="agent-prewarm", daemon=True)
+            self._prewarm.start()
+            return self._prewarm
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            "agents": {
+                e.name: {"state": e.state, "init_ms": round(e.init_ms, 3), "built_at": e.built_at, "error": e.error}
+                for e in entries
+            },
+            "imports_ms": {m: round(ms, 3) for m, ms in self._imports.items()},
+            "import_errors": dict(self._import_errors),
+            "prewarm": {
+                "enabled": AGENT_PREWARM,
+                "running": self._prewarm is not None and self._prewarm.is_alive(),
+                "ms": round(self.prewarm_ms, 3) if self.prewarm_ms is not None else None,
+            },
+        }
+
+
+AGENTS = AgentRegistry()
+
+
+def function_tool(func):
+    """Wrap a local tool function as an ADK FunctionTool."""
+    _, tool_cls = AGENTS.adk()
+    return tool_cls(func)
@@ -1,46 +1,62 @@
 # backend/agents/risk_agent.py
 import os
-from google.adk.agents import Agent
+from agents.llm_cache import LLMResponseCache, cache_key, llm_call
+from agents.registry import AGENTS
+from agents.risk_scoring import heuristic_risk
 
 MODEL = os.getenv("ADK_MODEL", "gemini-2.0-flash")
+# bump whenever the prompt / instruction changes so cached responses are not reused
+PROMPT_VERSION = "risk-v1"
+RISK_CACHE = LLMResponseCache("risk")
 
-# This agent will accept an 'alert' JSON and return risk_score (0..1)
-risk_agent = Agent(
-    name="risk_agent",
-    model=MODEL,
-    instruction=(
-        "You are RiskAgent. Given an alert JSON, compute a float risk score between 0 and 1 "
-        "and provide a short explanation. Output JSON: {\"risk\": 0.72, \"explain\":\"...\"}"
-    ),
-)
+# This agent will accept an 'alert' JSON and return risk_score (0..1); built on first use (agents/registry.py)
+def _build_risk_agent():
+    Agent, _ = AGENTS.adk()
+    return Agent(
+        name="risk_agent",
+        model=MODEL,
+        instruction=(
+            "You are RiskAgent. Given an alert JSON, compute a float risk score between 0 and 1 "
+            "and provide a short explanation. Output JSON: {\"risk\": 0.72, \"explain\":\"...\"}"
+        ),
+    )
+
+AGENTS.register("risk_agent", _build_risk_agent)
+
+def get_risk_agent():
+    """The RiskAgent; raises RuntimeError when it can't be built (callers fall back to heuristics)."""
+    agent = AGENTS.get("risk_agent")
+    if agent is None:
+        raise RuntimeError("risk_agent unavailable")
+    return agent
 
 # helper to call via ADK's run / chat API. Use model.run or similar depending on ADK shape.
-def evaluate_risk_via_adk(alert: dict) -> dict:
+def _ask_risk_agent(alert: dict):
+    """One model round trip; returns the parsed JSON dict, or None if the output couldn't be parsed."""
+    prompt = f"Alert JSON:\n{alert}\n\nReturn JSON: {{\"risk\":<0..1>, \"explain\":\"short\"}}"
+    with llm_call("risk_agent"):
+        response = get_risk_agent().run(prompt)
+    # attempt parse JSON from response
+    import json, re
+    text = response.output_text if hasattr(response, "output_text") else str(response)
+    # extract first JSON object
+    m = re.search(r"\{.*\}", text, re.S)
+    return json.loads(m.group(0)) if m else None
+
+def evaluate_risk_via_adk(alert: dict, use_cache: bool = True) -> dict:
     """
     Runs the RiskAgent LLM to score the alert.
     If your ADK version exposes agent.run() or agent.chat(), adapt accordingly.
     This is a simple wrapper that sends a prompt + alert as string and expects JSON in response.
+    Responses are cached by alert fingerprint (see agents/llm_cache.py); use_cache=False forces a fresh call.
     """
-    # For many ADK versions you do something like: risk_agent.run(input=...)
-    from google.adk import client as adk_client  # optional per-version
-    prompt = f"Alert JSON:\n{alert}\n\nReturn JSON: {{\"risk\":<0..1>, \"explain\":\"short\"}}"
-    # Fallback approach uses the agent as a plain LLM call:
     try:
-        response = risk_agent.run(prompt)
-        # attempt parse JSON from response
-        import json, re
-        text = response.output_text if hasattr(response, "output_text") else str(response)
-        # extract first JSON object
-        m = re.search(r"\{.*\}", text, re.S)
-        if m:
-            return json.loads(m.group(0))
+        key = cache_key(alert, MODEL, PROMPT_VERSION)
+        result = RISK_CACHE.get_or_call(key, lambda: _ask_risk_agent(alert), bypass=not use_cache)
+        if result is not None:
+            return dict(result)
         # fallback: return default heuristic
         return {"risk": 0.5, "explain": "fallback (couldn't parse LLM output)"}
     except Exception:
-        # fallback heuristic
-        payload = alert.get("payload", {})
-        # simple heuristic:
-        r = 0.5
-        if alert.get("type") == "rainfall":
-            r = 0.9 if payload.get("rain_mm", 0) > 150 else 0.7 if payload.get("rain_mm", 0) > 80 else 0.4
-        return {"risk": r, "explain": "heuristic fallback"}
+        # fallback heuristic (shared with the producer and api_plan)
+        return {"risk": heuristic_risk(alert), "explain": "heuristic fallback"}
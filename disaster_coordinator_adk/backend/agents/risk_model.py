@@ -0,0 +1,211 @@
+# backend/agents/risk_model.py
+"""
+Deterministic, table-driven risk model.
+
+Each hazard type has a row in the risk table:
+
+    base        starting score
+    severity    additive score per payload severity ("low" / "medium" / "high")
+    population  piecewise-linear curve [[people, score], ...] (interpolated, flat past the ends)
+    rain_mm     piecewise-linear curve [[mm, score], ...] for rainfall-driven hazards
+    confidence  0..1: how strongly feed confidence scales the result
+                (risk = raw * (1 - confidence + confidence * alert_confidence))
+
+Unknown hazard types use the "default" row. The table is compiled once into NumPy arrays indexed
+by hazard, so scoring a batch is a handful of vector operations (a few microseconds per alert).
+Scoring functions can also be plugged in per hazard with RiskModel.register(hazard, fn), where
+fn(columns) -> np.ndarray receives the extracted feature columns of that hazard's alerts.
+
+RISK_MODEL_PATH may point to a JSON file whose rows override / extend DEFAULT_RISK_TABLE.
+RISK_MODE selects how the model and the RiskAgent LLM cooperate:
+    llm        (default) model score first, every alert refined by the LLM
+    prefilter  only alerts the model finds ambiguous (RISK_AMBIGUOUS_LOW..HIGH) go to the LLM
+    local      LLM disabled; the model is authoritative
+"""
+import json
+import logging
+import os
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger("disaster-backend.risk")
+
+RISK_MODE = os.getenv("RISK_MODE", "llm").lower()
+RISK_AMBIGUOUS_LOW = float(os.getenv("RISK_AMBIGUOUS_LOW", "0.4"))
+RISK_AMBIGUOUS_HIGH = float(os.getenv("RISK_AMBIGUOUS_HIGH", "0.7"))
+
+SEVERITIES = ("low", "medium", "high")
+
+DEFAULT_RISK_TABLE: Dict[str, Dict] = {
+    "default": {
+        "base": 0.2,
+        "severity": {"low": 0.0, "medium": 0.15, "high": 0.3},
+        "population": [[0, 0.0], [10000, 0.05], [100000, 0.15], [1000000, 0.25]],
+        "rain_mm": [],
+        "confidence": 0.5,
+    },
+    "rainfall": {
+        "base": 0.15,
+        "severity": {"low": 0.0, "medium": 0.1, "high": 0.2},
+        "population": [[0, 0.0], [10000, 0.05], [100000, 0.1], [1000000, 0.2]],
+        "rain_mm": [[0, 0.0], [50, 0.15], [80, 0.35], [150, 0.6], [250, 0.7]],
+        "confidence": 0.4,
+    },
+    "flood": {
+        "base": 0.3,
+        "severity": {"low": 0.0, "medium": 0.2, "high": 0.35},
+        "population": [[0, 0.0], [10000, 0.05], [100000, 0.15], [1000000, 0.25]],
+        "rain_mm": [[0, 0.0], [80, 0.1], [150, 0.2]],
+        "confidence": 0.5,
+    },
+    "cyclone": {
+        "base": 0.35,
+        "severity": {"low": 0.0, "medium": 0.2, "high": 0.4},
+        "population": [[0, 0.0], [10000, 0.05], [100000, 0.15], [1000000, 0.2]],
+        "rain_mm": [[0, 0.0], [100, 0.05], [200, 0.1]],
+        "confidence": 0.5,
+    },
+    "earthquake": {
+        "base": 0.3,
+        "severity": {"low": 0.0, "medium": 0.25, "high": 0.45},
+        "population": [[0, 0.0], [10000, 0.05], [100000, 0.15], [1000000, 0.25]],
+        "rain_mm": [],
+        "confidence": 0.6,
+    },
+    "wildfire": {
+        "base": 0.25,
+        "severity": {"low": 0.0, "medium": 0.2, "high": 0.4},
+        "population": [[0, 0.0], [10000, 0.05], [100000, 0.1], [1000000, 0.2]],
+        "rain_mm": [],
+        "confidence": 0.5,
+    },
+}
+
+
+def _curve(points):
+    points = sorted((float(x), float(y)) for x, y in (points or []))
+    if not points:
+        return np.array([0.0]), np.array([0.0])
+    return np.array([p[0] for p in points]), np.array([p[1] for p in points])
+
+
+def _float_or(value, default):
+    try:
+        return default if value is None else float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class RiskModel:
+    def __init__(self, table: Optional[Dict[str, Dict]] = None):
+        self._custom: Dict[str, Callable[[Dict[str, np.ndarray]], np.ndarray]] = {}
+        self.load_table(table or DEFAULT_RISK_TABLE)
+
+    def load_table(self, table: Dict[str, Dict]):
+        """Compile the table into per-hazard arrays. Rows are merged over the "default" row."""
+        default = dict(DEFAULT_RISK_TABLE["default"], **table.get("default", {}))
+        rows = {"default": default}
+        for hazard, row in table.items():
+            rows[hazard.strip().lower()] = dict(default, **row)
+        self.table = rows
+        self.hazards = list(rows)
+        self._hazard_index = {h: i for i, h in enumerate(self.hazards)}
+        self._base = np.array([rows[h]["base"] for h in self.hazards], dtype=float)
+        self._confidence = np.array([rows[h]["confidence"] for h in self.hazards], dtype=float)
+        self._severity = np.array(
+            [[rows[h]["severity"].get(s, 0.0) for s in SEVERITIES] + [0.0] for h in self.hazards], dtype=float
+        )   # last column: unknown severity
+        self._population = [_curve(rows[h]["population"]) for h in self.hazards]
+        self._rain = [_curve(rows[h]["rain_mm"]) for h in self.hazards]
+
+    def register(self, hazard: str, fn: Callable[[Dict[str, np.ndarray]], np.ndarray]):
+        """Use fn(columns) -> scores instead of the table row for `hazard`."""
+        hazard = hazard.strip().lower()
+        if hazard not in self._hazard_index:
+            self.load_table(dict(self.table, **{hazard: {}}))
+        self._custom[hazard] = fn
+
+    # --------------------------
+    # Feature extraction
+    # --------------------------
+    def columns(self, alerts: List[Dict]) -> Dict[str, np.ndarray]:
+        default_idx = self._hazard_index["default"]
+        sev_idx = {s: i for i, s in enumerate(SEVERITIES)}
+        hazard, severity, population, rain_mm, confidence = [], [], [], [], []
+        for a in alerts:
+            payload = a.get("payload") or {}
+            hazard.append(self._hazard_index.get(str(a.get("type") or "").lower(), default_idx))
+            sev = payload.get("severity")
+            severity.append(sev_idx.get(sev.lower() if isinstance(sev, str) else sev, len(SEVERITIES)))
+            population.append(_float_or(payload.get("population"), 0.0))
+            rain_mm.append(_float_or(payload.get("rain_mm"), 0.0))
+            confidence.append(_float_or(a.get("confidence"), 0.5))
+        return {
+            "hazard": np.array(hazard, dtype=np.intp),
+            "severity": np.array(severity, dtype=np.intp),
+            "population": np.array(population, dtype=float),
+            "rain_mm": np.array(rain_mm, dtype=float),
+            "confidence": np.clip(np.array(confidence, dtype=float), 0.0, 1.0),
+        }
+
+    # --------------------------
+    # Scoring
+    # --------------------------
+    def score(self, alerts: List[Dict]) -> np.ndarray:
+        """Risk in [0, 1] for each alert."""
+        if not alerts:
+            return np.empty(0, dtype=float)
+        return self.score_columns(self.columns(alerts))
+
+    def score_columns(self, cols: Dict[str, np.ndarray]) -> np.ndarray:
+        h = cols["hazard"]
+        raw = self._base[h] + self._severity[h, cols["severity"]]
+        # curves differ per hazard, so interpolate once per hazard present in the batch
+        for idx in np.unique(h):
+            mask = h == idx
+            pop_x, pop_y = self._population[idx]
+            rain_x, rain_y = self._rain[idx]
+            raw[mask] += np.interp(cols["population"][mask], pop_x, pop_y)
+            raw[mask] += np.interp(cols["rain_mm"][mask], rain_x, rain_y)
+        weight = self._confidence[h]
+        risk = raw * (1.0 - weight + weight * cols["confidence"])
+
+        for hazard, fn in self._custom.items():
+            idx = self._hazard_index.get(hazard)
+            mask = h == idx if idx is not None else None
+            if mask is not None and mask.any():
+                risk[mask] = fn({k: v[mask] for k, v in cols.items()})
+        return np.clip(risk, 0.0, 1.0)
+
+    def score_one(self, alert: Dict) -> float:
+        return float(self.score([alert])[0])
+
+    @staticmethod
+    def ambiguous(scores: np.ndarray) -> np.ndarray:
+        """Mask of scores the model can't call confidently either way."""
+        return (scores > RISK_AMBIGUOUS_LOW) & (scores < RISK_AMBIGUOUS_HIGH)
+
+
+def llm_candidates(scores) -> np.ndarray:
+    """Mask of alerts that should be sent to the LLM under RISK_MODE."""
+    scores = np.asarray(scores, dtype=float)
+    if RISK_MODE == "local":
+        return np.zeros(scores.shape, dtype=bool)
+    if RISK_MODE == "prefilter":
+        return RiskModel.ambiguous(scores)
+    return np.ones(scores.shape, dtype=bool)
+
+
+def risk_model_from_env() -> RiskModel:
+    path = os.getenv("RISK_MODEL_PATH", "")
+    if path:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return RiskModel(dict(DEFAULT_RISK_TABLE, **json.load(f)))
+        except Exception:
+            logger.exception("could not load RISK_MODEL_PATH=%s; using the default risk table", path)
+    return RiskModel()
+
+
+RISK_MODEL = risk_model_from_env()
@@ -0,0 +1,122 @@
+# backend/agents/risk_scoring.py
+"""
+Batch risk scoring for newly ingested alerts.
+
+- heuristic_scores(alerts): the table-driven RiskModel (agents/risk_model.py) over a batch; the
+  single local scorer used by the producer, api_plan and the RiskAgent wrapper
+- score_batch_via_adk(alerts): packs up to RISK_BATCH_SIZE alerts into one structured RiskAgent
+  prompt; per-alert results share the RiskAgent response cache with evaluate_risk_via_adk, so a
+  later /api/plan for the same alert doesn't ask the model again
+- score_alerts(alerts, use_llm): writes risk / risk_source onto each alert dict; with use_llm only
+  the alerts RISK_MODE selects (all / ambiguous only / none) are sent to the model
+"""
+import json
+import logging
+import os
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from agents.risk_model import RISK_MODE, RISK_MODEL, llm_candidates
+
+logger = logging.getLogger("disaster-backend.risk")
+
+RISK_BATCH_SIZE = int(os.getenv("RISK_BATCH_SIZE", "20"))
+# RISK_MODE=local disables LLM rescoring regardless of this flag
+RISK_BATCH_LLM = os.getenv("RISK_BATCH_LLM", "1").lower() not in ("0", "false", "no") and RISK_MODE != "local"
+
+
+def heuristic_scores(alerts: List[Dict]) -> np.ndarray:
+    """Risk in [0, 1] for each alert, computed in one vectorized pass."""
+    return RISK_MODEL.score(alerts)
+
+
+def heuristic_risk(alert: Dict) -> float:
+    return RISK_MODEL.score_one(alert)
+
+
+def _batch_prompt(alerts):
+    # leave out our own previous score so the model judges the raw alert
+    items = [{"i": i, "alert": {k: v for k, v in a.items() if k not in ("risk", "risk_source")}}
+             for i, a in enumerate(alerts)]
+    return (
+        "Score each alert below independently.\n"
+        f"Alerts JSON:\n{json.dumps(items, default=str)}\n\n"
+        "Return a JSON array with one object per alert, in the same order: "
+        "[{\"i\": <index>, \"risk\": <0..1>, \"explain\": \"short\"}, ...]"
+    )
+
+
+def _parse_batch(text, n):
+    m = re.search(r"\[.*\]", text, re.S)
+    if not m:
+        return {}
+    out = {}
+    for item in json.loads(m.group(0)):
+        try:
+            i = int(item["i"])
+            risk = float(item["risk"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 0 <= i < n:
+            out[i] = {"risk": max(0.0, min(1.0, risk)), "explain": item.get("explain", "")}
+    return out
+
+
+def score_batch_via_adk(alerts: List[Dict], use_cache: bool = True) -> List[Optional[Dict]]:
+    """
+    {"risk", "explain"} per alert from the RiskAgent (None where the model gave no usable score).
+    Cached alerts are answered locally; the rest go out RISK_BATCH_SIZE per prompt.
+    Raises if the agent can't be called at all.
+    """
+    from agents.risk_agent import MODEL, PROMPT_VERSION, RISK_CACHE, get_risk_agent
+    from agents.llm_cache import cache_key, llm_call
+
+    results: List[Optional[Dict]] = [None] * len(alerts)
+    keys = [cache_key(a, MODEL, PROMPT_VERSION) for a in alerts]
+    missing = []
+    for i, key in enumerate(keys):
+        cached = RISK_CACHE.get(key) if use_cache and RISK_CACHE.enabled else None
+        if cached is not None:
+            results[i] = dict(cached)
+        else:
+            missing.append(i)
+
+    risk_agent = get_risk_agent() if missing else None
+    for start in range(0, len(missing), RISK_BATCH_SIZE):
+        chunk = missing[start:start + RISK_BATCH_SIZE]
+        with llm_call("risk_agent_batch"):
+            response = risk_agent.run(_batch_prompt([alerts[i] for i in chunk]))
+        RISK_CACHE.calls += 1
+        text = response.output_text if hasattr(response, "output_text") else str(response)
+        for j, scored in _parse_batch(text, len(chunk)).items():
+            i = chunk[j]
+            results[i] = scored
+            if RISK_CACHE.enabled:
+                RISK_CACHE.set(keys[i], scored)
+    return results
+
+
+def score_alerts(alerts: List[Dict], use_llm: bool = False) -> List[Dict]:
+    """
+    Stamp every alert with "risk" and "risk_source" ("heuristic" | "llm"). Mutates and returns `alerts`.
+    With use_llm the model's score replaces the heuristic wherever it produced one.
+    """
+    if not alerts:
+        return alerts
+    scores = heuristic_scores(alerts)
+    llm = [None] * len(alerts)
+    selected = np.flatnonzero(llm_candidates(scores)) if use_llm else []
+    if len(selected):
+        try:
+            for i, scored in zip(selected, score_batch_via_adk([alerts[i] for i in selected])):
+                llm[i] = scored
+        except Exception as e:
+            logger.warning("batch risk scoring via RiskAgent failed (%d alerts): %s", len(selected), e)
+    for a, h, scored in zip(alerts, scores, llm):
+        if scored is not None:
+            a["risk"], a["risk_source"] = round(float(scored["risk"]), 4), "llm"
+        else:
+            a["risk"], a["risk_source"] = round(float(h), 4), "heuristic"
+    return alerts
@@ -0,0 +1,121 @@
+# backend/benchmarks/harness.py
+"""
+Timing helpers for the benchmark suites: sequential / concurrent measurement loops, latency
+percentiles, result records and baseline comparison.
+
+A result is a flat dict:
+    {"suite", "case", "params", "ops", "seconds", "throughput_per_s",
+     "p50_ms", "p90_ms", "p99_ms", "max_ms", "mean_ms", ...extra}
+so result files can be diffed between releases with compare().
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (q in 0..1)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(suite: str, case: str, latencies_s: List[float], wall_s: float, ops_per_call: int = 1,
+              params: Optional[Dict] = None, **extra) -> Dict:
+    lat = sorted(x * 1000.0 for x in latencies_s)
+    ops = len(lat) * ops_per_call
+    out = {
+        "suite": suite,
+        "case": case,
+        "params": dict(params or {}),
+        "ops": ops,
+        "seconds": round(wall_s, 6),
+        "throughput_per_s": round(ops / wall_s, 3) if wall_s > 0 else 0.0,
+        "mean_ms": round(sum(lat) / len(lat), 6) if lat else 0.0,
+        "p50_ms": round(percentile(lat, 0.50), 6),
+        "p90_ms": round(percentile(lat, 0.90), 6),
+        "p99_ms": round(percentile(lat, 0.99), 6),
+        "max_ms": round(lat[-1], 6) if lat else 0.0,
+    }
+    out.update(extra)
+    return out
+
+
+def measure(fn: Callable[[], object], seconds: float = 1.0, min_iterations: int = 5,
+            max_iterations: Optional[int] = None, warmup: int = 1):
+    """
+    Call fn() repeatedly for about `seconds` (at least `min_iterations` times).
+    Returns (latencies_s, wall_s).
+    """
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    start = time.perf_counter()
+    deadline = start + seconds
+    while True:
+        t0 = time.perf_counter()
+        fn()
+        t1 = time.perf_counter()
+        latencies.append(t1 - t0)
+        if len(latencies) >= min_iterations and (t1 >= deadline or (max_iterations and len(latencies) >= max_iterations)):
+            break
+    return latencies, time.perf_counter() - start
+
+
+def measure_concurrent(fn: Callable[[int], object], clients: int, seconds: float = 1.0,
+                       min_iterations: int = 1):
+    """
+    `clients` threads each call fn(client_index) in a loop for about `seconds`.
+    Returns (latencies_s over all clients, wall_s, errors).
+    """
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(i):
+        mine, failed, n = [], 0, 0
+        while n < min_iterations or time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                fn(i)
+            except Exception:
+                failed += 1
+            mine.append(time.perf_counter() - t0)
+            n += 1
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(worker, range(clients)))
+    return latencies, time.perf_counter() - start, errors[0]
+
+
+def result_key(r: Dict) -> str:
+    params = ",".join(f"{k}={r['params'][k]}" for k in sorted(r.get("params", {})))
+    return f"{r['suite']}/{r['case']}[{params}]"
+
+
+def compare(current: List[Dict], baseline: List[Dict], tolerance: float = 0.25) -> List[Dict]:
+    """
+    Cases whose throughput dropped, or whose p99 grew, by more than `tolerance` (a fraction)
+    against the baseline run. Cases missing from either side are ignored.
+    """
+    base = {result_key(r): r for r in baseline}
+    regressions = []
+    for r in current:
+        b = base.get(result_key(r))
+        if b is None:
+            continue
+        reasons = []
+        if b["throughput_per_s"] > 0 and r["throughput_per_s"] < b["throughput_per_s"] * (1 - tolerance):
+            reasons.append(f"throughput {b['throughput_per_s']:.1f} -> {r['throughput_per_s']:.1f}/s")
+        if b["p99_ms"] > 0 and r["p99_ms"] > b["p99_ms"] * (1 + tolerance):
+            reasons.append(f"p99 {b['p99_ms']:.3f} -> {r['p99_ms']:.3f} ms")
+        if reasons:
+            regressions.append({"case": result_key(r), "reasons": reasons})
+    return regressions
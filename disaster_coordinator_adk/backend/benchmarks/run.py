@@ -0,0 +1,482 @@
+# backend/benchmarks/run.py
+"""
+Offline benchmark / load-test suite for the backend hot paths.
+
+    cd backend
+    python -m benchmarks.run                          # every suite, full sizes (needs ~3 GB RAM for 1M alerts)
+    python -m benchmarks.run --quick                  # smaller sizes, shorter runs
+    python -m benchmarks.run --suite poll,plan --output results.json
+    python -m benchmarks.run --output new.json --compare baseline.json --tolerance 0.25
+
+Suites:
+    poll      GET /api/poll_alerts over HTTP (uvicorn on loopback) with 100 .. 1M alerts stored:
+              full snapshot (up to --snapshot-max alerts), limit=100, by location, since-delta, ETag 304
+    plan      POST /api/plan/{id} from 1..N concurrent clients, plan store warm and ?refresh=true;
+              POST /api/plan/batch with refresh (--plan-batch alerts per call)
+    producer  run_producer_cycle ingest rate (normalize, enrich, dedup, score, commit) per batch size
+    memory    MemoryBank write / query rates, in-memory and SQLite write-behind
+    spatial   shelter registry nearest / radius queries, geocode cache tiers, dedup merge
+
+Everything runs offline: API keys are blanked so the tools use their local tiers (gazetteer,
+shelter registry, straight-line routes), no feed sources are started, and the ADK agents are
+replaced by stubs that answer after --llm-latency-ms. Alerts come from benchmarks/synthetic.py.
+
+Results are JSON ({"meta", "results"}, see benchmarks/harness.py); with --compare the run exits
+with status 1 if any case regressed beyond --tolerance against an earlier results file.
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+# offline configuration; must be in place before any backend module is imported
+os.environ["GOOGLE_MAPS_API_KEY"] = ""
+os.environ["OPENWEATHER_API_KEY"] = ""
+os.environ["ALERT_SOURCES"] = ""
+os.environ.setdefault("GEOCODE_CACHE_DB", "")
+os.environ.setdefault("LLM_CACHE_DB", "")
+os.environ.setdefault("MEMORY_BACKEND", "memory")
+os.environ.setdefault("RISK_MODE", "prefilter")
+
+import httpx
+
+import main
+from agents.registry import AGENTS
+from benchmarks.harness import compare, measure, measure_concurrent, summarize
+from benchmarks.synthetic import AlertGenerator, parse_weights
+from memory.alert_dedup import AlertDeduplicator
+from memory.alert_store import AlertStore
+from memory.alert_tiles import TileIndex
+from memory.memory_bank import MemoryBank
+from memory.storage import SQLiteStorage
+from tools import geocode_tool
+from tools.shelter_index import ShelterRegistry
+from tools.weather_api_tool import LOCATIONS
+
+logger = logging.getLogger("disaster-backend.bench")
+
+SUITES = ("poll", "plan", "producer", "memory", "spatial")
+
+
+# --------------------------
+# Stubs / fixtures
+# --------------------------
+class StubAgent:
+    """Stands in for an ADK Agent: run(prompt) answers with canned JSON after a simulated latency."""
+
+    def __init__(self, kind: str, latency_s: float):
+        self.kind = kind
+        self.latency_s = latency_s
+        self.calls = 0
+
+    def run(self, prompt):
+        self.calls += 1
+        if self.latency_s:
+            time.sleep(self.latency_s * random.uniform(0.8, 1.2))
+        if self.kind == "planner":
+            return json.dumps({"tasks": [{"task": "notify_authorities", "details": "stub plan"}]})
+        n = prompt.count('{"i": ')
+        if n:   # batched risk prompt (agents/risk_scoring.py)
+            return json.dumps([{"i": i, "risk": round(random.uniform(0.2, 0.9), 2), "explain": "stub"} for i in range(n)])
+        return json.dumps({"risk": round(random.uniform(0.2, 0.9), 2), "explain": "stub"})
+
+
+def install_stub_agents(latency_ms: float):
+    AGENTS.override("risk_agent", StubAgent("risk", latency_ms / 1000.0))
+    AGENTS.override("planner_agent", StubAgent("planner", latency_ms / 1000.0))
+
+
+def use_store(store: AlertStore, tiles: Optional[TileIndex] = None):
+    """
+    Serve `store` from the app; a fresh tile index observes it unless `tiles` already does (a store
+    being restored). Encoded alerts / responses of the previous store are dropped.
+    """
+    if tiles is None:
+        tiles = TileIndex()
+        store.add_observer(tiles)
+        store.add_observer(main.ALERT_JSON)
+    main.ALERT_JSON.clear()
+    main.RESPONSES.clear()
+    main.ALERTS = store
+    main.alerts_lock = store.lock
+    main.TILES = tiles
+
+
+def fill_store(gen: AlertGenerator, size: int, chunk: int = 10000) -> AlertStore:
+    store = AlertStore(max_alerts=size)
+    done = 0
+    while done < size:
+        n = min(chunk, size - done)
+        store.add_many(gen.batch(n))
+        done += n
+    return store
+
+
+class LoopbackServer:
+    """The FastAPI app under uvicorn on 127.0.0.1 in a background thread (lifespan off: no ingest)."""
+
+    def __init__(self, app):
+        import uvicorn
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, lifespan="off",
+                                log_level="warning", access_log=False)
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, name="bench-uvicorn", daemon=True)
+        self.url = f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        deadline = time.monotonic() + 15
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError("benchmark server did not start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(10)
+
+
+def _generator(args, **overrides) -> AlertGenerator:
+    opts = dict(seed=args.seed, hazard_weights=parse_weights(args.hazards), places=args.places,
+                n_places=args.n_places, duplicate_ratio=args.duplicate_ratio,
+                sources=("mock-weather-engine", "openweather", "field-report"))
+    opts.update(overrides)
+    return AlertGenerator(**opts)
+
+
+# --------------------------
+# Suites
+# --------------------------
+def bench_poll(args):
+    results = []
+    original = main.ALERTS, main.TILES
+    with LoopbackServer(main.app) as srv, httpx.Client(base_url=srv.url, timeout=300) as client:
+        for size in args.sizes:
+            gen = _generator(args, duplicate_ratio=0.0)
+            store = fill_store(gen, size)
+            use_store(store)
+            place = gen.places[0][0]
+
+            def get(params, headers=None):
+                r = client.get("/api/poll_alerts", params=params, headers=headers)
+                if r.status_code not in (200, 304):
+                    raise RuntimeError(f"poll_alerts -> {r.status_code}")
+                return r
+
+            def get_tiles(params):
+                r = client.get("/api/alerts/tiles", params=params)
+                if r.status_code != 200:
+                    raise RuntimeError(f"alerts/tiles -> {r.status_code}")
+                return r
+
+            cases = [("snapshot", {})] if size <= args.snapshot_max else []
+            cases += [
+                ("limit_100", {"limit": 100}),
+                ("by_location", {"location": place}),
+                ("since_delta", {"since": max(0, store.last_seq - 50)}),
+            ]
+            for case, params in cases:
+                lat, wall = measure(lambda: get(params), seconds=args.seconds, min_iterations=3)
+                items = len(get(params).json())
+                _add(results, summarize("poll", case, lat, wall, params={"size": size}, items=items))
+            # map clusters: whole world at country zoom, one region at city zoom
+            _, lat0, lon0 = next((p for p in gen.places if p[1] is not None), ("", 20.0, 78.0))
+            for case, params in (
+                ("tiles_world", {"zoom": 3}),
+                ("tiles_region", {"zoom": 7, "bbox": f"{lon0 - 3},{lat0 - 2},{lon0 + 3},{lat0 + 2}"}),
+            ):
+                lat, wall = measure(lambda: get_tiles(params), seconds=args.seconds, min_iterations=3)
+                body = get_tiles(params).json()
+                _add(results, summarize("poll", case, lat, wall, params={"size": size},
+                                        items=len(body["cells"]) + len(body["points"]),
+                                        bytes=len(get_tiles(params).content)))
+            etag = get({"limit": 100}).headers.get("ETag")
+            lat, wall = measure(lambda: get({"limit": 100}, {"If-None-Match": etag}), seconds=args.seconds)
+            _add(results, summarize("poll", "etag_304", lat, wall, params={"size": size}))
+
+            use_store(*original)
+            del store, gen
+            gc.collect()
+    return results
+
+
+def bench_plan(args):
+    results = []
+    original = main.ALERTS, main.TILES
+    gen = _generator(args, duplicate_ratio=0.0)
+    store = AlertStore(max_alerts=args.plan_alerts)
+    store.add_many(gen.batch(args.plan_alerts))
+    use_store(store)
+    ids = [a["id"] for a in store.all()]
+    degraded = [0]
+
+    with LoopbackServer(main.app) as srv, httpx.Client(
+        base_url=srv.url, timeout=60, limits=httpx.Limits(max_connections=max(args.clients))
+    ) as client:
+        def plan(refresh):
+            r = client.post(f"/api/plan/{random.choice(ids)}", params={"refresh": "true"} if refresh else None)
+            r.raise_for_status()
+            stages = (r.json().get("meta") or {}).get("stages") or {}
+            if any(s.get("status") != "ok" for s in stages.values()):
+                degraded[0] += 1
+
+        for mode in ("cached", "refresh"):
+            refresh = mode == "refresh"
+            if not refresh:
+                for alert_id in ids:    # warm the plan store (and the LLM response cache)
+                    client.post(f"/api/plan/{alert_id}").raise_for_status()
+            for clients in args.clients:
+                degraded[0] = 0
+                lat, wall, errors = measure_concurrent(lambda i: plan(refresh), clients, seconds=args.seconds)
+                _add(results, summarize("plan", mode, lat, wall, params={"clients": clients},
+                                         errors=errors, degraded=degraded[0], llm_latency_ms=args.llm_latency_ms))
+
+        # one call plans a whole batch; throughput is per alert
+        batch = random.sample(ids, min(args.plan_batch, len(ids)))
+        body = {"alert_ids": batch, "refresh": True}
+        lat, wall = measure(lambda: client.post("/api/plan/batch", json=body).raise_for_status(),
+                            seconds=args.seconds, min_iterations=3)
+        _add(results, summarize("plan", "batch-refresh", lat, wall, ops_per_call=len(batch),
+                                 params={"batch": len(batch)}, llm_latency_ms=args.llm_latency_ms))
+    use_store(*original)
+    return results
+
+
+def bench_producer(args):
+    results = []
+    original, original_dedup, original_llm = (main.ALERTS, main.TILES), main.DEDUP, main.RISK_BATCH_LLM
+    # LLM rescoring runs on its own thread after commit; leave it out so the ingest path is measured alone
+    main.RISK_BATCH_LLM = False
+    try:
+        for batch_size in args.batch_sizes:
+            gen = _generator(args)
+            cycles = max(5, args.producer_alerts // batch_size)
+            batches = [gen.batch(batch_size) for _ in range(cycles)]
+            use_store(AlertStore(max_alerts=max(args.producer_alerts * 2, 1000)))
+            main.DEDUP = AlertDeduplicator()
+            main.run_producer_cycle(fetched=_generator(args, seed=args.seed + 1).batch(batch_size))  # warm-up
+            latencies = []
+            start = time.perf_counter()
+            for batch in batches:
+                t0 = time.perf_counter()
+                main.run_producer_cycle(fetched=batch)
+                latencies.append(time.perf_counter() - t0)
+            wall = time.perf_counter() - start
+            _add(results, summarize("producer", "ingest", latencies, wall, ops_per_call=batch_size,
+                                     params={"batch": batch_size}, incidents=len(main.ALERTS),
+                                     duplicate_ratio=args.duplicate_ratio))
+    finally:
+        use_store(*original)
+        main.DEDUP = original_dedup
+        main.RISK_BATCH_LLM = original_llm
+    return results
+
+
+def bench_memory(args):
+    results = []
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in ("memory", "sqlite"):
+            storage = SQLiteStorage(os.path.join(tmp, "memory.sqlite")) if backend == "sqlite" else None
+            bank = MemoryBank(storage=storage)
+            gen = _generator(args, duplicate_ratio=0.0)
+            records = gen.batch(args.memory_records)
+            params = {"backend": backend, "records": args.memory_records}
+
+            latencies = []
+            start = time.perf_counter()
+            for a in records:
+                t0 = time.perf_counter()
+                bank.write_incident(a)
+                latencies.append(time.perf_counter() - t0)
+            _add(results, summarize("memory", "write_incident", latencies, time.perf_counter() - start, params=params))
+            if storage is not None:
+                t0 = time.perf_counter()
+                bank.flush(timeout=300)
+                wall = time.perf_counter() - t0
+                _add(results, summarize("memory", "flush", [wall], wall, ops_per_call=len(records) * 2, params=params))
+
+            ids = [a["id"] for a in records]
+            places = [p[0] for p in gen.places]
+            cursor = max(0, bank.last_seq - 100)
+            queries = [
+                ("get_incident", lambda: bank.get_incident(rng.choice(ids))),
+                ("by_location", lambda: bank.query_by_location(rng.choice(places), limit=50)),
+                ("since_100", lambda: bank.since("incident", cursor, limit=100)),
+                ("time_range_5m", lambda: bank.query_time_range("incident", time.time() - 300)),
+                ("recent_logs_100", lambda: bank.recent("log", 100)),
+            ]
+            if storage is not None:
+                queries += [
+                    ("by_location_durable", lambda: bank.query_by_location(rng.choice(places), limit=50, durable=True)),
+                    ("time_range_5m_durable", lambda: bank.query_time_range("incident", time.time() - 300, durable=True)),
+                ]
+            for case, fn in queries:
+                lat, wall = measure(fn, seconds=args.seconds, min_iterations=10)
+                _add(results, summarize("memory", case, lat, wall, params=params))
+            bank.close()
+    return results
+
+
+def bench_spatial(args):
+    results = []
+    rng = random.Random(args.seed)
+    lat0, lon0, lat1, lon1 = 8.0, 68.0, 30.0, 90.0
+    for n in args.shelter_sizes:
+        reg = ShelterRegistry()
+        for i in range(n):
+            reg.add({"id": f"s{i}", "lat": rng.uniform(lat0, lat1), "lon": rng.uniform(lon0, lon1),
+                     "capacity": rng.randint(50, 500), "occupancy": rng.randint(0, 400)})
+        points = [(rng.uniform(lat0, lat1), rng.uniform(lon0, lon1)) for _ in range(1000)]
+        for case, fn in (
+            ("shelter_nearest_5", lambda p: reg.nearest(p[0], p[1], k=5, min_available=1)),
+            ("shelter_within_15km", lambda p: reg.within_radius(p[0], p[1], 15000, min_available=1)),
+        ):
+            lat, wall = measure(lambda: fn(rng.choice(points)), seconds=args.seconds, min_iterations=10)
+            _add(results, summarize("spatial", case, lat, wall, params={"shelters": n}))
+
+    names = list(LOCATIONS)
+    for name in names:
+        geocode_tool.geocode_location(name)     # warm the LRU tier
+    for case, fn in (
+        ("geocode_lru_hit", lambda: geocode_tool.geocode_location(rng.choice(names))),
+        ("geocode_gazetteer", lambda: geocode_tool.gazetteer_lookup(rng.choice(names))),
+    ):
+        lat, wall = measure(fn, seconds=args.seconds, min_iterations=10)
+        _add(results, summarize("spatial", case, lat, wall))
+
+    batch = 1000
+    gen = _generator(args, places="grid")
+    dedup = AlertDeduplicator()
+    batches = [gen.batch(batch) for _ in range(max(5, args.producer_alerts // batch))]
+    latencies = []
+    start = time.perf_counter()
+    for b in batches:
+        t0 = time.perf_counter()
+        dedup.merge(b)
+        latencies.append(time.perf_counter() - t0)
+    _add(results, summarize("spatial", "dedup_merge", latencies, time.perf_counter() - start, ops_per_call=batch,
+                             params={"batch": batch}, incidents=dedup.stats()["incidents"]))
+    return results
+
+
+# --------------------------
+# CLI
+# --------------------------
+def _add(results, r):
+    results.append(r)
+    params = " ".join(f"{k}={v}" for k, v in r["params"].items())
+    print(f"  {r['suite']:<9} {r['case']:<22} {params:<28} {r['throughput_per_s']:>12.1f}/s "
+          f"p50 {r['p50_ms']:>9.3f} ms  p99 {r['p99_ms']:>9.3f} ms", file=sys.stderr, flush=True)
+
+
+def _ints(spec):
+    return [int(float(x)) for x in spec.split(",") if x.strip()]
+
+
+def _meta(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=5,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "time": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+    }
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Offline benchmarks for the disaster coordinator backend.")
+    p.add_argument("--suite", default=",".join(SUITES), help=f"comma-separated subset of {', '.join(SUITES)}")
+    p.add_argument("--quick", action="store_true", help="small sizes and short runs (smoke / CI)")
+    p.add_argument("--sizes", default=None, help="alert store sizes for the poll suite (default 100..1000000)")
+    p.add_argument("--snapshot-max", type=int, default=100000, help="largest store size for the full-snapshot case")
+    p.add_argument("--clients", default=None, help="concurrent clients for the plan suite (default 1,4,16)")
+    p.add_argument("--plan-alerts", type=int, default=200, help="distinct alerts the plan suite draws from")
+    p.add_argument("--plan-batch", type=int, default=50, help="alerts per POST /api/plan/batch call")
+    p.add_argument("--batch-sizes", default=None, help="producer batch sizes (default 10,100,1000)")
+    p.add_argument("--producer-alerts", type=int, default=None, help="alerts ingested per producer case")
+    p.add_argument("--memory-records", type=int, default=None, help="records written per MemoryBank backend")
+    p.add_argument("--shelter-sizes", default=None, help="shelter registry sizes (default 1000,10000,100000)")
+    p.add_argument("--seconds", type=float, default=None, help="time budget per measured case")
+    p.add_argument("--llm-latency-ms", type=float, default=50.0, help="latency of the stub agents")
+    p.add_argument("--hazards", default="", help='hazard mix, e.g. "flood=3,cyclone=1" (default: feed mix)')
+    p.add_argument("--places", choices=("grid", "feed"), default="grid", help="synthetic place layout")
+    p.add_argument("--n-places", type=int, default=1000)
+    p.add_argument("--duplicate-ratio", type=float, default=0.2, help="share of alerts that re-report an earlier one")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--output", default=None, help="write results JSON here ('-' for stdout)")
+    p.add_argument("--compare", default=None, help="baseline results JSON to check for regressions")
+    p.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression for --compare")
+    args = p.parse_args(argv)
+
+    quick = args.quick
+    args.suites = [s.strip() for s in args.suite.split(",") if s.strip()]
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        p.error(f"unknown suite(s): {', '.join(sorted(unknown))}")
+    args.sizes = _ints(args.sizes or ("100,1000,10000" if quick else "100,1000,10000,100000,1000000"))
+    args.clients = _ints(args.clients or ("1,4" if quick else "1,4,16"))
+    args.batch_sizes = _ints(args.batch_sizes or ("10,100" if quick else "10,100,1000"))
+    args.shelter_sizes = _ints(args.shelter_sizes or ("1000,10000" if quick else "1000,10000,100000"))
+    args.producer_alerts = args.producer_alerts or (2000 if quick else 20000)
+    args.memory_records = args.memory_records or (2000 if quick else 20000)
+    args.seconds = args.seconds or (0.3 if quick else 2.0)
+    return args
+
+
+def main_cli(argv=None) -> int:
+    args = parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+    install_stub_agents(args.llm_latency_ms)
+    random.seed(args.seed)
+
+    runners = {"poll": bench_poll, "plan": bench_plan, "producer": bench_producer,
+               "memory": bench_memory, "spatial": bench_spatial}
+    results = []
+    for suite in args.suites:
+        print(f"[{suite}]", file=sys.stderr, flush=True)
+        results += runners[suite](args)
+
+    doc = {"meta": _meta(args), "results": results}
+    if args.output == "-":
+        json.dump(doc, sys.stdout, indent=2)
+        print()
+    elif args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['case']}: {'; '.join(r['reasons'])}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.tolerance:.0%} against {args.compare}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,137 @@
+# backend/benchmarks/synthetic.py
+"""
+Synthetic alert generator for the benchmarks, built on weather_api_tool.poll_alerts_tool_func.
+
+The mock feed supplies the base records (type, location, severity, population, confidence);
+AlertGenerator reshapes them to the requested volume and distribution:
+
+- hazard_weights / severity_weights: relative frequencies, e.g. {"flood": 3, "cyclone": 1}
+- places: "feed" (the mock feed's cities, coordinates from the gazetteer) or "grid"
+  (`n_places` synthetic places scattered uniformly over `bbox`)
+- spread_km: coordinate jitter around the chosen place
+- time_window_s: alert times spread uniformly over the last window
+- duplicate_ratio: fraction of alerts that re-report a recent alert (another source, a few km
+  away, minutes apart), which is what the producer's dedup stage merges
+- sources: source names, cycled
+
+Ids are unique (the feed's 3-digit ids collide at volume). Output is deterministic per seed.
+"""
+import itertools
+import math
+import random
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from tools.geocode_tool import gazetteer_lookup
+from tools.weather_api_tool import LOCATIONS, poll_alerts_tool_func
+
+# India-ish bounding box (min_lat, min_lon, max_lat, max_lon), like the mock feed's cities
+DEFAULT_BBOX = (8.0, 68.0, 30.0, 90.0)
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """"flood=3,cyclone=1" -> {"flood": 3.0, "cyclone": 1.0}"""
+    out = {}
+    for item in (spec or "").split(","):
+        key, _, weight = item.partition("=")
+        if key.strip():
+            out[key.strip().lower()] = float(weight or 1)
+    return out
+
+
+class AlertGenerator:
+    def __init__(self, seed: int = 0, hazard_weights: Optional[Dict[str, float]] = None,
+                 severity_weights: Optional[Dict[str, float]] = None, places: str = "feed",
+                 n_places: int = 1000, bbox: Tuple[float, float, float, float] = DEFAULT_BBOX,
+                 spread_km: float = 5.0, time_window_s: float = 3600.0, duplicate_ratio: float = 0.0,
+                 sources: Sequence[str] = ("mock-weather-engine",), with_coords: bool = True):
+        self.rng = random.Random(seed)
+        self.hazard_weights = hazard_weights or {}
+        self.severity_weights = severity_weights or {}
+        self.spread_km = spread_km
+        self.time_window_s = time_window_s
+        self.duplicate_ratio = duplicate_ratio
+        self.sources = list(sources) or ["mock-weather-engine"]
+        self.with_coords = with_coords
+        self.places = self._places(places, n_places, bbox)
+        self._ids = itertools.count(1)
+        self._pool: List[Dict] = []
+        self._recent: deque = deque(maxlen=1000)
+        self._now = datetime.now(timezone.utc)
+
+    def _places(self, mode, n, bbox):
+        if mode == "grid":
+            lat0, lon0, lat1, lon1 = bbox
+            return [(f"Place-{i:05d}", self.rng.uniform(lat0, lat1), self.rng.uniform(lon0, lon1)) for i in range(n)]
+        out = []
+        for name in LOCATIONS:
+            coords = gazetteer_lookup(name)
+            out.append((name, coords[0], coords[1]) if coords else (name, None, None))
+        return out
+
+    # --------------------------
+    # Generation
+    # --------------------------
+    def _base(self) -> Dict:
+        if not self._pool:
+            # the feed draws from the global RNG: seed it from ours so runs are reproducible
+            state = random.getstate()
+            random.seed(self.rng.getrandbits(64))
+            try:
+                self._pool = poll_alerts_tool_func()
+            finally:
+                random.setstate(state)
+        return self._pool.pop()
+
+    def _pick(self, weights: Dict[str, float], default):
+        if not weights:
+            return default
+        return self.rng.choices(list(weights), weights=list(weights.values()))[0]
+
+    def _jitter(self, lat, lon, km):
+        if lat is None or km <= 0:
+            return lat, lon
+        dlat = self.rng.uniform(-km, km) / 111.0
+        dlon = self.rng.uniform(-km, km) / (111.0 * max(0.1, math.cos(math.radians(lat))))
+        return round(lat + dlat, 5), round(lon + dlon, 5)
+
+    def alert(self) -> Dict:
+        n = next(self._ids)
+        if self._recent and self.duplicate_ratio and self.rng.random() < self.duplicate_ratio:
+            return self._duplicate(self.rng.choice(self._recent), n)
+
+        a = self._base()
+        a["type"] = self._pick(self.hazard_weights, a["type"])
+        payload = a["payload"]
+        payload["severity"] = self._pick(self.severity_weights, payload["severity"])
+        if a["type"] in ("rainfall", "flood"):
+            payload["rain_mm"] = round(self.rng.uniform(0, 250), 1)
+        name, lat, lon = self.rng.choice(self.places)
+        a["location"] = name
+        if self.with_coords and lat is not None:
+            payload["lat"], payload["lon"] = self._jitter(lat, lon, self.spread_km)
+        a["id"] = f"{a['type']}-bench-{n}"
+        a["time"] = (self._now - timedelta(seconds=self.rng.uniform(0, self.time_window_s))).isoformat()
+        a["source"] = self.sources[n % len(self.sources)]
+        self._recent.append(a)
+        return a
+
+    def _duplicate(self, original: Dict, n: int) -> Dict:
+        a = dict(original, payload=dict(original["payload"]))
+        a["id"] = f"{a['type']}-bench-{n}"
+        a["source"] = self.sources[(self.sources.index(original["source"]) + 1) % len(self.sources)] \
+            if original["source"] in self.sources else self.sources[0]
+        a["confidence"] = round(min(0.99, max(0.3, a["confidence"] + self.rng.uniform(-0.2, 0.1))), 2)
+        if "lat" in a["payload"]:
+            a["payload"]["lat"], a["payload"]["lon"] = self._jitter(a["payload"]["lat"], a["payload"]["lon"], 2.0)
+        t = datetime.fromisoformat(original["time"]) + timedelta(seconds=self.rng.uniform(-600, 600))
+        a["time"] = t.isoformat()
+        return a
+
+    def batch(self, n: int) -> List[Dict]:
+        return [self.alert() for _ in range(n)]
+
+    def __iter__(self) -> Iterator[Dict]:
+        while True:
+            yield self.alert()
@@ -1,14 +1,33 @@
 # backend/main.py
 """
-Full corrected backend (Option B1 — thread-based alert producer + ADK agents + external tools).
-Replace your existing main.py with this file.
+FastAPI backend for the disaster coordinator: alert ingest, risk scoring, plans and the read APIs.
+
+- ingest: an asyncio scheduler (tools/ingest.py) polls every configured feed; each batch goes
+  through normalize / validate / enrich -> dedup into incidents -> heuristic risk -> one short
+  commit into the indexed AlertStore, with LLM rescoring of committed batches in the background
+- plans: POST /api/plan/{id} runs a stage graph (risk -> planner -> volunteers, locate -> shelters
+  -> routes) under PLAN_SLA_SECONDS; plans are coalesced and stored per alert (agents/plan_manager.py),
+  /api/plan/batch and the AUTOPLAN scheduler plan many alerts with one joint volunteer allocation
+- reads: /api/poll_alerts, /api/incidents, /api/logs and /api/alerts/tiles serve pre-encoded JSON
+  with since/limit cursors and ETags; /api/stream pushes the same deltas over Server-Sent Events
+- memory: incidents, plans and logs go to the MemoryBank (optional write-behind to SQLite)
+- several workers: with SHARED_STATE=sqlite one worker holds the producer lease and the others
+  replicate its alerts; plans, volunteer reservations, MemoryBank records and stream events are
+  shared through the same backend (memory/shared_state.py)
+- observability: /api/health, /api/cluster, /api/traces, /metrics
 """
 
 import os
+import sys
 import time
+_IMPORT_STARTED = time.perf_counter()
 import threading
 import traceback
 import logging
+import json
+import heapq
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import List, Optional
 
@@ -16,48 +35,51 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # FastAPI
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 
 # Local tool imports (ensure these modules exist: tools/*.py)
-from tools.weather_api_tool import poll_alerts_tool_func
-from tools.geocode_tool import geocode_location
+from tools.weather_api_tool import poll_alerts_tool_func, epoch_to_iso
+from tools.geocode_tool import geocode_location, geocode_stats
 from tools.shelter_tool import find_nearby_shelters
-from tools.directions_tool import estimate_route
-from tools.volunteer_api_tool import assign_volunteers_tool_func
+from tools.directions_tool import estimate_route, estimate_routes, route_cache_stats
+from tools.volunteer_api_tool import assign_volunteers_tool_func, allocate_volunteers_batch, release_volunteers_tool_func, VOLUNTEER_POOL
+from tools.feed_sources import sources_from_env
+from tools.ingest import IngestScheduler
+from tools.http_client import http_stats
+from tools.cache import TTLCache
+from tools.fast_json import RecordEncoder, dumps as json_bytes
+from tools.tracing import (TRACER, TraceLogFilter, current_span, current_trace_id, recent_traces,
+                           run_in_context, span, start_trace, waterfall)
+from tools.metrics import (REGISTRY, CONTENT_TYPE, COUNT_BUCKETS, LOCK_BUCKETS, MetricFamily,
+                           cache_families, millisecond_histogram_family)
 
 # Agent helpers (these should be implemented in agents/*.py and return JSON-friendly objects)
-# e.g. evaluate_risk_via_adk(alert) -> float, plan_via_adk({"alert":..., "risk":...}) -> dict
-from agents.risk_agent import evaluate_risk_via_adk
-from agents.planner_agent import plan_via_adk
+# e.g. evaluate_risk_via_adk(alert) -> {"risk": float, ...}, plan_via_adk(alert, risk) -> dict
+from agents.risk_agent import evaluate_risk_via_adk, RISK_CACHE
+from agents.planner_agent import plan_via_adk, PLAN_CACHE
+from agents.plan_pipeline import Stage, run_stages
+from agents.plan_manager import PLAN_TTL_SECONDS, PlanManager
+from agents.batch_planner import AUTOPLAN_ENABLED, AutoPlanner, SharedToolCalls
+from agents.risk_scoring import RISK_BATCH_LLM, heuristic_risk, score_alerts, score_batch_via_adk
+from agents.risk_model import llm_candidates
+from agents.registry import AGENTS, AGENT_PREWARM
+import agents.coordinator_agent  # registers coordinator_agent (built lazily, see agents/registry.py)
 
 # Memory
-from memory.memory_bank import MemoryBank
-
-# simple lookup for demo: map location names to lat/lon
-COORD_MAP = {
-    "Springfield": (39.7990, -89.6436),
-    "Hyderabad": (17.3850, 78.4867),
-    "Mumbai": (19.0760, 72.8777),
-    "Chennai": (13.0827, 80.2707),
-    "Delhi": (28.7041, 77.1025),
-    "Bengaluru": (12.9716, 77.5946),
-    "Visakhapatnam": (17.6868, 83.2185),
-    "Bengaluru Urban": (12.9716, 77.5946)
-}
-
-
-# ADK pieces (we create tool wrappers for visibility but won't rely on any unexpected methods)
-try:
-    from google.adk.agents import Agent
-    from google.adk.tools import FunctionTool
-except Exception:
-    Agent = None
-    FunctionTool = None
+from memory.memory_bank import memory_bank_from_env
+from memory.alert_store import AlertStore
+from memory.alert_tiles import TileIndex
+from memory.event_hub import EventHub
+from memory.alert_dedup import AlertDeduplicator, content_id
+from memory.shared_state import PRODUCER_LEASE, SHARED_STATE, WORKER_ID, SharedJournal, StateSync, shared_state_from_env
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:[trace=%(trace_id)s] %(message)s")
+for _handler in logging.getLogger().handlers:
+    _handler.addFilter(TraceLogFilter())
 logger = logging.getLogger("disaster-backend")
 
 # App
@@ -70,8 +92,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Stream-Cursor", "X-Next-Cursor", "X-Cursor-Expired", "ETag"],
 )
 
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "API request latency by route", ("method", "route", "status"))
+
+@app.middleware("http")
+async def observe_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # label by route template (/api/plan/{alert_id}), not the raw path, to bound cardinality
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                     method=request.method, route=route, status=status)
+
 # Simple data models
 class PollResult(BaseModel):
     id: str
@@ -81,53 +121,66 @@ class PollResult(BaseModel):
     source: str
     confidence: float
     payload: dict
+    seq: Optional[int] = None
+    risk: Optional[float] = None
+    risk_source: Optional[str] = None
+    report_count: Optional[int] = None
+    sources: Optional[List[str]] = None
+    reports: Optional[List[dict]] = None
+
+# response fields, in model order: pre-encoded alerts carry exactly these (missing ones as null)
+POLL_FIELDS = tuple(getattr(PollResult, "model_fields", None) or PollResult.__fields__)
 
 class PlanResponse(BaseModel):
     event_id: str
     risk: float
     tasks: List[dict]
     assignment: Optional[dict] = None
+    meta: Optional[dict] = None
+
+class PlanBatchRequest(BaseModel):
+    alert_ids: List[str]
+    refresh: bool = False
 
 # Global state
-MEMORY = MemoryBank()
-alerts_cache = []        # authoritative cache produced by background producer
-alerts_lock = threading.Lock()
+MEMORY = memory_bank_from_env()
+# authoritative alert cache produced by background producer (bounded + indexed)
+ALERTS = AlertStore(
+    max_alerts=int(os.getenv("ALERT_STORE_MAX", "5000")),
+    ttl_seconds=float(os.getenv("ALERT_STORE_TTL_SECONDS", "0")) or None,
+)
+alerts_lock = ALERTS.lock   # writer lock; readers use lock-free snapshots
+# map clusters per tile, maintained incrementally from ALERTS (see memory/alert_tiles.py)
+TILES = TileIndex()
+ALERTS.add_observer(TILES)
+# JSON bytes per alert / incident record, and per-endpoint encoded responses (see tools/fast_json.py)
+ALERT_JSON = RecordEncoder(POLL_FIELDS)     # bounded by the store it observes
+ALERTS.add_observer(ALERT_JSON)
+INCIDENT_JSON = RecordEncoder(POLL_FIELDS, maxsize=int(os.getenv("INCIDENT_JSON_CACHE_MAX", "10000")))
+# (endpoint, params) -> (etag, body, headers); one entry per query shape, replaced when its data changes
+RESPONSES = TTLCache(maxsize=int(os.getenv("RESPONSE_CACHE_MAX", "256")))
+# push stream of alert / log deltas for /api/stream
+HUB = EventHub(
+    buffer_size=int(os.getenv("STREAM_BUFFER_SIZE", "5000")),
+    client_queue_size=int(os.getenv("STREAM_CLIENT_QUEUE_SIZE", "1000")),
+)
+STREAM_KEEPALIVE_SECONDS = float(os.getenv("STREAM_KEEPALIVE_SECONDS", "15"))
 LOGS_MAX = 1000
-
-# ADK configuration (used only if you want to construct Agents locally)
-ADK_MODEL = os.getenv("ADK_MODEL", "gemini-2.0-flash")
-if Agent is not None and FunctionTool is not None:
-    try:
-        # wrap local tool functions as FunctionTool if available (some ADK versions accept single positional arg)
-        try:
-            weather_tool = FunctionTool(poll_alerts_tool_func)
-        except TypeError:
-            # fallback: if FunctionTool expects call signature, wrap in a thin adapter object
-            class _FT:
-                def __init__(self, func): self._f = func
-                def call(self, *a, **k): return self._f()
-            weather_tool = _FT(poll_alerts_tool_func)
-
-        try:
-            volunteer_tool = FunctionTool(assign_volunteers_tool_func)
-        except TypeError:
-            class _FT2:
-                def __init__(self, func): self._f = func
-                def call(self, *a, **k): return self._f(*a, **k)
-            volunteer_tool = _FT2(assign_volunteers_tool_func)
-
-        # create a coordinator agent object for observability (we won't rely on specific runtime methods)
-        coordinator_agent = Agent(
-            name="coordinator_agent",
-            model=ADK_MODEL,
-            instruction="Coordinator agent for disaster relief. Use tools to poll alerts and assign volunteers.",
-            tools=[weather_tool, volunteer_tool],
-        )
-    except Exception:
-        # graceful degradation if ADK is not available at runtime
-        coordinator_agent = None
-else:
-    coordinator_agent = None
+# state shared between uvicorn workers (SHARED_STATE=sqlite; see memory/shared_state.py)
+SHARED = shared_state_from_env()
+# several workers: MemoryBank records and stream events are numbered by one shared journal and
+# applied in its order on every worker (same seqs and stream cursors everywhere), and volunteer
+# reservations live in the shared backend
+JOURNAL = SharedJournal(SHARED, worker_id=WORKER_ID) if SHARED_STATE != "local" else None
+if JOURNAL is not None:
+    MEMORY.attach_journal(JOURNAL)
+    JOURNAL.subscribe(("alert",), lambda kind, seq, recorded_at, data, own: HUB.publish_encoded(kind, data, seq))
+    VOLUNTEER_POOL.attach_shared(SHARED)
+# log entries go to the stream under their MemoryBank seq when that seq is the journal's
+MEMORY.add_listener(lambda kind, record: HUB.publish("log", record, seq=record["seq"] if JOURNAL is not None else None)
+                    if kind == "log" else None)
+# main.py import / startup hook durations, reported by /api/agents
+STARTUP_TIMINGS = {}
 
 # --------------------------
 # Helpers
@@ -135,6 +188,30 @@ else:
 def now_iso():
     return datetime.now(timezone.utc).isoformat()
 
+def stream_alerts(alerts):
+    """Push new / changed alerts to /api/stream clients (through the journal with several workers)."""
+    if not alerts:
+        return
+    if JOURNAL is not None:
+        JOURNAL.append_many("alert", alerts)
+        return
+    for a in alerts:
+        HUB.publish("alert", a)
+
+def is_producer():
+    """True when this worker writes the alert store: a single worker, or the shared-state leader."""
+    return SYNC is None or SYNC.leader
+
+def lookup_alert(alert_id):
+    """Alert by id; a follower falls back to the shared log for alerts it has not replicated yet."""
+    alert = ALERTS.get(alert_id)
+    if alert is None and not is_producer():
+        try:
+            alert = SHARED.get_alert(alert_id)
+        except Exception:
+            logger.exception("shared alert lookup failed for %s", alert_id)
+    return alert
+
 def extract_alerts(tool_res):
     """
     Normalize a tool response into a list of alert dicts.
@@ -156,6 +233,11 @@ def extract_alerts(tool_res):
             return [tool_res]
     return []
 
+def required_volunteers(risk):
+    """Volunteers to request for an alert at the given risk score."""
+    risk = float(risk)
+    return 40 if risk > 0.8 else 12 if risk > 0.5 else 0
+
 def safe_assign_volunteers(params):
     """
     Call volunteer assignment tool safely and return a dict.
@@ -170,7 +252,26 @@ def safe_assign_volunteers(params):
         logger.exception("assign_volunteers_tool_func failed")
         return {"assigned": 0, "error": str(e)}
 
+def make_etag(name, version, *params):
+    """Weak ETag from a data version plus the query parameters that shape the response."""
+    digest = zlib.crc32(repr(params).encode("utf-8"))
+    return f'W/"{name}-{version}-{digest:08x}"'
+
+def not_modified(request, etag):
+    """True if the client's If-None-Match already names `etag`."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [t.strip() for t in header.split(",")]
+
+def _eta_sort_key(route):
+    duration = route.get("duration_s") if isinstance(route, dict) else None
+    return duration if duration is not None else float("inf")
+
 def log_event(evt):
+    trace_id = current_trace_id()
+    if trace_id:
+        evt = dict(evt, trace_id=trace_id)
     try:
         MEMORY.log(evt)
     except Exception:
@@ -178,236 +279,655 @@ def log_event(evt):
         logger.info("log_event fallback: %s", evt)
 
 # --------------------------
-# Background alert producer (thread-based)
+# Background alert producer (thread-based, staged pipeline)
 # --------------------------
-def alert_producer(poll_interval=10):
+# Stages: fetch -> normalize/enrich (concurrent, no lock held) -> dedup/merge into incidents ->
+# score (vectorized) -> commit (one short locked section). Committed batches are then rescored by the RiskAgent off the producer thread.
+ENRICH_WORKERS = int(os.getenv("ALERT_ENRICH_WORKERS", "8"))
+_enrich_pool = ThreadPoolExecutor(max_workers=ENRICH_WORKERS, thread_name_prefix="alert-enrich")
+# LLM rescoring of committed batches; one worker keeps model calls sequential
+_risk_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alert-risk")
+
+PRODUCER_STAGES = ("fetch", "enrich", "dedup", "score", "lock_wait", "lock_hold", "total")
+
+# reports of the same event (type + proximity + time window) merge into one incident with a stable id
+DEDUP = AlertDeduplicator(
+    cell_deg=float(os.getenv("DEDUP_CELL_DEG", "0.15")),
+    radius_m=float(os.getenv("DEDUP_RADIUS_M", "15000")),
+    window_seconds=float(os.getenv("DEDUP_WINDOW_SECONDS", str(3 * 3600))),
+    retention_seconds=float(os.getenv("DEDUP_RETENTION_SECONDS", str(24 * 3600))),
+)
+producer_stats = {
+    "polls": 0,
+    "alerts_fetched": 0,
+    "alerts_added": 0,
+    "last_poll": None,
+    "last_ms": {s: 0.0 for s in PRODUCER_STAGES},
+    "max_ms": {s: 0.0 for s in PRODUCER_STAGES},
+    "sum_ms": {s: 0.0 for s in PRODUCER_STAGES},
+}
+_producer_stats_lock = threading.Lock()
+
+PRODUCER_STAGE_SECONDS = REGISTRY.histogram(
+    "producer_stage_duration_seconds", "Alert producer cycle time per stage (total = whole poll)", ("stage",))
+PRODUCER_ALERTS_PER_POLL = REGISTRY.histogram(
+    "producer_alerts_per_poll", "Alerts fetched per producer cycle", buckets=COUNT_BUCKETS)
+PRODUCER_ALERTS_ADDED = REGISTRY.counter("producer_alerts_added_total", "New incidents committed by the producer")
+INVALID_ALERTS = REGISTRY.counter("ingest_invalid_alerts_total", "Fetched alerts dropped by validate_alert")
+ALERTS_LOCK_WAIT_SECONDS = REGISTRY.histogram(
+    "alerts_lock_wait_seconds", "Time the producer waited for alerts_lock", buckets=LOCK_BUCKETS)
+ALERTS_LOCK_HOLD_SECONDS = REGISTRY.histogram(
+    "alerts_lock_hold_seconds", "Time the producer held alerts_lock", buckets=LOCK_BUCKETS)
+
+def _record_producer_poll(timings, fetched, added):
+    for stage in PRODUCER_STAGES:
+        if stage in timings:
+            PRODUCER_STAGE_SECONDS.observe(timings[stage] / 1000.0, stage=stage)
+    PRODUCER_ALERTS_PER_POLL.observe(fetched)
+    PRODUCER_ALERTS_ADDED.inc(added)
+    if "lock_hold" in timings:   # cycles with nothing to commit never take the lock
+        ALERTS_LOCK_WAIT_SECONDS.observe(timings["lock_wait"] / 1000.0)
+        ALERTS_LOCK_HOLD_SECONDS.observe(timings["lock_hold"] / 1000.0)
+    with _producer_stats_lock:
+        producer_stats["polls"] += 1
+        producer_stats["alerts_fetched"] += fetched
+        producer_stats["alerts_added"] += added
+        producer_stats["last_poll"] = now_iso()
+        for stage in PRODUCER_STAGES:
+            ms = timings.get(stage, 0.0)
+            producer_stats["last_ms"][stage] = ms
+            producer_stats["sum_ms"][stage] += ms
+            producer_stats["max_ms"][stage] = max(producer_stats["max_ms"][stage], ms)
+
+def get_producer_stats():
+    with _producer_stats_lock:
+        polls = producer_stats["polls"] or 1
+        out = {k: (dict(v) if isinstance(v, dict) else v) for k, v in producer_stats.items()}
+    out["avg_ms"] = {s: out["sum_ms"][s] / polls for s in PRODUCER_STAGES}
+    return out
+
+def _elapsed_ms(start):
+    return (time.perf_counter() - start) * 1000.0
+
+def fetch_alerts():
+    """Stage 1: poll the feed tool and return a list of raw alert dicts."""
+    res = poll_alerts_tool_func()
+    return [a for a in extract_alerts(res) if isinstance(a, dict)]
+
+def validate_alert(a):
+    """
+    Ingest boundary: check a normalized alert against PollResult once, so the read endpoints can
+    send stored alerts as they are. Repeated strings are interned. False drops the alert.
+    """
+    try:
+        PollResult(**a)
+    except (ValidationError, TypeError) as e:
+        INVALID_ALERTS.inc()
+        logger.warning("dropping invalid alert %s: %s", a.get("id"), str(e).replace("\n", " "))
+        return False
+    for key in ("type", "location", "source"):
+        a[key] = sys.intern(a[key])
+    return True
+
+def encoded_response(key, etag, build, **headers):
+    """
+    A JSON Response for `key` (endpoint + params), encoding the body with build() -> (body, headers)
+    only when `etag` changed since the last request of this shape.
+    """
+    cached = RESPONSES.get(key)
+    if cached is None or cached[0] != etag:
+        body, extra = build()
+        cached = (etag, body, extra)
+        RESPONSES.set(key, cached)
+    return Response(cached[1], media_type="application/json", headers=dict(cached[2], ETag=etag, **headers))
+
+def normalize_alert(a):
+    """Ensure required fields exist (id, time, confidence, payload). Mutates and returns `a`."""
+    if not a.get("id"):
+        # content-derived, so the same report gets the same id in every process
+        a["id"] = content_id("alert", json.dumps(a, sort_keys=True, default=str))
+
+    if not a.get("time"):
+        a["time"] = datetime.now(timezone.utc).isoformat()
+    elif not isinstance(a["time"], str):
+        # feeds that send unix seconds
+        a["time"] = epoch_to_iso(a["time"]) or datetime.now(timezone.utc).isoformat()
+
+    try:
+        a["confidence"] = float(a.get("confidence", 0.5))
+    except (TypeError, ValueError):
+        # feeds that send null or junk
+        a["confidence"] = 0.5
+
+    # ensure payload exists
+    if "payload" not in a or not isinstance(a["payload"], dict):
+        a["payload"] = {}
+    return a
+
+def enrich_alert(a):
     """
-    Background thread polling poll_alerts_tool_func() to generate alerts.
-    Normalizes alerts, assigns coordinates, dedupes, and stores into alerts_cache + MEMORY.
+    Stage 2 (runs on the enrich pool, never under alerts_lock):
+    assign coordinates (lat/lon) if missing via the tiered geocoder (cache -> gazetteer -> API).
     """
-    logger.info("alert_producer started (interval=%s sec)", poll_interval)
-    while True:
+    lat = a["payload"].get("lat")
+    lon = a["payload"].get("lon")
+
+    if (not lat or not lon) and callable(geocode_location):
         try:
-            # 1) Poll the weather tool for alerts
-            try:
-                res = poll_alerts_tool_func()
-            except TypeError:
-                # some versions require call()
-                res = poll_alerts_tool_func()
-            new_alerts = extract_alerts(res)
-
-            if not new_alerts:
-                time.sleep(poll_interval)
-                continue
-
-            added = []
-
-            with alerts_lock:
-                existing_ids = {a.get("id") for a in alerts_cache if isinstance(a, dict)}
-
-                for a in new_alerts:
-                    if not isinstance(a, dict):
-                        continue
-
-                    # ----------------------------
-                    # Ensure required fields exist
-                    # ----------------------------
-                    if not a.get("id"):
-                        a["id"] = f"alert-{abs(hash(str(a))) % 10**9}"
-
-                    if not a.get("time"):
-                        a["time"] = datetime.now(timezone.utc).isoformat()
-
-                    if not a.get("confidence"):
-                        a["confidence"] = float(a.get("confidence", 0.5))
-
-                    # ensure payload exists
-                    if "payload" not in a or not isinstance(a["payload"], dict):
-                        a["payload"] = {}
-
-                    # ---------------------------------------
-                    # Assign coordinates (lat/lon) if missing
-                    # ---------------------------------------
-                    lat = a["payload"].get("lat")
-                    lon = a["payload"].get("lon")
-
-                    # Try geocode first
-                    if (not lat or not lon) and callable(geocode_location):
-                        try:
-                            geo = geocode_location(a.get("location"))
-                            if geo:
-                                lat, lon = geo
-                        except Exception:
-                            pass
-
-                    # Fallback coordinate map
-                    if (not lat or not lon) and a.get("location"):
-                        locname = a["location"]
-                        if locname in COORD_MAP:
-                            lat, lon = COORD_MAP[locname]
-
-                    # Final assignment
-                    if lat and lon:
-                        a["payload"]["lat"] = float(lat)
-                        a["payload"]["lon"] = float(lon)
-
-                    # ----------------------------
-                    # Dedup and store
-                    # ----------------------------
-                    if a["id"] not in existing_ids:
-                        alerts_cache.append(a)
-                        existing_ids.add(a["id"])
-                        added.append(a)
-
-                        # memory logging
-                        try:
-                            MEMORY.write_incident(a)
-                        except Exception:
-                            logger.warning("MEMORY.write_incident failed for %s", a["id"])
-
-            # ----------------------------
-            # Logging to console & Memory
-            # ----------------------------
-            if added:
-                logger.info("[alert_producer] added %d alerts", len(added))
-                log_event({
-                    "type": "alerts_added",
-                    "count": len(added),
-                    "time": datetime.now(timezone.utc).isoformat()
-                })
+            geo = geocode_location(a.get("location"))
+            if geo:
+                lat, lon = geo
+        except Exception:
+            pass
 
-        except Exception as e:
-            logger.error("alert_producer error: %s", e)
-            traceback.print_exc()
+    # Final assignment
+    if lat and lon:
+        a["payload"]["lat"] = float(lat)
+        a["payload"]["lon"] = float(lon)
+    return a
+
+def commit_alerts(alerts, timings, merged=()):
+    """
+    Stage 5: one short atomic section: insert new incidents and apply the changes of incidents
+    that absorbed new reports (merged: [(incident, changes)] from DEDUP.merge). Returns (added, updated).
+    """
+    wait_start = time.perf_counter()
+    with alerts_lock:
+        hold_start = time.perf_counter()
+        timings["lock_wait"] = (hold_start - wait_start) * 1000.0
+        ALERTS.evict_expired()
+        updated, gone = [], []
+        for inc, changes in merged:
+            stored = ALERTS.update(inc["id"], changes)
+            if stored is not None:
+                updated.append(stored)
+            else:
+                gone.append(dict(inc, **changes))
+        # an incident evicted from the store but still known to DEDUP comes back as new
+        added = ALERTS.add_many(list(alerts) + gone)
+        timings["lock_hold"] = _elapsed_ms(hold_start)
+    return added, updated
+
+def run_producer_cycle(fetched=None):
+    """
+    Run one fetch -> enrich -> dedup -> score -> commit cycle. Returns the list of newly added incidents.
+    `fetched` is a batch already pulled by the ingest scheduler; if None the mock feed is polled here.
+    """
+    timings = {}
+    cycle_start = time.perf_counter()
+
+    # 1) Fetch
+    stage_start = time.perf_counter()
+    if fetched is None:
+        fetched = fetch_alerts()
+    else:
+        fetched = [a for a in extract_alerts(fetched) if isinstance(a, dict)]
+    timings["fetch"] = _elapsed_ms(stage_start)
+
+    # 2) Normalize + enrich (coordinates are needed for spatial dedup)
+    stage_start = time.perf_counter()
+    fresh, seen = [], set()
+    for a in fetched:
+        normalize_alert(a)
+        if a["id"] in seen or not validate_alert(a):
+            continue
+        seen.add(a["id"])
+        fresh.append(a)
+    if fresh:
+        fresh = list(_enrich_pool.map(enrich_alert, fresh))
+    timings["enrich"] = _elapsed_ms(stage_start)
+
+    # 3) Merge reports of the same event into incidents (new ones + known ones that gained reports)
+    stage_start = time.perf_counter()
+    new, merged = DEDUP.merge(fresh)
+    timings["dedup"] = _elapsed_ms(stage_start)
+
+    # 4) Score the whole batch in one vectorized pass so incidents are stored with a risk.
+    # Merged incidents with a heuristic score are rescored as copies (the new score goes in with
+    # their other changes); a RiskAgent score is kept
+    stage_start = time.perf_counter()
+    score_alerts(new)
+    heuristic = [(inc, changes) for inc, changes in merged if inc.get("risk_source") != "llm"]
+    rescored = score_alerts([dict(inc, **changes) for inc, changes in heuristic])
+    for (_, changes), a in zip(heuristic, rescored):
+        changes.update(risk=a["risk"], risk_source=a["risk_source"])
+    timings["score"] = _elapsed_ms(stage_start)
+
+    # 5) Commit
+    added, updated = commit_alerts(new, timings, merged) if (new or merged) else ([], [])
+    timings["total"] = _elapsed_ms(cycle_start)
+    _record_producer_poll(timings, len(fetched), len(added))
+
+    # memory logging + stream fan-out happen after the lock is released
+    stream_alerts(added + updated)
+    for a in added:
+        try:
+            MEMORY.write_incident(a)
+        except Exception:
+            logger.warning("MEMORY.write_incident failed for %s", a["id"])
+
+    if (added or updated) and RISK_BATCH_LLM:
+        _risk_pool.submit(refine_risk_scores, added + updated)
+    if (added or updated) and AUTO_PLANNER.is_running():
+        AUTO_PLANNER.offer(added + updated)
+
+    if added or updated:
+        logger.info("[alert_producer] added %d incidents, merged reports into %d (lock held %.2f ms)",
+                    len(added), len(updated), timings["lock_hold"])
+        log_event({
+            "type": "alerts_added",
+            "count": len(added),
+            "merged": len(updated),
+            "time": datetime.now(timezone.utc).isoformat()
+        })
+    return added
+
+def refine_risk_scores(alerts):
+    """
+    Replace heuristic scores with RiskAgent scores (one batched prompt per RISK_BATCH_SIZE alerts).
+    Under RISK_MODE=prefilter only alerts the risk model finds ambiguous are sent.
+    Runs off the producer thread; each rescored alert gets a new seq and is pushed to the stream.
+    Alerts that already carry a RiskAgent score are not sent again.
+    """
+    alerts = [a for a in alerts if a.get("risk_source") != "llm"]
+    alerts = [a for a, send in zip(alerts, llm_candidates([a["risk"] for a in alerts])) if send]
+    if not alerts:
+        return
+    try:
+        scored = score_batch_via_adk(alerts)
+    except Exception as e:
+        logger.warning("refine_risk_scores: RiskAgent unavailable, keeping heuristic scores: %s", e)
+        return
+    if not is_producer():
+        return   # demoted while the model was scoring
+    rescored = []
+    for a, result in zip(alerts, scored):
+        if result is None or a["id"] not in ALERTS:
+            continue
+        ALERTS.update(a["id"], {"risk": round(float(result["risk"]), 4), "risk_source": "llm"})
+        rescored.append(a)
+    stream_alerts(rescored)
+    if AUTO_PLANNER.is_running():
+        AUTO_PLANNER.offer(alerts)
+
+def alert_producer(source, alerts):
+    """
+    Ingest sink: every batch a feed source returns (see tools/feed_sources.py) runs through
+    run_producer_cycle(): enrich concurrently, score, then commit into ALERTS + MEMORY.
+    """
+    if not is_producer():
+        return   # a batch still in flight when this worker lost the producer lease
+    try:
+        run_producer_cycle(alerts)
+    except Exception as e:
+        logger.error("alert_producer error (%s): %s", source, e)
+        traceback.print_exc()
+
+
+
+# --------------------------
+# Plan pipeline stages
+# --------------------------
+PLAN_SLA_SECONDS = float(os.getenv("PLAN_SLA_SECONDS", "8"))
+PLAN_RISK_DEADLINE = float(os.getenv("PLAN_RISK_DEADLINE", "4"))
+PLAN_PLANNER_DEADLINE = float(os.getenv("PLAN_PLANNER_DEADLINE", "6"))
+PLAN_TOOL_DEADLINE = float(os.getenv("PLAN_TOOL_DEADLINE", "3"))
+_plan_pool = ThreadPoolExecutor(max_workers=int(os.getenv("PLAN_WORKERS", "16")), thread_name_prefix="plan-stage")
+PLAN_SECONDS = REGISTRY.histogram("plan_duration_seconds", "api_plan stage graph latency (all stages)")
+PLAN_STAGE_SECONDS = REGISTRY.histogram(
+    "plan_stage_duration_seconds", "api_plan latency per stage and outcome", ("stage", "status"))
+
+def _coerce_risk(value):
+    # RiskAgent returns {"risk": x, "explain": ...}; accept a bare number too
+    if isinstance(value, dict):
+        value = value.get("risk")
+    return None if value is None else max(0.0, min(1.0, float(value)))
+
+def _shared_call(shared, kind, key, fn):
+    return fn() if shared is None else shared.call(kind, key, fn)
+
+def build_plan_stages(alert_id, alert, use_cache=True, shared=None, defer_volunteers=False):
+    """
+    Stage graph for one plan:
+        risk -> planner -> volunteers
+        locate -> shelters -> routes
+    use_cache=False skips the LLM response cache (fresh model calls).
+    In a batch, `shared` (agents/batch_planner.SharedToolCalls) dedups geocode / shelter / route
+    calls across its alerts, and defer_volunteers=True makes the volunteers stage return the
+    request instead of reserving, so the batch allocates all of them jointly.
+    """
+    def risk_stage(_):
+        local = heuristic_risk(alert)
+        if not llm_candidates([local])[0]:
+            # RISK_MODE=local, or prefilter and the risk model is confident: no model call
+            return local
+        risk = _coerce_risk(evaluate_risk_via_adk(alert, use_cache=use_cache)) if callable(evaluate_risk_via_adk) else None
+        return local if risk is None else risk
+
+    def planner_stage(r):
+        plan_result = plan_via_adk(alert, r["risk"], use_cache=use_cache) if callable(plan_via_adk) else None
+        return plan_result if isinstance(plan_result, dict) else {"tasks": []}
+
+    def volunteers_stage(r):
+        # only when the planner didn't already assign volunteers
+        planned = (r.get("planner") or {}).get("assignment")
+        if isinstance(planned, dict) or float(r["risk"]) <= 0.5:
+            return None
+        required = required_volunteers(r["risk"])
+        if defer_volunteers:
+            return {"deferred": True, "alert_id": alert_id, "location": alert.get("location"),
+                    "required": required, "risk": float(r["risk"])}
+        return safe_assign_volunteers({"location": alert.get("location"), "required": required, "alert_id": alert_id})
+
+    def locate_stage(_):
+        payload = alert.get("payload") or {}
+        lat, lon = payload.get("lat"), payload.get("lon")
+        if (not lat or not lon) and callable(geocode_location):
+            geo = _shared_call(shared, "geocode", alert.get("location"), lambda: geocode_location(alert.get("location")))
+            if geo:
+                lat, lon = geo
+                # the stored payload is read concurrently (stream, JSON encoders, tracing): swap in a new
+                # dict under the store lock rather than editing it. Followers get the coordinates through
+                # replication once the leader geocodes them
+                if is_producer():
+                    stored = ALERTS.update(alert_id, {"payload": dict(payload, lat=lat, lon=lon)})
+                    if stored is not None:
+                        stream_alerts([stored])
+        return (lat, lon) if lat and lon else None
+
+    def shelters_stage(r):
+        if not r.get("locate") or not callable(find_nearby_shelters):
+            return []
+        lat, lon = r["locate"]
+        return _shared_call(shared, "shelters", (round(lat, 4), round(lon, 4)),
+                            lambda: find_nearby_shelters(lat, lon, radius_m=15000) or [])
+
+    def routes_stage(r):
+        shelters = r.get("shelters")
+        if not shelters:
+            return None
+        lat, lon = r["locate"]
+        # rank every candidate by ETA with one batched matrix call, then recommend the fastest
+        dests = [(s.get("lat"), s.get("lon")) for s in shelters]
+        etas = _shared_call(shared, "routes", ((round(lat, 4), round(lon, 4)), tuple(dests)),
+                            lambda: estimate_routes([(lat, lon)], dests)[0])
+        ranked = sorted(zip(shelters, etas), key=lambda se: _eta_sort_key(se[1]))
+        top = ranked[0][0]
+        return {
+            "recommended_shelter": top,
+            "route": _shared_call(shared, "route", ((round(lat, 4), round(lon, 4)), (top.get("lat"), top.get("lon"))),
+                                  lambda: estimate_route(lat, lon, top.get("lat"), top.get("lon"))),
+            "shelter_options": [
+                {"name": s.get("name"), "id": s.get("id"), "distance_m": eta.get("distance_m"), "duration_s": eta.get("duration_s")}
+                for s, eta in ranked[:5]
+            ],
+        }
+
+    def routes_fallback(r):
+        # no time for routing: still recommend the closest shelter by straight-line order
+        shelters = r.get("shelters")
+        if not shelters:
+            return None
+        return {"recommended_shelter": shelters[0], "route": None, "shelter_options": []}
 
-        # wait before next polling
-        time.sleep(poll_interval)
+    return [
+        Stage("risk", risk_stage, deadline=PLAN_RISK_DEADLINE, fallback=lambda r: heuristic_risk(alert)),
+        Stage("planner", planner_stage, deps=("risk",), deadline=PLAN_PLANNER_DEADLINE,
+              fallback=lambda r: {"tasks": []}),
+        Stage("volunteers", volunteers_stage, deps=("risk", "planner"), deadline=PLAN_TOOL_DEADLINE),
+        Stage("locate", locate_stage, deadline=PLAN_TOOL_DEADLINE),
+        Stage("shelters", shelters_stage, deps=("locate",), deadline=PLAN_TOOL_DEADLINE, fallback=lambda r: []),
+        Stage("routes", routes_stage, deps=("locate", "shelters"), deadline=PLAN_TOOL_DEADLINE,
+              fallback=routes_fallback),
+    ]
 
 
+# Start the ingest scheduler exactly once (one asyncio loop thread polls every configured source)
+INGEST = IngestScheduler(
+    sources_from_env(),
+    sink=alert_producer,
+    jitter=float(os.getenv("INGEST_JITTER", "0.1")),
+    max_backoff=float(os.getenv("INGEST_MAX_BACKOFF_SECONDS", "300")),
+    breaker_threshold=int(os.getenv("INGEST_BREAKER_THRESHOLD", "5")),
+    breaker_cooldown=float(os.getenv("INGEST_BREAKER_COOLDOWN_SECONDS", "60")),
+)
 
-# Start the background thread exactly once
-_producer_thread = None
-def start_alert_producer_once(poll_interval=10):
-    global _producer_thread
-    if _producer_thread and _producer_thread.is_alive():
-        logger.info("alert_producer thread already running")
+def start_alert_producer_once():
+    if INGEST.is_running():
+        logger.info("ingest scheduler already running")
         return
-    _producer_thread = threading.Thread(target=alert_producer, args=(poll_interval,), daemon=True)
-    _producer_thread.start()
-    logger.info("Started alert_producer thread (daemon)")
+    INGEST.start()
+    logger.info("Started ingest scheduler (daemon)")
+
+def start_producing():
+    # start the feed scheduler (sources and intervals come from ALERT_SOURCES / *_POLL_INTERVAL)
+    start_alert_producer_once()
+    if AUTOPLAN_ENABLED:
+        AUTO_PLANNER.start()
+
+def stop_producing():
+    INGEST.stop()
+    AUTO_PLANNER.stop()
+
+def take_over_producing():
+    # this worker just won the producer lease: merge new reports into the incidents the previous
+    # producer opened (and don't reissue their ids), then start polling
+    DEDUP.seed(ALERTS.all())
+    start_producing()
 
 # --------------------------
 # FastAPI lifecycle
 # --------------------------
 @app.on_event("startup")
 def on_startup():
-    # start producer thread
-    poll_interval = int(os.getenv("ALERT_POLL_INTERVAL", "10"))
-    start_alert_producer_once(poll_interval)
-    logger.info("Backend startup complete")
+    started = time.perf_counter()
+    if SYNC is not None:
+        # several workers: only the one holding the producer lease polls feeds (see start_producing)
+        SYNC.start()
+    else:
+        start_producing()
+    # agents (and the ADK import behind them) are built on first use; pre-warm them off the
+    # startup path so the server answers health checks right away
+    if AGENT_PREWARM:
+        AGENTS.prewarm()
+    STARTUP_TIMINGS["startup_ms"] = round((time.perf_counter() - started) * 1000.0, 3)
+    logger.info("Backend startup complete (import %.1f ms, startup %.1f ms)",
+                STARTUP_TIMINGS.get("import_ms", 0.0), STARTUP_TIMINGS["startup_ms"])
+
+@app.on_event("shutdown")
+def on_shutdown():
+    stop_producing()
+    if SYNC is not None:
+        SYNC.stop()   # publishes the last changes and hands the producer lease over
+    SHARED.close()
+    # persist anything still queued in the MemoryBank write-behind buffer
+    MEMORY.close()
 
 
 # --------------------------
 # API endpoints
 # --------------------------
 @app.get("/api/poll_alerts", response_model=List[PollResult])
-def api_poll_alerts():
+def api_poll_alerts(request: Request, location: Optional[str] = None,
+                    type: Optional[str] = None, since: Optional[int] = None, limit: Optional[int] = None):
     """
     Return the current alerts cache (list). This returns the authoritative alerts produced by the background thread.
+    Optional `location` / `type` filters are served from the store's secondary indexes.
+    With `since=<cursor>` only alerts added or changed after that cursor are returned (oldest first, at most
+    `limit`); pass the X-Next-Cursor response header as the next `since`. Without `since`, a `limit` that cuts
+    the list returns the least recently changed alerts and X-Next-Cursor continues right after them.
+    Unchanged polls get 304 via ETag.
+    The X-Stream-Cursor header lets a client open /api/stream right after this snapshot without gaps.
     """
-    with alerts_lock:
-        # return a shallow copy to avoid mutation races
-        copy_list = [a.copy() for a in alerts_cache]
-    return copy_list
+    etag = make_etag("alerts", f"{ALERTS.last_seq}.{ALERTS.evicted}", location, type, since, limit)
+    if not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    # alerts were validated at ingest (validate_alert): the body is their cached JSON, not model output
+    return encoded_response(("alerts", location, type, since, limit), etag,
+                            lambda: _encode_alerts(location, type, since, limit),
+                            **{"X-Stream-Cursor": str(HUB.last_seq)})
+
+def _encode_alerts(location, type, since, limit):
+    if since is not None:
+        alerts, next_cursor = ALERTS.since(since, limit)
+        if location is not None:
+            alerts = [a for a in alerts if a.get("location") == location]
+        if type is not None:
+            alerts = [a for a in alerts if a.get("type") == type]
+        return ALERT_JSON.encode_list(alerts), {"X-Next-Cursor": str(next_cursor)}
+
+    next_cursor = ALERTS.last_seq
+    if location is not None:
+        alerts = ALERTS.by_location(location)
+        if type is not None:
+            alerts = [a for a in alerts if a.get("type") == type]
+    elif type is not None:
+        alerts = ALERTS.by_type(type)
+    else:
+        alerts = ALERTS.all()   # lock-free snapshot
+    if limit is not None and len(alerts) > limit:
+        # same contract as ALERTS.since: the cursor must not skip alerts left out of this page
+        alerts = heapq.nsmallest(max(limit, 0), alerts, key=lambda a: a["seq"])
+        next_cursor = alerts[-1]["seq"] if alerts else 0
+    return ALERT_JSON.encode_list(alerts), {"X-Next-Cursor": str(next_cursor)}
+
+@app.get("/api/alerts/tiles")
+def api_alert_tiles(request: Request, zoom: float = 3, bbox: Optional[str] = None):
+    """
+    Alerts aggregated for the map at `zoom` inside bbox=min_lon,min_lat,max_lon,max_lat (whole world
+    if omitted): one cluster per grid cell with count, centroid, max_risk and a hazard-type histogram.
+    At the finest level small cells come back as individual `points` instead.
+    Served from the incrementally maintained tile index; unchanged requests get 304 via ETag.
+    """
+    box = None
+    if bbox:
+        try:
+            box = tuple(float(v) for v in bbox.split(","))
+        except ValueError:
+            box = ()
+        if len(box) != 4 or box[0] > box[2] or box[1] > box[3]:
+            raise HTTPException(status_code=400, detail="bbox must be min_lon,min_lat,max_lon,max_lat")
+    etag = make_etag("tiles", TILES.version, TILES.level_for(zoom), box)
+    if not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return encoded_response(("tiles", zoom, box), etag, lambda: (json_bytes(TILES.query(zoom, box)), {}))
+
+@app.post("/api/plan/batch")
+def api_plan_batch(req: PlanBatchRequest):
+    """
+    Plan several alerts in one call (at most PLAN_BATCH_MAX). Stored plans are reused as in
+    /api/plan/{alert_id}; the rest are planned together, sharing geocode / shelter / route calls
+    between alerts in the same place and allocating their volunteers in one joint solve.
+    Returns {"plans": [...] (request order), "missing": [ids not in the store], "errors": {id: msg}, "meta"}.
+    """
+    alert_ids = list(dict.fromkeys(req.alert_ids))
+    if len(alert_ids) > PLAN_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"at most {PLAN_BATCH_MAX} alerts per batch")
+    started = time.perf_counter()
+    with start_trace("api_plan_batch", **{"plan.batch_size": len(alert_ids), "plan.refresh": req.refresh}):
+        items, missing = [], []
+        for alert_id in alert_ids:
+            alert = lookup_alert(alert_id)
+            if alert:
+                items.append((alert_id, alert))
+            else:
+                missing.append(alert_id)
+        entries, errors = PLANS.get_many(items, force=req.refresh)
+        plans, outcomes = [], {}
+        for alert_id, _ in items:
+            if alert_id in entries:
+                entry, status = entries[alert_id]
+                PLAN_REQUESTS.inc(outcome=status)
+                outcomes[status] = outcomes.get(status, 0) + 1
+                plans.append(_plan_response(entry, status))
+        return {
+            "plans": plans,
+            "missing": missing,
+            "errors": errors,
+            "meta": {"total_ms": (time.perf_counter() - started) * 1000.0, "plan_cache": outcomes,
+                     "trace_id": current_trace_id()},
+        }
+
+@app.get("/api/autoplan")
+def api_autoplan():
+    """Auto-planner queue and counters (AUTOPLAN=1 enables it)."""
+    return dict(AUTO_PLANNER.stats(), enabled=AUTOPLAN_ENABLED)
 
 @app.post("/api/plan/{alert_id}", response_model=PlanResponse)
-def api_plan(alert_id: str):
+def api_plan(alert_id: str, refresh: bool = False):
     """
     Create a plan for a given alert id using the Risk and Planner ADK agents.
     This implementation is robust: it always returns a dict with tasks (possibly empty)
     and an assignment (possibly None). It logs actions to MEMORY and logger.
+
+    The plan is built as a stage graph (see build_plan_stages): risk -> planner -> volunteers and
+    locate -> shelters -> routes run concurrently, each stage under its own deadline and the whole
+    plan under PLAN_SLA_SECONDS. Per-stage latency/status is returned in `meta.stages`.
+    Finished plans are stored per alert (see agents/plan_manager.py): concurrent requests for the
+    same alert share one computation and later ones get the stored plan until the alert changes or
+    PLAN_TTL_SECONDS pass; `meta.plan_cache` says which ("hit" / "miss" / "coalesced" / "refresh").
+    Agent responses come from the LLM cache when an equivalent alert was seen before;
+    `?refresh=true` forces a new plan with fresh model calls.
+    Each call is a trace (TRACE_SAMPLE_RATE); `meta.trace_id` is the id for /api/traces/{id}, and
+    `meta.plan_trace_id` that of the request that computed the plan.
     """
-    with alerts_lock:
-        alert = next((a for a in alerts_cache if a.get("id") == alert_id), None)
+    with start_trace("api_plan", **{"alert.id": alert_id, "plan.refresh": refresh}) as root:
+        alert = lookup_alert(alert_id)
+        if not alert:
+            logger.warning("api_plan: alert not found: %s", alert_id)
+            raise HTTPException(status_code=404, detail="Alert not found")
+        entry, status = PLANS.get_plan(alert_id, alert, force=refresh)
+        PLAN_REQUESTS.inc(outcome=status)
+        if root is not None:
+            root.set_attribute("plan.cache", status)
+        return _plan_response(entry, status)
 
-    if not alert:
-        logger.warning("api_plan: alert not found: %s", alert_id)
-        raise HTTPException(status_code=404, detail="Alert not found")
+def build_plan(alert_id: str, alert: dict, refresh: bool = False):
+    return finish_plan(alert_id, *run_plan_stages(alert_id, alert, refresh))
 
+def run_plan_stages(alert_id, alert, refresh=False, shared=None, defer_volunteers=False):
+    """Run one alert's stage graph; returns (results, timings, total_ms) for finish_plan()."""
     logger.info("api_plan: planning for alert %s (%s)", alert_id, alert.get("location"))
 
-    # 1) Risk evaluation (ADK helper or fallback)
-    try:
-        risk_value = None
-        if callable(evaluate_risk_via_adk):
-            risk_value = evaluate_risk_via_adk(alert)
-        if risk_value is None:
-            # fallback heuristic
-            conf = float(alert.get("confidence", 0.5))
-            if alert.get("type") == "rainfall":
-                mm = alert.get("payload", {}).get("rain_mm", 0)
-                if mm > 150: risk_value = 0.95
-                elif mm > 80: risk_value = 0.8
-                else: risk_value = 0.4
-            else:
-                risk_value = min(1.0, 0.5 * conf)
-    except Exception:
-        logger.exception("api_plan: risk agent error, using fallback")
-        risk_value = 0.5
+    started = time.perf_counter()
+    stages = build_plan_stages(alert_id, alert, use_cache=not refresh, shared=shared, defer_volunteers=defer_volunteers)
+    results, timings = run_stages(stages, _plan_pool, sla_seconds=PLAN_SLA_SECONDS)
 
-    # 2) Planner (ADK helper or fallback)
-    try:
-        plan_result = None
-        if callable(plan_via_adk):
-            plan_result = plan_via_adk({"alert": alert, "risk": risk_value})
-        if not isinstance(plan_result, dict):
-            plan_result = {"tasks": []}
-    except Exception:
-        logger.exception("api_plan: planner agent error, using fallback")
-        plan_result = {"tasks": []}
+    total_ms = (time.perf_counter() - started) * 1000.0
+    PLAN_SECONDS.observe(total_ms / 1000.0)
+    root = current_span()
+    for stage, t in timings.items():
+        PLAN_STAGE_SECONDS.observe(t["ms"] / 1000.0, stage=stage, status=t["status"])
+        if root is not None:
+            root.set_attribute(f"plan.stage.{stage}", t["status"])
+    return results, timings, total_ms
 
-    # Ensure tasks list exists
+def finish_plan(alert_id, results, timings, total_ms, extra_meta=None):
+    """Assemble the plan from stage results, persist it to MEMORY and log it."""
+    risk_value = results.get("risk")
+    plan_result = results.get("planner") or {}
     tasks = plan_result.get("tasks") if isinstance(plan_result.get("tasks"), list) else []
     assignment = plan_result.get("assignment") if isinstance(plan_result.get("assignment"), dict) else None
 
-    # 3) Assignment: call volunteer tool if high risk or no assignment provided
-    try:
-        if (assignment is None) and float(risk_value) > 0.5:
-            required = 40 if risk_value > 0.8 else 12
-            assignment = safe_assign_volunteers({"location": alert.get("location"), "required": required})
-            tasks.append({"task": "assign_volunteers", "details": f"Assigned {assignment.get('assigned', 0)} volunteers"})
-    except Exception:
-        logger.exception("api_plan: assign volunteers failed")
+    volunteers = results.get("volunteers")
+    if assignment is None and volunteers:
+        assignment = volunteers
+        tasks.append({"task": "assign_volunteers", "details": f"Assigned {assignment.get('assigned', 0)} volunteers"})
 
-    # 4) Geocode & nearest shelter suggestion (best-effort)
-    try:
-        lat = alert.get("payload", {}).get("lat")
-        lon = alert.get("payload", {}).get("lon")
-        if not lat or not lon:
-            if callable(geocode_location):
-                geo = geocode_location(alert.get("location"))
-                if geo:
-                    alert["payload"]["lat"], alert["payload"]["lon"] = geo
-                    lat, lon = geo
-
-        if lat and lon and callable(find_nearby_shelters):
-            shelters = find_nearby_shelters(lat, lon, radius_m=15000)
-            if shelters:
-                # add top shelter suggestion (best-effort)
-                top = shelters[0]
-                tasks.append({"task": "recommend_shelter", "details": f"Recommend shelter: {top.get('name')}"})
-                if callable(estimate_route):
-                    route = estimate_route(lat, lon, top.get("lat"), top.get("lon"))
-                    assignment = assignment or {}
-                    assignment.update({"recommended_shelter": top, "route": route})
-    except Exception:
-        logger.exception("api_plan: shelter/routing step failed")
+    shelter_plan = results.get("routes")
+    if shelter_plan:
+        top = shelter_plan["recommended_shelter"]
+        tasks.append({"task": "recommend_shelter", "details": f"Recommend shelter: {top.get('name')}"})
+        assignment = assignment or {}
+        assignment.update(shelter_plan)
 
     final_plan = {
         "event_id": alert_id,
         "risk": float(risk_value),
         "tasks": tasks,
-        "assignment": assignment
+        "assignment": assignment,
+        "meta": dict({"stages": timings, "total_ms": total_ms, "sla_s": PLAN_SLA_SECONDS, "trace_id": current_trace_id()},
+                     **(extra_meta or {})),
     }
 
     # persist plan + log
@@ -420,30 +940,352 @@ def api_plan(alert_id: str):
     logger.info("api_plan: returning plan for %s with %d tasks", alert_id, len(tasks))
     return final_plan
 
+def build_plans(items, refresh=False):
+    """
+    Plan [(alert_id, alert)] together: each alert's stage graph runs on the batch pool with
+    geocode / shelter / route calls shared across the batch, then the volunteers every plan asked
+    for are allocated in one joint solve (allocate_volunteers_batch) and the plans are assembled.
+    Returns {alert_id: plan or Exception}.
+    """
+    shared = SharedToolCalls()
+
+    def run_one(alert_id, alert):
+        with span("plan.alert", **{"alert.id": alert_id}):
+            return run_plan_stages(alert_id, alert, refresh, shared=shared, defer_volunteers=True)
+
+    futures = {alert_id: _batch_pool.submit(run_in_context(run_one, alert_id, alert)) for alert_id, alert in items}
+    staged, out = {}, {}
+    for alert_id, future in futures.items():
+        try:
+            staged[alert_id] = future.result()
+        except Exception as e:
+            logger.exception("build_plans: stages failed for %s", alert_id)
+            out[alert_id] = e
+
+    deferred = [r["volunteers"] for r, _, _ in staged.values() if isinstance(r.get("volunteers"), dict) and r["volunteers"].get("deferred")]
+    allocations = {}
+    if deferred:
+        try:
+            requests_ = [{k: d[k] for k in ("alert_id", "location", "required", "risk")} for d in deferred]
+            for allocation in allocate_volunteers_batch(requests_, commit=True):
+                allocations[allocation.get("alert_id")] = dict(allocation, status="ok")
+        except Exception:
+            logger.exception("build_plans: joint volunteer allocation failed")
+
+    batch_meta = {"batch": {"size": len(items), "shared_calls": shared.stats(), "volunteer_requests": len(deferred)}}
+    for alert_id, (results, timings, total_ms) in staged.items():
+        if isinstance(results.get("volunteers"), dict) and results["volunteers"].get("deferred"):
+            results["volunteers"] = allocations.get(alert_id)
+        try:
+            out[alert_id] = finish_plan(alert_id, results, timings, total_ms, extra_meta=batch_meta)
+        except Exception as e:
+            out[alert_id] = e
+    for kind, st in batch_meta["batch"]["shared_calls"].items():
+        PLAN_SHARED_CALLS.inc(st["calls"], kind=kind, outcome="call")
+        PLAN_SHARED_CALLS.inc(st["requests"] - st["calls"], kind=kind, outcome="shared")
+    return out
+
+PLAN_BATCH_MAX = int(os.getenv("PLAN_BATCH_MAX", "200"))
+_batch_pool = ThreadPoolExecutor(max_workers=int(os.getenv("PLAN_BATCH_WORKERS", "4")), thread_name_prefix="plan-batch")
+# plans are shared between workers too when SHARED_STATE is set
+PLANS = PlanManager(build_plan, build_plans, shared=SHARED if SHARED_STATE != "local" else None, owner=WORKER_ID)
+PLAN_REQUESTS = REGISTRY.counter("plan_requests_total", "api_plan requests by plan cache outcome", ("outcome",))
+PLAN_SHARED_CALLS = REGISTRY.counter(
+    "plan_batch_tool_calls_total", "Tool calls made vs. shared across a plan batch", ("kind", "outcome"))
+
+# Background planning of high-risk alerts (AUTOPLAN=1; see agents/batch_planner.py)
+AUTO_PLANNER = AutoPlanner(plan_many=PLANS.get_many, lookup=lambda alert_id: ALERTS.get(alert_id), skip=PLANS.has_plan)
+
+# Producer election + alert replication between workers (None with a single worker)
+SYNC = StateSync(
+    SHARED, ALERTS, worker_id=WORKER_ID,
+    on_promote=take_over_producing, on_demote=stop_producing,
+    plan_max_age=PLAN_TTL_SECONDS or None, journal=JOURNAL,
+) if SHARED_STATE != "local" else None
+
+def _plan_response(entry, status):
+    plan = entry["plan"]
+    meta = dict(plan.get("meta") or {}, plan_cache=status, trace_id=current_trace_id(),
+                plan_trace_id=(plan.get("meta") or {}).get("trace_id"),
+                plan_age_s=round(time.time() - entry["computed_at"], 3))
+    return dict(plan, meta=meta)
+
+
+@app.get("/api/volunteers")
+def api_volunteers():
+    """
+    Volunteer pool status per region (capacity / reserved / available).
+    """
+    return VOLUNTEER_POOL.status()
+
+@app.post("/api/volunteers/release/{alert_id}")
+def api_release_volunteers(alert_id: str):
+    res = release_volunteers_tool_func({"alert_id": alert_id})
+    if res.get("status") != "ok":
+        raise HTTPException(status_code=404, detail="No reservation for alert")
+    # the stored plan still lists the released assignment
+    PLANS.invalidate(alert_id)
+    log_event({"type": "volunteers_released", "event_id": alert_id, "count": res["released"], "time": now_iso()})
+    return res
+
+@app.post("/api/volunteers/allocate")
+def api_allocate_volunteers(commit: bool = False):
+    """
+    Jointly allocate volunteers across all open alerts (min-cost flow weighted by risk).
+    Uses each alert's stored risk when present, otherwise its confidence.
+    With commit=true the allocations are reserved in the pool.
+    """
+    requests_ = []
+    for a in ALERTS.all():
+        risk = a.get("risk", a.get("confidence", 0.5))
+        required = required_volunteers(risk)
+        if required:
+            requests_.append({"alert_id": a.get("id"), "location": a.get("location"), "required": required, "risk": risk})
+    allocations = allocate_volunteers_batch(requests_, commit=commit)
+    return {"committed": commit, "allocations": allocations}
+
+def _memory_delta(kind, request, response, since, limit, default_limit=None):
+    """
+    Shared since/limit/ETag handling for MemoryBank-backed endpoints.
+    Returns (records, next_cursor), or a 304 Response when the client is up to date.
+    """
+    etag = make_etag(kind, MEMORY.last_seq, since, limit)
+    if not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag}), None
+    response.headers["ETag"] = etag
+    if since is None:
+        records = MEMORY.recent(kind, limit if limit is not None else default_limit)
+    else:
+        if MEMORY.cursor_expired(kind, since):
+            # entries between the cursor and the oldest retained record were evicted
+            response.headers["X-Cursor-Expired"] = "1"
+        records = MEMORY.since(kind, since, limit)
+    if since is not None and limit is not None and len(records) >= limit:
+        next_cursor = records[-1]["seq"]
+    else:
+        next_cursor = MEMORY.last_seq
+    response.headers["X-Next-Cursor"] = str(next_cursor)
+    return records, next_cursor
 
 @app.get("/api/incidents", response_model=List[PollResult])
-def api_list_incidents():
+def api_list_incidents(request: Request, response: Response, since: Optional[int] = None, limit: Optional[int] = None):
     """
     Return incidents recorded in MemoryBank (used earlier in your app).
+    Supports since=<cursor>&limit= delta reads and ETag / If-None-Match like /api/poll_alerts.
     """
     try:
-        return MEMORY.incidents
+        records, _ = _memory_delta("incident", request, response, since, limit)
+        if isinstance(records, Response):
+            return records
+        # MemoryBank records are snapshots with a unique seq: each one is encoded once
+        body = INCIDENT_JSON.encode_list(records, key=lambda r: r.get("seq"), version=lambda r: None)
+        headers = {k: v for k, v in response.headers.items() if k.lower() in ("etag", "x-next-cursor", "x-cursor-expired")}
+        return Response(body, media_type="application/json", headers=headers)
     except Exception:
         logger.exception("failed to return MEMORY.incidents")
         return []
 
 @app.get("/api/logs")
-def api_logs():
+def api_logs(request: Request, response: Response, since: Optional[int] = None, limit: Optional[int] = None):
     """
-    Return recent logs stored in MemoryBank
+    Return recent logs stored in MemoryBank (last 200 by default).
+    With since=<cursor> every entry after the cursor is returned (up to `limit`), so pollers don't miss
+    entries between polls; `cursor` in the body is the value to pass next.
     """
     try:
-        return {"logs": MEMORY.logs[-200:]}
+        records, next_cursor = _memory_delta("log", request, response, since, limit, default_limit=200)
+        if isinstance(records, Response):
+            return records
+        return {"logs": records, "cursor": next_cursor}
     except Exception:
+        logger.exception("failed to return MEMORY logs")
         return {"logs": []}
 
+@app.get("/api/stream")
+async def api_stream(request: Request, cursor: Optional[int] = None, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-Sent Events stream of new/changed alerts ("alert") and log entries ("log").
+    Resume with ?cursor=<id> or the Last-Event-ID header; without either, only events from now on
+    are sent. A "reset" event means the cursor is too old and the client should refetch snapshots.
+    """
+    if cursor is None and last_event_id:
+        try:
+            cursor = int(last_event_id)
+        except ValueError:
+            cursor = None
+    sub = HUB.subscribe(cursor)
+
+    async def event_source():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                batch = await sub.next_batch(timeout=STREAM_KEEPALIVE_SECONDS)
+                yield "".join(e.sse() for e in batch) if batch else ": keepalive\n\n"
+        finally:
+            HUB.unsubscribe(sub)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/producer/stats")
+def api_producer_stats():
+    """
+    Per-stage producer timings in milliseconds (fetch, enrich, score, lock_wait, lock_hold, total),
+    per-source ingest state (polls, failures, backoff, breaker) and alert store size/eviction counters.
+    """
+    return {
+        "producer": get_producer_stats(),
+        "sources": INGEST.stats(),
+        "dedup": DEDUP.stats(),
+        "store": ALERTS.stats(),
+        "tiles": TILES.stats(),
+        "memory": MEMORY.stats(),
+        "stream": HUB.stats(),
+    }
+
+@app.get("/api/cache/stats")
+def api_cache_stats():
+    """
+    Hit/miss counters for the backend caches.
+    """
+    return {
+        "geocode": geocode_stats(),
+        "routes": route_cache_stats(),
+        "llm": {"risk": RISK_CACHE.stats(), "planner": PLAN_CACHE.stats()},
+        "plans": PLANS.stats(),
+        "json": {"alerts": ALERT_JSON.stats(), "incidents": INCIDENT_JSON.stats(), "responses": RESPONSES.stats()},
+    }
+
+@app.get("/api/http/stats")
+def api_http_stats():
+    """
+    Outbound HTTP latency histograms (p50/p95/p99), retries and errors per endpoint.
+    """
+    return {"endpoints": http_stats()}
+
+def collect_backend_metrics():
+    """Scrape-time metrics from the stats the backend already keeps (caches, HTTP client, store, stream)."""
+    geo, routes = geocode_stats(), route_cache_stats()
+    caches = {
+        "geocode_lru": geo["lru"], "geocode_disk": geo["disk"],
+        "routes": routes["routes"], "distance_matrix": routes["matrix"],
+        "plans": PLANS.stats()["store"],
+        "alert_json": ALERT_JSON.stats(),
+        "incident_json": INCIDENT_JSON.stats(),
+        "responses": RESPONSES.stats(),
+    }
+    for agent, cache in (("risk", RISK_CACHE), ("planner", PLAN_CACHE)):
+        st = cache.stats()
+        caches[f"llm_{agent}_memory"] = st["memory"]
+        caches[f"llm_{agent}_disk"] = st["disk"]
+    families = cache_families(caches)
+
+    endpoints = http_stats()
+    families.append(millisecond_histogram_family(
+        "external_request_duration_seconds", "Outbound API call latency per tool endpoint", endpoints, "endpoint"))
+    requests_total = MetricFamily("external_requests_total", "counter", "Outbound API responses per tool endpoint and status")
+    errors = MetricFamily("external_errors_total", "counter", "Outbound API failures (transport errors, 4xx/5xx) per tool endpoint")
+    retries = MetricFamily("external_retries_total", "counter", "Outbound API retries per tool endpoint")
+    for endpoint, snap in endpoints.items():
+        for status, n in snap["status"].items():
+            requests_total.add(n, endpoint=endpoint, status=status)
+        errors.add(snap["errors"], endpoint=endpoint)
+        retries.add(snap["retries"], endpoint=endpoint)
+    families += [requests_total, errors, retries]
+
+    source_polls = MetricFamily("ingest_polls_total", "counter", "Feed source polls")
+    source_failures = MetricFamily("ingest_poll_failures_total", "counter", "Failed feed source polls (incl. timeouts)")
+    for name, st in INGEST.stats().items():
+        source_polls.add(st["polls"], source=name)
+        source_failures.add(st["failures"], source=name)
+    families += [source_polls, source_failures]
+
+    store, stream, dedup = ALERTS.stats(), HUB.stats(), DEDUP.stats()
+    families += [
+        MetricFamily("alerts_stored", "gauge", "Incidents in the alert store").add(store["size"]),
+        MetricFamily("alerts_evicted_total", "counter", "Incidents evicted from the alert store").add(store["evicted"]),
+        MetricFamily("dedup_merged_reports_total", "counter", "Reports merged into existing incidents").add(dedup["merged"]),
+        MetricFamily("stream_subscribers", "gauge", "Connected /api/stream subscribers").add(stream["subscribers"]),
+    ]
+
+    agents = AGENTS.stats()
+    ready = MetricFamily("agent_ready", "gauge", "1 once the agent is built, 0 while pending or after a failed build")
+    init = MetricFamily("agent_init_seconds", "gauge", "Time spent building each agent")
+    for name, st in agents["agents"].items():
+        ready.add(1 if st["state"] == "ready" else 0, agent=name)
+        init.add(st["init_ms"] / 1000.0, agent=name)
+    families += [ready, init]
+
+    auto = AUTO_PLANNER.stats()
+    families += [
+        MetricFamily("autoplan_queue_depth", "gauge", "High-risk alerts waiting to be auto-planned").add(auto["queued"]),
+        MetricFamily("autoplan_plans_total", "counter", "Alerts planned by the auto-planner").add(auto["planned"]),
+        MetricFamily("autoplan_failures_total", "counter", "Auto-planner plans that failed").add(auto["failed"]),
+    ]
+
+    if SYNC is not None:
+        sync = SYNC.stats()
+        families += [
+            MetricFamily("shared_state_leader", "gauge", "1 while this worker holds the producer lease").add(
+                1 if sync["role"] == "leader" else 0, worker=sync["worker_id"]),
+            MetricFamily("shared_state_applied_total", "counter", "Alert changes replayed from the shared log").add(sync["applied"]),
+            MetricFamily("shared_state_published_total", "counter", "Alert changes published to the shared log").add(sync["published"]),
+        ]
+    return families
+
+REGISTRY.register_collector(collect_backend_metrics)
+
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus text exposition: request / plan-stage / producer / lock / LLM latency histograms,
+    cache hit ratios and outbound API error counters.
+    """
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/api/traces")
+def api_traces(limit: int = 50, min_ms: float = 0.0):
+    """
+    Recently finished traces (newest first); `min_ms` keeps only the slow ones.
+    """
+    return {"tracer": TRACER.stats(), "traces": recent_traces(limit=limit, min_ms=min_ms)}
+
+@app.get("/api/traces/{trace_id}")
+def api_trace(trace_id: str):
+    """
+    One trace as a waterfall: spans ordered by start, with offset / duration (ms) and tree depth.
+    """
+    trace = waterfall(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found (not sampled or aged out)")
+    return trace
+
 @app.get("/api/health")
 def api_health():
-    return {"status": "ok", "time": now_iso()}
+    # never waits for the agents: they report "pending" until built (see /api/agents)
+    agents = {name: st["state"] for name, st in AGENTS.stats()["agents"].items()}
+    role = "single" if SYNC is None else ("leader" if SYNC.leader else "follower")
+    return {"status": "ok", "time": now_iso(), "agents": agents, "worker": WORKER_ID, "role": role}
+
+@app.get("/api/cluster")
+def api_cluster():
+    """
+    This worker's view of the shared state: role, producer lease holder, replication cursors.
+    With SHARED_STATE=local (one worker) there is nothing to share.
+    """
+    if SYNC is None:
+        return {"shared_state": SHARED_STATE, "worker_id": WORKER_ID, "role": "single", "backend": SHARED.stats()}
+    return dict(SYNC.stats(), shared_state=SHARED_STATE, producer=SHARED.lease_holder(PRODUCER_LEASE))
+
+
+@app.get("/api/agents")
+def api_agents():
+    """Agent build state / init times, ADK import times and process startup timings."""
+    return dict(AGENTS.stats(), startup=STARTUP_TIMINGS)
+
+STARTUP_TIMINGS["import_ms"] = round((time.perf_counter() - _IMPORT_STARTED) * 1000.0, 3)
 
 # End of file
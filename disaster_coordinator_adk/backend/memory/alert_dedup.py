@@ -0,0 +1,264 @@
+# backend/memory/alert_dedup.py
+"""
+Semantic de-duplication of incoming alerts into incidents.
+
+Reports of the same real-world event (same hazard type, nearby, close in time) are merged into
+one incident, whichever feed or poll they came from:
+
+- spatial key: a lat/lon grid cell of `cell_deg` degrees (or the normalized location name when
+  an alert has no coordinates); a report matches incidents within `radius_m`, found by probing
+  the block of neighbouring cells that radius can reach (more cells in longitude away from the
+  equator, where a degree of longitude is shorter)
+- temporal key: `window_seconds` buckets; a report matches incidents whose time is within one window
+- the incident id is derived from the content of its first report (hazard, cell, time bucket),
+  so it is stable across polls and restarts (unlike Python's per-process salted hash())
+- confidence is merged as a noisy-OR over sources (each source counts once, at its best
+  confidence), and the incident keeps the list of contributing source reports
+- incidents already handed out (and stored) are never modified here: a report merged into one
+  comes back as the changed fields, for the caller to apply under its store lock
+
+Each report does O(1) index lookups, so merging a batch is linear in its size. Index entries
+older than `retention_seconds` are dropped as batches arrive.
+"""
+import hashlib
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from memory.alert_store import alert_timestamp
+
+_EARTH_RADIUS_M = 6371000.0
+_METERS_PER_DEG_LAT = 111000.0
+
+
+def _haversine_m(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    h = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * _EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(h)))
+
+
+def content_id(prefix: str, *parts) -> str:
+    """Deterministic short id from content (same input -> same id in every process)."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f"{prefix}-{digest[:12]}"
+
+
+def merge_confidence(per_source: Dict[str, float]) -> float:
+    """Noisy-OR: independent sources reporting the same event raise confidence."""
+    miss = 1.0
+    for c in per_source.values():
+        miss *= 1.0 - max(0.0, min(1.0, c))
+    return round(1.0 - miss, 4)
+
+
+class _Incident:
+    __slots__ = ("alert", "lat", "lon", "ts", "best_by_source", "report_keys", "reports")
+
+    def __init__(self, alert, lat, lon, ts):
+        self.alert = alert          # as handed out; read-only once stored
+        self.lat = lat
+        self.lon = lon
+        self.ts = ts
+        self.best_by_source: Dict[str, float] = {}
+        self.report_keys = set()
+        self.reports: List[Dict] = []
+
+
+class AlertDeduplicator:
+    def __init__(self, cell_deg: float = 0.15, radius_m: float = 15000.0, window_seconds: float = 3 * 3600,
+                 retention_seconds: float = 24 * 3600, max_reports: int = 50):
+        self.cell_deg = cell_deg
+        self.radius_m = radius_m
+        self.window_seconds = window_seconds
+        self.retention_seconds = retention_seconds
+        self.max_reports = max_reports
+        self._lock = threading.Lock()
+        self._index: Dict[Tuple, Dict[str, None]] = {}     # (hazard, cell, bucket) -> incident ids
+        self._by_bucket: Dict[int, Dict[str, None]] = {}  # time bucket -> incident ids (for retention)
+        self._incidents: Dict[str, _Incident] = {}
+        self._keys_of: Dict[str, Tuple] = {}
+        self.merged = 0
+        self.repeats = 0
+
+    # --------------------------
+    # Public API
+    # --------------------------
+    def merge(self, alerts: List[Dict]) -> Tuple[List[Dict], List[Tuple[Dict, Dict]]]:
+        """
+        Fold a batch of normalized alerts into incidents.
+        Returns (new_incidents, updated): new ones carry their stable incident id and should be
+        stored; updated is [(incident, changes)] for incidents returned by an earlier call (or
+        seeded) that have since gained reports. The incident dict itself is left untouched:
+        apply `changes` (reports, report_count, sources, confidence) with AlertStore.update.
+        Reports already seen (same source + report id) are ignored.
+        """
+        new, new_ids, updated = [], set(), {}
+        with self._lock:
+            self._expire(time.time())
+            for a in alerts:
+                hazard = str(a.get("type") or "").strip().lower()
+                lat, lon = self._coords(a)
+                ts = alert_timestamp(a)
+                inc = self._match(hazard, a, lat, lon, ts)
+                if inc is None:
+                    inc = self._open(hazard, a, lat, lon, ts)
+                    new.append(inc.alert)
+                    new_ids.add(inc.alert["id"])
+                    continue
+                changes = self._add_report(inc, a, a.get("id"))
+                if changes is None:
+                    self.repeats += 1
+                    continue
+                self.merged += 1
+                if inc.alert["id"] in new_ids:
+                    inc.alert.update(changes)   # opened by this batch: not stored yet
+                else:
+                    updated[inc.alert["id"]] = (inc.alert, changes)
+        return new, list(updated.values())
+
+    def seed(self, incidents: Iterable[Dict]):
+        """
+        Rebuild the index from stored incidents, e.g. in a worker taking over as producer: new
+        reports then merge into them and new incidents don't reuse their ids. Each incident's
+        report trail (up to max_reports entries) stands in for the reports seen so far.
+        """
+        with self._lock:
+            self._index.clear()
+            self._by_bucket.clear()
+            self._incidents.clear()
+            self._keys_of.clear()
+            for alert in incidents:
+                if not alert.get("id"):
+                    continue
+                hazard = str(alert.get("type") or "").strip().lower()
+                lat, lon = self._coords(alert)
+                inc = _Incident(alert, lat, lon, alert_timestamp(alert))
+                inc.reports = list(alert.get("reports") or ())
+                for report in inc.reports:
+                    source = str(report.get("source") or "unknown")
+                    inc.report_keys.add((source, report.get("id") or content_id("r", report.get("time"), alert.get("location"))))
+                    try:
+                        conf = float(report.get("confidence", 0.5))
+                    except (TypeError, ValueError):
+                        conf = 0.5
+                    inc.best_by_source[source] = max(conf, inc.best_by_source.get(source, 0.0))
+                self._register(alert["id"], inc, (hazard, self._cell(alert, lat, lon), int(inc.ts // self.window_seconds)))
+            self._expire(time.time())
+
+    def forget(self, incident_id: str):
+        with self._lock:
+            self._drop(incident_id)
+
+    def stats(self) -> Dict:
+        return {"incidents": len(self._incidents), "merged": self.merged, "repeats": self.repeats}
+
+    # --------------------------
+    # Internals (caller holds self._lock)
+    # --------------------------
+    @staticmethod
+    def _coords(a):
+        payload = a.get("payload") or {}
+        try:
+            return float(payload["lat"]), float(payload["lon"])
+        except (KeyError, TypeError, ValueError):
+            return None, None
+
+    def _cell(self, a, lat, lon):
+        if lat is None:
+            return ("loc", " ".join(str(a.get("location") or "").split()).casefold())
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    def _neighbour_cells(self, cell):
+        if cell[0] == "loc":
+            return [cell]
+        ry = max(1, math.ceil(self.radius_m / (self.cell_deg * _METERS_PER_DEG_LAT)))
+        # a longitude degree shrinks by cos(lat): size the ring for the cell edge (plus the radius)
+        # farthest from the equator, clamped near the poles to at most the whole circle
+        reach = max(abs(cell[0]), abs(cell[0] + 1)) * self.cell_deg + self.radius_m / _METERS_PER_DEG_LAT
+        cos_lat = max(math.cos(math.radians(min(89.9, reach))), 1e-6)
+        rx = max(1, math.ceil(self.radius_m / (self.cell_deg * _METERS_PER_DEG_LAT * cos_lat)))
+        rx = min(rx, math.ceil(180.0 / self.cell_deg))
+        return [(cell[0] + dy, cell[1] + dx) for dy in range(-ry, ry + 1) for dx in range(-rx, rx + 1)]
+
+    def _match(self, hazard, a, lat, lon, ts) -> Optional[_Incident]:
+        bucket = int(ts // self.window_seconds)
+        best, best_d = None, None
+        for cell in self._neighbour_cells(self._cell(a, lat, lon)):
+            for b in (bucket - 1, bucket, bucket + 1):
+                for incident_id in self._index.get((hazard, cell, b), ()):
+                    inc = self._incidents[incident_id]
+                    if abs(inc.ts - ts) > self.window_seconds:
+                        continue
+                    d = 0.0
+                    if lat is not None:
+                        d = _haversine_m(lat, lon, inc.lat, inc.lon)
+                        if d > self.radius_m:
+                            continue
+                    if best is None or d < best_d:
+                        best, best_d = inc, d
+        return best
+
+    def _open(self, hazard, a, lat, lon, ts) -> _Incident:
+        cell = self._cell(a, lat, lon)
+        bucket = int(ts // self.window_seconds)
+        incident_id = content_id(hazard or "alert", cell, bucket)
+        # two distinct events in the same cell/window get distinct ids
+        n = 1
+        while incident_id in self._incidents:
+            n += 1
+            incident_id = content_id(hazard or "alert", cell, bucket, n)
+        report_id = a.get("id")
+        a["id"] = incident_id
+        inc = _Incident(a, lat, lon, ts)
+        a.update(self._add_report(inc, a, report_id))
+        self._register(incident_id, inc, (hazard, cell, bucket))
+        return inc
+
+    def _register(self, incident_id, inc: _Incident, key):
+        self._index.setdefault(key, {})[incident_id] = None
+        self._by_bucket.setdefault(key[2], {})[incident_id] = None
+        self._keys_of[incident_id] = key
+        self._incidents[incident_id] = inc
+
+    def _add_report(self, inc: _Incident, report: Dict, report_id) -> Optional[Dict]:
+        """Record a report on the incident; returns the incident fields that changed, or None for a repeat."""
+        source = str(report.get("source") or "unknown")
+        key = (source, report_id or content_id("r", report.get("time"), report.get("location")))
+        if key in inc.report_keys:
+            return None
+        inc.report_keys.add(key)
+        try:
+            conf = float(report.get("confidence", 0.5))
+        except (TypeError, ValueError):
+            conf = 0.5
+        inc.best_by_source[source] = max(conf, inc.best_by_source.get(source, 0.0))
+
+        if len(inc.reports) < self.max_reports:
+            inc.reports.append({"source": source, "id": report_id, "time": report.get("time"), "confidence": conf})
+        return {
+            "reports": list(inc.reports),
+            "report_count": len(inc.report_keys),
+            "sources": sorted(inc.best_by_source),
+            "confidence": merge_confidence(inc.best_by_source),
+        }
+
+    def _expire(self, now):
+        # whole time buckets age out together; there are only retention / window of them
+        cutoff = int((now - self.retention_seconds) // self.window_seconds)
+        for bucket in [b for b in self._by_bucket if b < cutoff]:
+            for incident_id in list(self._by_bucket[bucket]):
+                self._drop(incident_id)
+
+    def _drop(self, incident_id):
+        self._incidents.pop(incident_id, None)
+        key = self._keys_of.pop(incident_id, None)
+        if key is None:
+            return
+        for index, k in ((self._index, key), (self._by_bucket, key[2])):
+            ids = index.get(k)
+            if ids is not None:
+                ids.pop(incident_id, None)
+                if not ids:
+                    del index[k]
@@ -0,0 +1,346 @@
+# backend/memory/alert_store.py
+"""
+Indexed, bounded in-process store for alerts produced by the background producer.
+
+- O(1) lookup by alert id
+- secondary indexes by location, type and time bucket
+- retention by max count (oldest evicted first) and optional TTL
+- readers of the full list / single ids never take the write lock: every commit
+  publishes a fresh immutable snapshot tuple
+- location / type reads are served from immutable per-key snapshot tuples too; a write drops
+  the snapshots of the keys it touches and the next reader of such a key rebuilds it (under the
+  lock, once). Time-range reads still take the lock
+- every insert/update stamps the alert with a monotonic "seq", so clients can ask
+  for only what changed since their last cursor
+- apply_changes() replays another process's changes with their original seqs (read replicas,
+  see memory/shared_state.py); a changed alert is swapped in as a new dict, never edited in place
+- observers (add_observer) keep derived indexes such as the map tiles (memory/alert_tiles.py)
+  in step with every insert, change and eviction
+"""
+
+import bisect
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def alert_timestamp(alert: Dict, default: Optional[float] = None) -> float:
+    """
+    Best-effort epoch seconds for an alert's 'time' field (ISO string or epoch number).
+    Falls back to `default` (or now) when the field is missing or unparsable.
+    """
+    value = alert.get("time")
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and value:
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            return dt.timestamp()
+        except ValueError:
+            pass
+    return default if default is not None else time.time()
+
+
+class AlertStore:
+    def __init__(self, max_alerts: int = 5000, ttl_seconds: Optional[float] = None, bucket_seconds: int = 3600):
+        self.max_alerts = max(1, int(max_alerts))
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self.bucket_seconds = max(1, int(bucket_seconds))
+
+        # writers serialize on this lock; it is re-entrant so a caller can group several
+        # mutations into one atomic commit with `with store.lock:`
+        self.lock = threading.RLock()
+
+        self._by_id: "OrderedDict[str, Dict]" = OrderedDict()   # insertion (= ingest) order
+        self._ingested_at: Dict[str, float] = {}
+        self._by_location: Dict[str, Dict[str, None]] = {}
+        self._by_type: Dict[str, Dict[str, None]] = {}
+        self._by_bucket: Dict[int, Dict[str, None]] = {}
+        self._bucket_of: Dict[str, int] = {}
+
+        self._snapshot: Tuple[Dict, ...] = ()
+        self._views: Dict[tuple, Tuple[Dict, ...]] = {}   # ("location"|"type", key) -> snapshot
+        self.evicted = 0
+
+        self._seq = 0
+        self._seq_of: Dict[str, int] = {}                 # alert_id -> current seq
+        self._change_seqs: List[int] = []                 # change log in seq order (may hold stale entries)
+        self._change_ids: List[str] = []
+        self._observers: List = []
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    # --------------------------
+    # Reads (lock-free)
+    # --------------------------
+    def __len__(self):
+        return len(self._snapshot)
+
+    def __contains__(self, alert_id):
+        return alert_id in self._by_id
+
+    def get(self, alert_id: str) -> Optional[Dict]:
+        return self._by_id.get(alert_id)
+
+    def all(self) -> Tuple[Dict, ...]:
+        """Immutable snapshot of all alerts in ingest order."""
+        return self._snapshot
+
+    # --------------------------
+    # Indexed reads
+    # --------------------------
+    def by_location(self, location: str) -> Tuple[Dict, ...]:
+        return self._view("location", self._by_location, location)
+
+    def by_type(self, alert_type: str) -> Tuple[Dict, ...]:
+        return self._view("type", self._by_type, alert_type)
+
+    def by_time_range(self, start_ts: float, end_ts: Optional[float] = None) -> List[Dict]:
+        """Alerts whose 'time' falls in [start_ts, end_ts] (epoch seconds)."""
+        end_ts = time.time() if end_ts is None else end_ts
+        first, last = int(start_ts // self.bucket_seconds), int(end_ts // self.bucket_seconds)
+        with self.lock:
+            ids = []
+            for bucket in range(first, last + 1):
+                ids.extend(self._by_bucket.get(bucket, ()))
+            found = [self._by_id[i] for i in ids]
+        return [a for a in found if start_ts <= alert_timestamp(a) <= end_ts]
+
+    def since(self, cursor: int = 0, limit: Optional[int] = None) -> Tuple[List[Dict], int]:
+        """
+        Alerts inserted or changed after `cursor`, in seq order, plus the cursor to pass next time.
+        """
+        with self.lock:
+            start = bisect.bisect_right(self._change_seqs, cursor)
+            out, next_cursor = [], max(cursor, 0)
+            for i in range(start, len(self._change_seqs)):
+                seq, alert_id = self._change_seqs[i], self._change_ids[i]
+                if self._seq_of.get(alert_id) != seq:
+                    continue    # superseded by a later change, or evicted
+                if limit is not None and len(out) >= limit:
+                    return out, next_cursor
+                out.append(self._by_id[alert_id])
+                next_cursor = seq
+            return out, self._seq
+
+    def _view(self, name, index, key) -> Tuple[Dict, ...]:
+        view = self._views.get((name, key))
+        if view is not None:
+            return view
+        with self.lock:
+            ids = index.get(key)
+            if not ids:
+                return ()   # unknown keys are not cached, so arbitrary lookups can't grow _views
+            view = tuple(self._by_id[i] for i in ids)
+            self._views[(name, key)] = view
+        return view
+
+    # --------------------------
+    # Writes
+    # --------------------------
+    def add(self, alert: Dict) -> bool:
+        """Insert an alert if its id is new. Returns True if it was stored."""
+        return bool(self.add_many([alert]))
+
+    def add_many(self, alerts: Iterable[Dict]) -> List[Dict]:
+        """Insert every alert whose id is not already stored; returns the ones added."""
+        added = []
+        with self.lock:
+            now = time.time()
+            for a in alerts:
+                alert_id = a.get("id") if isinstance(a, dict) else None
+                if not alert_id or alert_id in self._by_id:
+                    continue
+                self._insert(alert_id, a, now)
+                added.append(a)
+            if added:
+                self._evict(now)
+                self._publish()
+        return added
+
+    def update(self, alert_id: str, changes: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Apply top-level `changes` (if any) to a stored alert and bump its seq so delta readers see it.
+        Call with no changes after mutating a nested field (e.g. payload lat/lon) in place.
+        """
+        with self.lock:
+            alert = self._by_id.get(alert_id)
+            if alert is None:
+                return None
+            if changes:
+                reindex = "location" in changes or "type" in changes or "time" in changes
+                if reindex:
+                    self._unindex_all(alert_id, alert)
+                alert.update(changes)
+                if reindex:
+                    self._index(alert_id, alert, self._ingested_at[alert_id])
+            self._stamp(alert_id, alert)
+        return alert
+
+    def apply_changes(self, alerts: Iterable[Dict]) -> List[Dict]:
+        """
+        Replay changes stamped by another store: insert new ids, replace known ones, and keep each
+        change's own seq so delta cursors match the origin. Changes at or below last_seq are ignored.
+        A known alert is replaced by a new dict (lock-free readers may be iterating the old one),
+        and the snapshots are republished. Returns the stored alerts that changed.
+        """
+        applied, inserted = [], False
+        with self.lock:
+            now = time.time()
+            for a in sorted(alerts, key=lambda x: x.get("seq") or 0):
+                alert_id, seq = a.get("id"), a.get("seq")
+                if not alert_id or not isinstance(seq, int) or seq <= self._seq:
+                    continue
+                current = self._by_id.get(alert_id)
+                if current is None:
+                    self._ingested_at[alert_id] = now
+                    inserted = True
+                else:
+                    self._unindex_all(alert_id, current)
+                # keeps the id's place in ingest order
+                self._by_id[alert_id] = current = dict(a)
+                self._index(alert_id, current, self._ingested_at[alert_id])
+                self._stamp(alert_id, current, seq)
+                applied.append(current)
+            if inserted:
+                self._evict(now)
+            if applied:
+                self._publish()
+        return applied
+
+    def clear(self):
+        """Drop every alert and reset the seq (a replica rebuilding from its origin)."""
+        with self.lock:
+            self._by_id.clear()
+            self._ingested_at.clear()
+            self._by_location.clear()
+            self._by_type.clear()
+            self._views.clear()
+            self._by_bucket.clear()
+            self._bucket_of.clear()
+            self._seq = 0
+            self._seq_of.clear()
+            self._change_seqs, self._change_ids = [], []
+            for observer in self._observers:
+                observer.clear()
+            self._publish()
+
+    def add_observer(self, observer):
+        """
+        Register a derived index: observer.upsert(alert_id, alert) after every insert / change,
+        observer.remove(alert_id) when an alert leaves, observer.clear() on clear(). Calls happen
+        under the write lock. Alerts already stored are upserted now.
+        """
+        with self.lock:
+            self._observers.append(observer)
+            for alert_id, alert in self._by_id.items():
+                observer.upsert(alert_id, alert)
+
+    def remove(self, alert_id: str) -> Optional[Dict]:
+        with self.lock:
+            alert = self._drop(alert_id)
+            if alert is not None:
+                self._publish()
+        return alert
+
+    def evict_expired(self) -> int:
+        """Drop alerts past their TTL. Returns how many were removed."""
+        with self.lock:
+            before = self.evicted
+            self._evict(time.time())
+            removed = self.evicted - before
+            if removed:
+                self._publish()
+        return removed
+
+    def stats(self) -> Dict:
+        return {
+            "size": len(self._snapshot),
+            "max_alerts": self.max_alerts,
+            "ttl_seconds": self.ttl_seconds,
+            "evicted": self.evicted,
+            "last_seq": self._seq,
+            "locations": len(self._by_location),
+            "types": len(self._by_type),
+        }
+
+    # --------------------------
+    # Internals (caller holds self.lock)
+    # --------------------------
+    def _insert(self, alert_id, alert, now):
+        self._by_id[alert_id] = alert
+        self._ingested_at[alert_id] = now
+        self._index(alert_id, alert, now)
+        self._stamp(alert_id, alert)
+
+    def _index(self, alert_id, alert, now):
+        self._by_location.setdefault(alert.get("location"), {})[alert_id] = None
+        self._by_type.setdefault(alert.get("type"), {})[alert_id] = None
+        self._views.pop(("location", alert.get("location")), None)
+        self._views.pop(("type", alert.get("type")), None)
+        bucket = int(alert_timestamp(alert, now) // self.bucket_seconds)
+        self._by_bucket.setdefault(bucket, {})[alert_id] = None
+        self._bucket_of[alert_id] = bucket
+
+    def _unindex_all(self, alert_id, alert):
+        self._unindex(self._by_location, alert.get("location"), alert_id)
+        self._unindex(self._by_type, alert.get("type"), alert_id)
+        self._unindex(self._by_bucket, self._bucket_of.pop(alert_id, None), alert_id)
+        self._views.pop(("location", alert.get("location")), None)
+        self._views.pop(("type", alert.get("type")), None)
+
+    def _stamp(self, alert_id, alert, seq: Optional[int] = None):
+        self._seq = self._seq + 1 if seq is None else seq
+        alert["seq"] = self._seq
+        self._seq_of[alert_id] = self._seq
+        self._change_seqs.append(self._seq)
+        self._change_ids.append(alert_id)
+        for observer in self._observers:
+            observer.upsert(alert_id, alert)
+        # drop superseded change-log entries once they dominate
+        if len(self._change_seqs) > 2 * len(self._seq_of) + 1024:
+            live = sorted((seq, i) for i, seq in self._seq_of.items())
+            self._change_seqs = [seq for seq, _ in live]
+            self._change_ids = [i for _, i in live]
+
+    def _drop(self, alert_id):
+        alert = self._by_id.pop(alert_id, None)
+        if alert is None:
+            return None
+        self._ingested_at.pop(alert_id, None)
+        self._seq_of.pop(alert_id, None)
+        self._unindex_all(alert_id, alert)
+        for observer in self._observers:
+            observer.remove(alert_id)
+        return alert
+
+    @staticmethod
+    def _unindex(index, key, alert_id):
+        ids = index.get(key)
+        if ids is not None:
+            ids.pop(alert_id, None)
+            if not ids:
+                del index[key]
+
+    def _evict(self, now):
+        # ingest order == insertion order, so both policies only ever pop from the front
+        if self.ttl_seconds is not None:
+            cutoff = now - self.ttl_seconds
+            while self._by_id:
+                oldest = next(iter(self._by_id))
+                if self._ingested_at[oldest] > cutoff:
+                    break
+                self._drop(oldest)
+                self.evicted += 1
+        while len(self._by_id) > self.max_alerts:
+            self._drop(next(iter(self._by_id)))
+            self.evicted += 1
+
+    def _publish(self):
+        self._snapshot = tuple(self._by_id.values())
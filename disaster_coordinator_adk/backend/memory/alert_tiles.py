@@ -0,0 +1,219 @@
+# backend/memory/alert_tiles.py
+"""
+Spatial aggregation of the alert store for the map (/api/alerts/tiles).
+
+A quadtree over Web Mercator tiles (the z/x/y scheme the map's tile layer uses), zoom 0 to
+TILE_MAX_ZOOM. Every level keeps one cell per non-empty tile with:
+- count and coordinate sums (the cluster is drawn at its alerts' centroid)
+- a hazard-type histogram
+- a histogram of risk in hundredths, so max risk stays exact when alerts leave the cell
+
+The index is kept in step with the AlertStore it observes (AlertStore.add_observer): each insert,
+change or eviction moves one alert between cells on every level, so a map request only reads the
+cells in its viewport instead of regrouping the whole store. Alerts without coordinates are
+counted but not placed until they are geocoded.
+
+query(bbox, zoom) answers at level zoom + TILE_CELL_SHIFT (cells of 256 / 2**shift px on screen).
+At TILE_MAX_ZOOM, cells of at most TILE_POINTS_MAX alerts come back as individual points instead.
+"""
+import math
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+TILE_MAX_ZOOM = int(os.getenv("TILE_MAX_ZOOM", "10"))
+TILE_CELL_SHIFT = int(os.getenv("TILE_CELL_SHIFT", "2"))
+TILE_POINTS_MAX = int(os.getenv("TILE_POINTS_MAX", "8"))
+
+MAX_MERCATOR_LAT = 85.05112878
+
+
+def tile_xy(lat: float, lon: float, zoom: int) -> Tuple[int, int]:
+    """Web Mercator tile (x, y) containing lat/lon at `zoom`."""
+    n = 1 << zoom
+    lat = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))
+    x = (lon + 180.0) / 360.0 * n
+    rad = math.radians(lat)
+    y = (1.0 - math.log(math.tan(rad) + 1.0 / math.cos(rad)) / math.pi) / 2.0 * n
+    return min(max(int(x), 0), n - 1), min(max(int(y), 0), n - 1)
+
+
+def _coords(alert: Dict) -> Optional[Tuple[float, float]]:
+    payload = alert.get("payload") or {}
+    try:
+        lat, lon = float(payload.get("lat")), float(payload.get("lon"))
+    except (TypeError, ValueError):
+        return None
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0) or (lat == 0.0 and lon == 0.0):
+        return None
+    return lat, lon
+
+
+def _risk_bin(alert: Dict) -> int:
+    risk = alert.get("risk")
+    if risk is None:
+        risk = alert.get("confidence", 0.0)
+    try:
+        return max(0, min(100, int(round(float(risk) * 100))))
+    except (TypeError, ValueError):
+        return 0
+
+
+class _Cell:
+    __slots__ = ("count", "lat_sum", "lon_sum", "types", "risks", "ids")
+
+    def __init__(self, leaf: bool):
+        self.count = 0
+        self.lat_sum = 0.0
+        self.lon_sum = 0.0
+        self.types: Dict[str, int] = {}
+        self.risks: Dict[int, int] = {}
+        self.ids: Optional[Dict[str, None]] = {} if leaf else None
+
+
+def _bump(counts: Dict, key, delta: int):
+    n = counts.get(key, 0) + delta
+    if n:
+        counts[key] = n
+    else:
+        del counts[key]
+
+
+class TileIndex:
+    def __init__(self, max_zoom: int = TILE_MAX_ZOOM, cell_shift: int = TILE_CELL_SHIFT,
+                 points_max: int = TILE_POINTS_MAX):
+        self.max_zoom = max(0, min(int(max_zoom), 24))
+        self.cell_shift = max(0, int(cell_shift))
+        self.points_max = max(0, int(points_max))
+        self._lock = threading.Lock()
+        self._levels: List[Dict[Tuple[int, int], _Cell]] = [{} for _ in range(self.max_zoom + 1)]
+        # alert_id -> (leaf x, leaf y, lat, lon, type, risk bin) of its current contribution
+        self._placed: Dict[str, tuple] = {}
+        self._unplaced: Dict[str, None] = {}
+        self.version = 0
+        self.moves = 0
+
+    # --------------------------
+    # Store observer interface (called under the store's write lock)
+    # --------------------------
+    def upsert(self, alert_id: str, alert: Dict):
+        coords = _coords(alert)
+        with self._lock:
+            old = self._placed.get(alert_id)
+            if coords is None:
+                if old is not None:
+                    self._apply(alert_id, old, -1)
+                    del self._placed[alert_id]
+                    self.version += 1
+                self._unplaced[alert_id] = None
+                return
+            lat, lon = coords
+            x, y = tile_xy(lat, lon, self.max_zoom)
+            new = (x, y, lat, lon, alert.get("type") or "unknown", _risk_bin(alert))
+            self._unplaced.pop(alert_id, None)
+            if new == old:
+                return
+            if old is not None:
+                self._apply(alert_id, old, -1)
+                self.moves += 1
+            self._apply(alert_id, new, 1)
+            self._placed[alert_id] = new
+            self.version += 1
+
+    def remove(self, alert_id: str):
+        with self._lock:
+            self._unplaced.pop(alert_id, None)
+            old = self._placed.pop(alert_id, None)
+            if old is not None:
+                self._apply(alert_id, old, -1)
+                self.version += 1
+
+    def clear(self):
+        with self._lock:
+            self._levels = [{} for _ in range(self.max_zoom + 1)]
+            self._placed.clear()
+            self._unplaced.clear()
+            self.version += 1
+
+    def _apply(self, alert_id: str, placement: tuple, delta: int):
+        x, y, lat, lon, hazard, risk = placement
+        for zoom in range(self.max_zoom, -1, -1):
+            shift = self.max_zoom - zoom
+            key = (x >> shift, y >> shift)
+            cells = self._levels[zoom]
+            cell = cells.get(key)
+            if cell is None:
+                cell = cells[key] = _Cell(leaf=shift == 0)
+            cell.count += delta
+            if cell.count <= 0:
+                del cells[key]
+                continue
+            cell.lat_sum += delta * lat
+            cell.lon_sum += delta * lon
+            _bump(cell.types, hazard, delta)
+            _bump(cell.risks, risk, delta)
+            if cell.ids is not None:
+                if delta > 0:
+                    cell.ids[alert_id] = None
+                else:
+                    cell.ids.pop(alert_id, None)
+
+    # --------------------------
+    # Reads
+    # --------------------------
+    def level_for(self, zoom: float) -> int:
+        return max(0, min(int(zoom) + self.cell_shift, self.max_zoom))
+
+    def query(self, zoom: float, bbox: Optional[Tuple[float, float, float, float]] = None) -> Dict:
+        """
+        Clusters (and, at the leaf level, points) inside bbox = (min_lon, min_lat, max_lon, max_lat)
+        for a map at `zoom`; the whole world without bbox.
+        """
+        level = self.level_for(zoom)
+        n = 1 << level
+        if bbox is None:
+            x0, y0, x1, y1 = 0, 0, n - 1, n - 1
+        else:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            min_lon, max_lon = max(min_lon, -180.0), min(max_lon, 180.0)
+            x0, y0 = tile_xy(max_lat, min_lon, level)
+            x1, y1 = tile_xy(min_lat, max_lon, level)
+        leaf = level == self.max_zoom
+        cells_out, points, total = [], [], 0
+        with self._lock:
+            cells = self._levels[level]
+            if (x1 - x0 + 1) * (y1 - y0 + 1) <= len(cells):
+                found = ((k, cells.get(k)) for k in ((x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)))
+                found = [(k, c) for k, c in found if c is not None]
+            else:
+                found = [(k, c) for k, c in cells.items() if x0 <= k[0] <= x1 and y0 <= k[1] <= y1]
+            for (x, y), cell in found:
+                total += cell.count
+                if leaf and cell.count <= self.points_max:
+                    for alert_id in cell.ids:
+                        _, _, lat, lon, hazard, risk = self._placed[alert_id]
+                        points.append({"id": alert_id, "lat": lat, "lon": lon, "type": hazard, "risk": risk / 100.0})
+                    continue
+                cells_out.append({
+                    "z": level, "x": x, "y": y,
+                    "count": cell.count,
+                    "lat": round(cell.lat_sum / cell.count, 5),
+                    "lon": round(cell.lon_sum / cell.count, 5),
+                    "max_risk": max(cell.risks) / 100.0,
+                    "types": dict(cell.types),
+                })
+            version, unplaced = self.version, len(self._unplaced)
+        return {"zoom": zoom, "level": level, "version": version, "total": total, "unplaced": unplaced,
+                "cells": cells_out, "points": points}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "max_zoom": self.max_zoom,
+                "cell_shift": self.cell_shift,
+                "placed": len(self._placed),
+                "unplaced": len(self._unplaced),
+                "cells": sum(len(cells) for cells in self._levels),
+                "version": self.version,
+                "moves": self.moves,
+            }
@@ -0,0 +1,166 @@
+# backend/memory/event_hub.py
+"""
+In-process fan-out of alert / log deltas to streaming clients (Server-Sent Events).
+
+- publish() may be called from any thread; each event gets a monotonic cursor and is
+  JSON-encoded exactly once, then shared by every subscriber
+- a bounded ring buffer of recent events lets a client resume from its last cursor
+- every subscriber has a bounded queue; a client that can't keep up is marked lagging,
+  stops receiving pushes, and catches up from the ring buffer (or gets a "reset" event
+  telling it to refetch a snapshot) once it drains
+- with several workers the cursor comes from the shared journal (publish(..., seq=...)), so it
+  is the same on every worker; seqs then have gaps (records that are not stream events)
+"""
+import asyncio
+import bisect
+import json
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class StreamEvent:
+    __slots__ = ("seq", "kind", "data")
+
+    def __init__(self, seq: int, kind: str, data: str):
+        self.seq = seq
+        self.kind = kind
+        self.data = data    # pre-encoded JSON
+
+    def sse(self) -> str:
+        return f"id: {self.seq}\nevent: {self.kind}\ndata: {self.data}\n\n"
+
+
+class Subscriber:
+    def __init__(self, hub: "EventHub", loop: asyncio.AbstractEventLoop, cursor: int, maxsize: int):
+        self.hub = hub
+        self.loop = loop
+        self.cursor = cursor            # last seq handed to this client
+        self.queue: "asyncio.Queue[StreamEvent]" = asyncio.Queue(maxsize=maxsize)
+        self.lagging = False
+        self.dropped = 0
+
+    def offer(self, event: StreamEvent):
+        # runs on the subscriber's event loop
+        if self.lagging:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lagging = True
+            self.dropped += 1
+
+    async def next_batch(self, timeout: float, max_events: int = 500) -> List[StreamEvent]:
+        """Events after self.cursor (possibly a single "reset"), or [] on timeout."""
+        if self.lagging:
+            return self._catch_up(max_events)
+        try:
+            first = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        while len(batch) < max_events and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        batch = [e for e in batch if e.seq > self.cursor]
+        if batch:
+            self.cursor = batch[-1].seq
+        return batch
+
+    def _catch_up(self, max_events):
+        # drop whatever is queued and replay from the ring buffer instead; pushes that arrive
+        # meanwhile are only delivered once we yield, and duplicates are filtered by seq
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        events = self.hub.since(self.cursor, limit=max_events)
+        if events is None:
+            self.lagging = False
+            self.cursor = self.hub.last_seq
+            return [StreamEvent(self.cursor, "reset", json.dumps({"cursor": self.cursor}))]
+        # a full page means there may be more to replay
+        self.lagging = len(events) >= max_events
+        if events:
+            self.cursor = events[-1].seq
+        return events
+
+
+class EventHub:
+    def __init__(self, buffer_size: int = 5000, client_queue_size: int = 1000):
+        self.client_queue_size = client_queue_size
+        self._lock = threading.Lock()
+        self._buffer: "deque[StreamEvent]" = deque(maxlen=buffer_size)
+        self._seq = 0
+        self._floor = 0     # events at or below this seq are no longer buffered
+        self._subscribers: List[Subscriber] = []
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def publish(self, kind: str, data: Dict, seq: Optional[int] = None) -> int:
+        return self.publish_encoded(kind, json.dumps(data, default=str), seq)
+
+    def publish_encoded(self, kind: str, encoded: str, seq: Optional[int] = None) -> int:
+        """Publish pre-encoded JSON; `seq` (increasing) numbers the event instead of the hub's counter."""
+        with self._lock:
+            if seq is None:
+                seq = self._seq + 1
+            elif seq <= self._seq:
+                return self._seq    # already delivered
+            elif self._seq == 0:
+                # first event taken from a journal that starts later: older cursors can't resume
+                self._floor = seq - 1
+            self._seq = seq
+            event = StreamEvent(seq, kind, encoded)
+            if len(self._buffer) == self._buffer.maxlen:
+                self._floor = self._buffer[0].seq
+            self._buffer.append(event)
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, event)
+            except RuntimeError:
+                # subscriber's loop has closed; it will be removed on unsubscribe
+                pass
+        return event.seq
+
+    def since(self, cursor: int, limit: Optional[int] = None) -> Optional[List[StreamEvent]]:
+        """
+        Buffered events with seq > cursor, or None if the cursor has already fallen out of the buffer.
+        """
+        with self._lock:
+            if cursor >= self._seq:
+                return []
+            if cursor < self._floor:
+                return None
+            start = bisect.bisect_right(self._buffer, cursor, key=lambda e: e.seq)
+            end = len(self._buffer) if limit is None else min(len(self._buffer), start + limit)
+            return [self._buffer[i] for i in range(start, end)]
+
+    def subscribe(self, cursor: Optional[int] = None) -> Subscriber:
+        """Register a subscriber on the running event loop. cursor=None starts from now."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            start = self._seq if cursor is None else cursor
+            if start > self._seq:
+                # cursor from a previous process: force a reset
+                start = -1
+            sub = Subscriber(self, loop, start, self.client_queue_size)
+            # anything between the cursor and now is replayed through the catch-up path
+            sub.lagging = start < self._seq
+            self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "last_seq": self._seq,
+                "floor": self._floor,
+                "buffered": len(self._buffer),
+                "subscribers": len(self._subscribers),
+                "lagging": sum(1 for s in self._subscribers if s.lagging),
+            }
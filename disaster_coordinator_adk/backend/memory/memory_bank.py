@@ -1,19 +1,269 @@
 # backend/memory/memory_bank.py
-from typing import List, Dict
+"""
+MemoryBank: incidents, plans and logs for the coordinator.
+
+Reads are served from a bounded in-memory hot tier (indexed by id, location and time).
+When a durable storage backend is configured (e.g. SQLiteStorage), writes are queued and
+persisted by a background writer in batches (write-behind), so write_incident / write_plan /
+log never wait on disk. The writer also runs periodic compaction (retention) on the backend.
+
+Every stored record is a shallow copy stamped with a monotonic "seq" (shared across kinds),
+which clients use as a cursor for delta reads (since()).
+
+With several workers (attach_journal), records are numbered by the shared journal
+(memory/shared_state.py) and applied in journal order on every worker, so all workers hold the
+same records under the same seqs; each worker persists only the records it wrote.
+"""
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from memory.storage import InMemoryStorage, SQLiteStorage
+from tools.tracing import traced
+
+logger = logging.getLogger("disaster-backend.memory")
+
 
 class MemoryBank:
-    def __init__(self):
-        self.incidents: List[Dict] = []
-        self.plans: List[Dict] = []
-        self.logs: List[Dict] = []
+    def __init__(self, storage=None, hot_max_records: Optional[Dict[str, int]] = None,
+                 flush_interval: float = 0.5, batch_size: int = 500, queue_max: int = 50000,
+                 compact_interval: float = 300.0):
+        self.hot = InMemoryStorage(max_records=hot_max_records)
+        self.storage = storage
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.compact_interval = compact_interval
+        self.dropped = 0
+        self.flushed = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_max)
+        self._stop = threading.Event()
+        self._writer = None
+        self._listeners = []
+        self._seq = itertools.count(1)
+        self._write_lock = threading.Lock()   # seq order == hot-tier order == queue order
+        self.last_seq = 0
+        self.journal = None
+        if storage is not None:
+            self._warm_from_storage()
+            self._writer = threading.Thread(target=self._write_loop, name="memory-writer", daemon=True)
+            self._writer.start()
 
+    # --------------------------
+    # Writes (never block on the durable backend)
+    # --------------------------
+    @traced("memory.write_incident")
     def write_incident(self, inc: Dict):
-        self.incidents.append(inc)
-        self.logs.append({"type":"incident", "id": inc.get("id")})
+        self._write("incident", inc)
+        self._write("log", {"type": "incident", "id": inc.get("id")})
 
+    @traced("memory.write_plan")
     def write_plan(self, plan: Dict):
-        self.plans.append(plan)
-        self.logs.append({"type":"plan", "id": plan.get("event_id")})
+        self._write("plan", plan)
+        self._write("log", {"type": "plan", "id": plan.get("event_id")})
+
+    @traced("memory.log")
+    def log(self, evt: Dict):
+        self._write("log", evt)
+
+    def add_listener(self, fn):
+        """Call fn(kind, record) after every write (e.g. to stream log entries to clients)."""
+        self._listeners.append(fn)
+
+    def attach_journal(self, journal):
+        """
+        Number and apply records through a shared journal from now on. The hot tier is rebuilt
+        from the journal (records warmed from local storage carry this worker's old seqs).
+        """
+        with self._write_lock:
+            self.hot = InMemoryStorage(max_records=self.hot.max_records)
+            self.last_seq = 0
+            self.journal = journal
+        journal.subscribe(("incident", "plan", "log"), self._apply_journal)
+
+    def _write(self, kind, record):
+        if self.journal is not None:
+            # numbered by the journal and applied (here and on every worker) in its order
+            self.journal.append(kind, record)
+            return
+        # snapshot the record so later in-place edits by the caller (e.g. live alerts) don't leak in
+        record = dict(record)
+        # the hot tier's since() bisects on seq, so seqs must land there in allocation order
+        with self._write_lock:
+            recorded_at = time.time()
+            record["seq"] = next(self._seq)
+            self._store(kind, recorded_at, record, persist=True)
+        self._notify(kind, record)
+
+    def _apply_journal(self, kind, seq, recorded_at, data, own):
+        record = json.loads(data)
+        record["seq"] = seq
+        with self._write_lock:
+            if seq <= self.last_seq:
+                return
+            self._store(kind, recorded_at, record, persist=own)
+        self._notify(kind, record)
+
+    def _store(self, kind, recorded_at, record, persist):
+        # caller holds self._write_lock
+        self.hot.write_batch([(kind, recorded_at, record)])
+        self.last_seq = record["seq"]
+        if persist and self.storage is not None:
+            try:
+                self._queue.put_nowait((kind, recorded_at, record))
+            except queue.Full:
+                # the hot tier still has it; only durability is lost
+                self.dropped += 1
+
+    def _notify(self, kind, record):
+        for fn in self._listeners:
+            try:
+                fn(kind, record)
+            except Exception:
+                logger.exception("MemoryBank listener failed")
+
+    # --------------------------
+    # Reads
+    # --------------------------
+    @property
+    def incidents(self) -> List[Dict]:
+        return self.hot.recent("incident")
+
+    @property
+    def plans(self) -> List[Dict]:
+        return self.hot.recent("plan")
+
+    @property
+    def logs(self) -> List[Dict]:
+        return self.hot.recent("log")
+
+    def recent(self, kind: str, limit: Optional[int] = None) -> List[Dict]:
+        return self.hot.recent(kind, limit)
+
+    def since(self, kind: str, cursor: int, limit: Optional[int] = None) -> List[Dict]:
+        """Records of `kind` with seq > cursor, oldest first (hot tier)."""
+        return self.hot.since(kind, cursor, limit)
+
+    def cursor_expired(self, kind: str, cursor: int) -> bool:
+        """True if records after `cursor` have already been evicted from the hot tier."""
+        return cursor < self.hot.evicted_seq(kind)
+
+    def get_incident(self, incident_id: str) -> Optional[Dict]:
+        return self._get("incident", incident_id)
+
+    def get_plan(self, event_id: str) -> Optional[Dict]:
+        return self._get("plan", event_id)
+
+    def query_by_location(self, location: str, limit: Optional[int] = None, durable: bool = False):
+        """Incidents at `location`, oldest first. durable=True also searches records evicted from the hot tier."""
+        if durable and self.storage is not None:
+            self.flush()
+            return self.storage.by_location("incident", location, limit)
+        return self.hot.by_location("incident", location, limit)
+
+    def query_time_range(self, kind: str, start: float, end: Optional[float] = None, durable: bool = False):
+        """Records of `kind` written between `start` and `end` (epoch seconds)."""
+        if durable and self.storage is not None:
+            self.flush()
+            return self.storage.time_range(kind, start, end)
+        return self.hot.time_range(kind, start, end)
+
+    def _get(self, kind, rid):
+        found = self.hot.get(kind, rid)
+        if found is None and self.storage is not None:
+            found = self.storage.get(kind, rid)
+        return found
+
+    def stats(self) -> Dict:
+        return {
+            "backend": type(self.storage).__name__ if self.storage is not None else "memory",
+            "hot": {k: self.hot.count(k) for k in ("incident", "plan", "log")},
+            "queue_depth": self._queue.qsize(),
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+        }
+
+    # --------------------------
+    # Write-behind
+    # --------------------------
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is persisted. Returns False on timeout."""
+        if self.storage is None:
+            return True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self):
+        if self._writer is None:
+            return
+        self._stop.set()
+        self._writer.join(timeout=5.0)
+        self._writer = None
+        self.storage.close()
+
+    def _write_loop(self):
+        last_compact = time.monotonic()
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if batch:
+                try:
+                    self.storage.write_batch(batch)
+                    self.flushed += len(batch)
+                except Exception:
+                    logger.exception("MemoryBank write-behind batch failed (%d records)", len(batch))
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+            if time.monotonic() - last_compact >= self.compact_interval:
+                last_compact = time.monotonic()
+                try:
+                    self.storage.compact()
+                except Exception:
+                    logger.exception("MemoryBank compaction failed")
+
+    def _reseq(self, record):
+        # records persisted before seqs existed get fresh ones
+        if not isinstance(record.get("seq"), int):
+            record["seq"] = self.last_seq + 1
+        self.last_seq = max(self.last_seq, record["seq"])
+        return record
+
+    def _warm_from_storage(self):
+        """Reload the most recent records into the hot tier after a restart."""
+        try:
+            for kind, limit in self.hot.max_records.items():
+                entries = self.storage.recent_entries(kind, limit)
+                self.hot.write_batch((kind, recorded_at, self._reseq(r)) for recorded_at, r in entries)
+            # continue numbering after the restored records
+            self._seq = itertools.count(self.last_seq + 1)
+        except Exception:
+            logger.exception("MemoryBank warm-up from storage failed")
+
 
-    def query_by_location(self, location: str):
-        return [i for i in self.incidents if i.get("location") == location]
+def memory_bank_from_env() -> MemoryBank:
+    """
+    MEMORY_BACKEND=memory (default) keeps everything in-process;
+    MEMORY_BACKEND=sqlite persists to MEMORY_DB_PATH with write-behind batching.
+    MEMORY_MAX_AGE_SECONDS bounds how long durable records are retained.
+    """
+    backend = os.getenv("MEMORY_BACKEND", "memory").lower()
+    if backend == "sqlite":
+        default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "memory.sqlite")
+        path = os.getenv("MEMORY_DB_PATH", os.path.normpath(default_path))
+        max_age = float(os.getenv("MEMORY_MAX_AGE_SECONDS", "0")) or None
+        return MemoryBank(storage=SQLiteStorage(path, max_age_seconds=max_age))
+    return MemoryBank()
@@ -0,0 +1,612 @@
+# backend/memory/shared_state.py
+"""
+Shared state for running several uvicorn workers against one alert feed (SHARED_STATE=sqlite).
+
+Every worker keeps serving reads from its own in-process AlertStore (lock-free snapshots, no
+cross-process round trip per request); what the workers share is:
+
+- the producer role: one worker holds the "producer" lease (PRODUCER_LEASE_SECONDS, renewed every
+  third of that) and is the only one running the ingest scheduler, dedup, risk refinement and
+  auto-planning. When it dies or stalls, the lease lapses and another worker takes over
+- the alert change log: the leader publishes every change its store stamped (AlertStore.since,
+  so changes go out complete and in seq order) every SHARED_SYNC_INTERVAL; followers replay rows
+  past their cursor with AlertStore.apply_changes, keeping the leader's seq, so since= cursors
+  and ETags mean the same thing on every worker
+- finished plans, written through by whichever worker computed them, plus short per-plan
+  leases so two workers asked for the same plan compute it once (agents/plan_manager.py). The
+  shared copy is authoritative, so invalidating a plan on one worker drops it on all of them
+- a journal (SharedJournal): one globally numbered log of MemoryBank records (incidents, plans,
+  logs) and stream events, whichever worker wrote them. Every worker applies it in order to its
+  MemoryBank hot tier and EventHub, so /api/incidents, /api/logs and /api/stream cursors mean the
+  same thing on every worker
+- small named state rows updated in one transaction across workers (transaction()), e.g. the
+  volunteer pool's reservations, so every worker draws on the same capacity
+
+Backends implement one small interface (leases, alert log, plans, journal, state rows):
+- LocalSharedState: in-process stand-in, the default; a single worker shares nothing
+- SQLiteSharedState: one SQLite file in WAL mode (SHARED_STATE_DB), for workers on one host
+A network broker (Redis, etcd, ...) would implement the same methods.
+
+Followers never write to their AlertStore except through replication; alert reads are eventually
+consistent within about two sync intervals.
+"""
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("disaster-backend.shared")
+
+SHARED_STATE = os.getenv("SHARED_STATE", "local").lower()
+PRODUCER_LEASE_SECONDS = float(os.getenv("PRODUCER_LEASE_SECONDS", "10"))
+SHARED_SYNC_INTERVAL = float(os.getenv("SHARED_SYNC_INTERVAL", "0.25"))
+SHARED_SYNC_BATCH = int(os.getenv("SHARED_SYNC_BATCH", "5000"))
+SHARED_JOURNAL_MAX = int(os.getenv("SHARED_JOURNAL_MAX", "50000"))
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+PRODUCER_LEASE = "producer"
+
+
+def _dumps(record: Dict) -> str:
+    return json.dumps(record, default=str)
+
+
+class StateRow:
+    """A named state row inside a transaction(): read `data`, set() a new JSON string to store it."""
+
+    def __init__(self, version: int, data: Optional[str]):
+        self.version = version
+        self.data = data
+        self.changed = False
+
+    def set(self, data: str):
+        if data != self.data:
+            self.data = data
+            self.version += 1
+            self.changed = True
+
+
+# --------------------------
+# Backends
+# --------------------------
+class LocalSharedState:
+    """In-process implementation of the shared-state interface."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._leases: Dict[str, tuple] = {}     # name -> (owner, expires_at)
+        self._alerts: Dict[str, tuple] = {}     # id -> (seq, json)
+        self._plans: Dict[str, Dict] = {}
+        self._journal: List[tuple] = []         # (seq, kind, recorded_at, origin, json)
+        self._journal_seq = 0
+        self._states: Dict[str, tuple] = {}     # name -> (version, json)
+
+    def acquire_lease(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        with self._lock:
+            holder = self._leases.get(name)
+            if holder is None or holder[0] == owner or holder[1] < now:
+                self._leases[name] = (owner, now + ttl_seconds)
+                return True
+            return False
+
+    def release_lease(self, name: str, owner: str):
+        with self._lock:
+            if self._leases.get(name, (None,))[0] == owner:
+                del self._leases[name]
+
+    def lease_holder(self, name: str) -> Optional[str]:
+        with self._lock:
+            holder = self._leases.get(name)
+            return holder[0] if holder and holder[1] >= time.time() else None
+
+    def publish_alerts(self, alerts: List[Dict], owner: Optional[str] = None) -> bool:
+        rows = [(a["id"], a["seq"], _dumps(a)) for a in alerts]
+        with self._lock:
+            if owner is not None and self._leases.get(PRODUCER_LEASE, (None,))[0] != owner:
+                return False
+            for alert_id, seq, data in rows:
+                self._alerts[alert_id] = (seq, data)
+        return True
+
+    def alerts_since(self, cursor: int, limit: int = SHARED_SYNC_BATCH) -> List[Dict]:
+        with self._lock:
+            rows = sorted(v for v in self._alerts.values() if v[0] > cursor)[:limit]
+        return [json.loads(data) for _, data in rows]
+
+    def get_alert(self, alert_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._alerts.get(alert_id)
+        return json.loads(row[1]) if row else None
+
+    def put_plan(self, alert_id: str, entry: Dict):
+        data = _dumps(entry)
+        with self._lock:
+            self._plans[alert_id] = (entry.get("computed_at", time.time()), data)
+
+    def get_plan(self, alert_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._plans.get(alert_id)
+        return json.loads(row[1]) if row else None
+
+    def delete_plan(self, alert_id: str):
+        with self._lock:
+            self._plans.pop(alert_id, None)
+
+    def append_events(self, rows: Iterable[Tuple[str, float, str]], origin: str) -> List[int]:
+        seqs = []
+        with self._lock:
+            for kind, recorded_at, data in rows:
+                self._journal_seq += 1
+                self._journal.append((self._journal_seq, kind, recorded_at, origin, data))
+                seqs.append(self._journal_seq)
+        return seqs
+
+    def events_since(self, cursor: int, limit: int = SHARED_SYNC_BATCH) -> List[tuple]:
+        with self._lock:
+            journal = self._journal
+            lo, hi = 0, len(journal)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if journal[mid][0] <= cursor:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            return journal[lo:lo + limit]
+
+    @contextmanager
+    def transaction(self, name: str):
+        with self._lock:
+            version, data = self._states.get(name, (0, None))
+            row = StateRow(version, data)
+            yield row
+            if row.changed:
+                self._states[name] = (row.version, row.data)
+
+    def read_state(self, name: str) -> Tuple[int, Optional[str]]:
+        with self._lock:
+            return self._states.get(name, (0, None))
+
+    def prune(self, max_alerts: int, plan_max_age: Optional[float] = None,
+              journal_max: int = SHARED_JOURNAL_MAX):
+        with self._lock:
+            if len(self._alerts) > max_alerts:
+                keep = sorted(self._alerts.items(), key=lambda kv: kv[1][0])[-max_alerts:]
+                self._alerts = dict(keep)
+            if plan_max_age:
+                cutoff = time.time() - plan_max_age
+                self._plans = {k: v for k, v in self._plans.items() if v[0] >= cutoff}
+            if len(self._journal) > journal_max:
+                self._journal = self._journal[-journal_max:]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"backend": "local", "alerts": len(self._alerts), "plans": len(self._plans),
+                    "journal": len(self._journal), "journal_seq": self._journal_seq}
+
+    def close(self):
+        pass
+
+
+class SQLiteSharedState:
+    """Shared-state interface over one SQLite database in WAL mode (safe across processes)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # autocommit; multi-statement writes use explicit BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS alerts (
+                id TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_alerts_seq ON alerts(seq);
+            CREATE TABLE IF NOT EXISTS plans (
+                alert_id TEXT PRIMARY KEY,
+                computed_at REAL NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS journal (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                recorded_at REAL NOT NULL,
+                origin TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS state (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                data TEXT NOT NULL
+            );
+            """
+        )
+
+    def acquire_lease(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at < ?",
+                (name, owner, now + ttl_seconds, now),
+            )
+            return cur.rowcount == 1
+
+    def release_lease(self, name: str, owner: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+    def lease_holder(self, name: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT owner FROM leases WHERE name = ? AND expires_at >= ?",
+                                     (name, time.time())).fetchone()
+        return row[0] if row else None
+
+    def publish_alerts(self, alerts: List[Dict], owner: Optional[str] = None) -> bool:
+        """Upsert alerts; with `owner`, only while that owner still holds the producer lease."""
+        rows = [(a["id"], a["seq"], _dumps(a)) for a in alerts]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if owner is not None:
+                    row = self._conn.execute("SELECT owner FROM leases WHERE name = ?", (PRODUCER_LEASE,)).fetchone()
+                    if row is None or row[0] != owner:
+                        self._conn.execute("ROLLBACK")
+                        return False
+                self._conn.executemany(
+                    "INSERT INTO alerts (id, seq, data) VALUES (?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET seq = excluded.seq, data = excluded.data "
+                    "WHERE excluded.seq > alerts.seq",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def alerts_since(self, cursor: int, limit: int = SHARED_SYNC_BATCH) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM alerts WHERE seq > ? ORDER BY seq LIMIT ?",
+                                      (int(cursor), int(limit))).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def get_alert(self, alert_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM alerts WHERE id = ?", (alert_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_plan(self, alert_id: str, entry: Dict):
+        data = _dumps(entry)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO plans (alert_id, computed_at, data) VALUES (?, ?, ?) "
+                "ON CONFLICT(alert_id) DO UPDATE SET computed_at = excluded.computed_at, data = excluded.data",
+                (alert_id, entry.get("computed_at", time.time()), data),
+            )
+
+    def get_plan(self, alert_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM plans WHERE alert_id = ?", (alert_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete_plan(self, alert_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM plans WHERE alert_id = ?", (alert_id,))
+
+    def append_events(self, rows: Iterable[Tuple[str, float, str]], origin: str) -> List[int]:
+        """Append journal rows in one transaction; returns the seqs the database gave them."""
+        seqs = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for kind, recorded_at, data in rows:
+                    cur = self._conn.execute(
+                        "INSERT INTO journal (kind, recorded_at, origin, data) VALUES (?, ?, ?, ?)",
+                        (kind, recorded_at, origin, data),
+                    )
+                    seqs.append(cur.lastrowid)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return seqs
+
+    def events_since(self, cursor: int, limit: int = SHARED_SYNC_BATCH) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT seq, kind, recorded_at, origin, data FROM journal WHERE seq > ? ORDER BY seq LIMIT ?",
+                (int(cursor), int(limit)),
+            ).fetchall()
+
+    @contextmanager
+    def transaction(self, name: str):
+        """Read-modify-write of one state row, serialized across processes (BEGIN IMMEDIATE)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                found = self._conn.execute("SELECT version, data FROM state WHERE name = ?", (name,)).fetchone()
+                row = StateRow(*(found or (0, None)))
+                yield row
+                if row.changed:
+                    self._conn.execute(
+                        "INSERT INTO state (name, version, data) VALUES (?, ?, ?) "
+                        "ON CONFLICT(name) DO UPDATE SET version = excluded.version, data = excluded.data",
+                        (name, row.version, row.data),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def read_state(self, name: str) -> Tuple[int, Optional[str]]:
+        with self._lock:
+            found = self._conn.execute("SELECT version, data FROM state WHERE name = ?", (name,)).fetchone()
+        return tuple(found) if found else (0, None)
+
+    def prune(self, max_alerts: int, plan_max_age: Optional[float] = None,
+              journal_max: int = SHARED_JOURNAL_MAX):
+        """
+        Keep the `max_alerts` most recently changed alerts and the newest `journal_max` journal rows,
+        and drop plans older than plan_max_age.
+        """
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM alerts WHERE seq <= (SELECT seq FROM alerts ORDER BY seq DESC LIMIT 1 OFFSET ?)",
+                (int(max_alerts),),
+            )
+            self._conn.execute(
+                "DELETE FROM journal WHERE seq <= (SELECT seq FROM journal ORDER BY seq DESC LIMIT 1 OFFSET ?)",
+                (int(journal_max),),
+            )
+            if plan_max_age:
+                self._conn.execute("DELETE FROM plans WHERE computed_at < ?", (time.time() - plan_max_age,))
+            self._conn.execute("DELETE FROM leases WHERE expires_at < ?", (time.time() - 60.0,))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            alerts = self._conn.execute("SELECT COUNT(*), COALESCE(MAX(seq), 0) FROM alerts").fetchone()
+            plans = self._conn.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+            journal = self._conn.execute("SELECT COUNT(*), COALESCE(MAX(seq), 0) FROM journal").fetchone()
+        return {"backend": "sqlite", "path": self.path, "alerts": alerts[0], "max_seq": alerts[1], "plans": plans,
+                "journal": journal[0], "journal_seq": journal[1]}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def shared_state_from_env():
+    """SHARED_STATE=local (default) or sqlite (SHARED_STATE_DB, default data/shared_state.sqlite)."""
+    if SHARED_STATE == "sqlite":
+        default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "shared_state.sqlite")
+        return SQLiteSharedState(os.getenv("SHARED_STATE_DB", os.path.normpath(default_path)))
+    return LocalSharedState()
+
+
+# --------------------------
+# Journal of MemoryBank records and stream events
+# --------------------------
+class SharedJournal:
+    """
+    The workers' common log of records and events. append() has the backend number the rows and
+    then pumps; pump() (also run by StateSync every tick) hands every row past this worker's
+    cursor, in seq order, to the consumer registered for its kind:
+        fn(kind, seq, recorded_at, data_json, own)   # own: written by this worker
+    """
+
+    def __init__(self, backend, worker_id: str = WORKER_ID):
+        self.backend = backend
+        self.worker_id = worker_id
+        self.cursor = 0
+        self.appended = 0
+        self.applied = 0
+        self._lock = threading.Lock()   # one pump at a time: consumers see rows in order
+        self._consumers: Dict[str, Callable] = {}
+
+    def subscribe(self, kinds: Iterable[str], fn: Callable):
+        for kind in kinds:
+            self._consumers[kind] = fn
+
+    def append(self, kind: str, record: Dict, recorded_at: Optional[float] = None) -> int:
+        return self.append_many(kind, [record], recorded_at)[0]
+
+    def append_many(self, kind: str, records: Iterable[Dict], recorded_at: Optional[float] = None) -> List[int]:
+        """Append records of one kind; they are applied locally before this returns."""
+        recorded_at = time.time() if recorded_at is None else recorded_at
+        seqs = self.backend.append_events([(kind, recorded_at, _dumps(r)) for r in records], self.worker_id)
+        self.appended += len(seqs)
+        self.pump()
+        return seqs
+
+    def pump(self) -> int:
+        """Apply every row past the local cursor; returns how many were read."""
+        total = 0
+        with self._lock:
+            while True:
+                rows = self.backend.events_since(self.cursor, SHARED_SYNC_BATCH)
+                for seq, kind, recorded_at, origin, data in rows:
+                    fn = self._consumers.get(kind)
+                    if fn is not None:
+                        try:
+                            fn(kind, seq, recorded_at, data, origin == self.worker_id)
+                        except Exception:
+                            logger.exception("journal consumer failed for %s #%d", kind, seq)
+                    self.cursor = seq
+                total += len(rows)
+                if len(rows) < SHARED_SYNC_BATCH:
+                    break
+            self.applied += total
+        return total
+
+    def stats(self) -> Dict:
+        return {"cursor": self.cursor, "appended": self.appended, "applied": self.applied}
+
+
+# --------------------------
+# Per-worker replication
+# --------------------------
+class StateSync:
+    """
+    Runs in every worker when state is shared: renews / contends for the producer lease, and either
+    publishes the local store's changes (leader) or replays the shared log into it (follower).
+    """
+
+    def __init__(self, backend, store, worker_id: str = WORKER_ID,
+                 lease_seconds: float = PRODUCER_LEASE_SECONDS, interval: float = SHARED_SYNC_INTERVAL,
+                 on_promote: Optional[Callable[[], None]] = None, on_demote: Optional[Callable[[], None]] = None,
+                 on_applied: Optional[Callable[[List[Dict]], None]] = None, plan_max_age: Optional[float] = None,
+                 journal: Optional[SharedJournal] = None, journal_max: int = SHARED_JOURNAL_MAX):
+        self.backend = backend
+        self.store = store
+        self.journal = journal
+        self.journal_max = journal_max
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.interval = interval
+        self.on_promote = on_promote
+        self.on_demote = on_demote
+        self.on_applied = on_applied
+        self.plan_max_age = plan_max_age
+        self.leader = False
+        self.published_seq = 0
+        self.applied = 0
+        self.published = 0
+        self.promotions = 0
+        self.last_error: Optional[str] = None
+        self._next_lease = 0.0
+        self._next_prune = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def pull(self) -> int:
+        """Replay shared changes past the local cursor; returns how many were applied."""
+        total = 0
+        while True:
+            rows = self.backend.alerts_since(self.store.last_seq, SHARED_SYNC_BATCH)
+            applied = self.store.apply_changes(rows) if rows else []
+            total += len(applied)
+            if applied and self.on_applied is not None:
+                self.on_applied(applied)
+            if len(rows) < SHARED_SYNC_BATCH or not applied:
+                break
+        self.applied += total
+        return total
+
+    def push(self) -> int:
+        """Publish local changes past the published cursor (leader only)."""
+        total = 0
+        while True:
+            alerts, cursor = self.store.since(self.published_seq, SHARED_SYNC_BATCH)
+            if alerts and not self.backend.publish_alerts(alerts, owner=self.worker_id):
+                self._demote("lost the producer lease while publishing")
+                return total
+            self.published_seq = cursor
+            total += len(alerts)
+            if len(alerts) < SHARED_SYNC_BATCH:
+                break
+        self.published += total
+        return total
+
+    def tick(self):
+        now = time.monotonic()
+        if now >= self._next_lease:
+            self._next_lease = now + self.lease_seconds / 3.0
+            held = self.backend.acquire_lease(PRODUCER_LEASE, self.worker_id, self.lease_seconds)
+            if held and not self.leader:
+                self._promote()
+            elif not held and self.leader:
+                self._demote("producer lease taken over")
+        if self.leader:
+            self.push()
+            if now >= self._next_prune:
+                self._next_prune = now + 60.0
+                self.backend.prune(max(self.store.max_alerts * 2, 1000), self.plan_max_age, self.journal_max)
+        else:
+            self.pull()
+        if self.journal is not None:
+            self.journal.pump()
+
+    def _promote(self):
+        # catch up on everything the previous leader published before producing on top of it
+        self.pull()
+        self.published_seq = self.store.last_seq
+        self.leader = True
+        self.promotions += 1
+        logger.info("worker %s is now the producer (seq %d)", self.worker_id, self.store.last_seq)
+        if self.on_promote is not None:
+            self.on_promote()
+
+    def _demote(self, reason: str):
+        self.leader = False
+        logger.warning("worker %s stopped producing: %s", self.worker_id, reason)
+        if self.on_demote is not None:
+            self.on_demote()
+        # local changes that never made it out are not in the shared log: rebuild from it
+        self.store.clear()
+        self.pull()
+
+    def start(self):
+        """Load the shared state, contend for the lease once, then keep syncing in the background."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.pull()
+        if self.journal is not None:
+            self.journal.pump()
+        self.tick()
+        self._thread = threading.Thread(target=self._run, name="state-sync", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.tick()
+                self.last_error = None
+            except Exception as e:
+                # a locked / unavailable backend: keep serving the local copy and retry
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.warning("state sync failed: %s", self.last_error)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+        if self.leader:
+            try:
+                self.push()
+                self.backend.release_lease(PRODUCER_LEASE, self.worker_id)
+            except Exception:
+                logger.exception("state sync: final publish failed")
+            self.leader = False
+
+    def stats(self) -> Dict:
+        return {
+            "worker_id": self.worker_id,
+            "role": "leader" if self.leader else "follower",
+            "running": self._thread is not None and self._thread.is_alive(),
+            "last_seq": self.store.last_seq,
+            "published_seq": self.published_seq,
+            "applied": self.applied,
+            "published": self.published,
+            "promotions": self.promotions,
+            "last_error": self.last_error,
+            "journal": self.journal.stats() if self.journal is not None else None,
+            "backend": self.backend.stats(),
+        }
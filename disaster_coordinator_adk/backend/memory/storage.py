@@ -0,0 +1,277 @@
+# backend/memory/storage.py
+"""
+Storage backends for MemoryBank.
+
+Records are plain dicts grouped by kind ("incident", "plan", "log"). Every backend indexes them
+by id, by location and by recorded time (epoch seconds at write time), and applies a
+per-kind retention policy (max records, optional max age).
+
+- InMemoryStorage: bounded, process-local; also used as MemoryBank's hot read tier
+- SQLiteStorage: append-only table with indexes; survives restarts
+"""
+
+import bisect
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+KINDS = ("incident", "plan", "log")
+
+
+def record_id(kind: str, record: Dict):
+    if kind == "plan":
+        return record.get("event_id") or record.get("id")
+    return record.get("id")
+
+
+class _KindIndex:
+    """Per-kind records in write order with id / location / time indexes."""
+
+    def __init__(self):
+        self.records: List[Optional[tuple]] = []    # (recorded_at, id, location, record); None once evicted
+        self.times: List[float] = []
+        self.seqs: List[int] = []                    # MemoryBank seq of each record (monotonic)
+        self.evicted_seq = 0                         # highest seq dropped by retention
+        self.head = 0                                # index of the oldest live entry
+        self.by_id: Dict = {}                        # id -> position of latest record with that id
+        self.by_location: Dict[str, "OrderedDict[int, None]"] = {}
+
+    def __len__(self):
+        return len(self.records) - self.head
+
+    def append(self, recorded_at, rid, location, record):
+        pos = len(self.records)
+        self.records.append((recorded_at, rid, location, record))
+        self.times.append(recorded_at)
+        self.seqs.append(record.get("seq") or 0)
+        if rid is not None:
+            self.by_id[rid] = pos
+        if location is not None:
+            self.by_location.setdefault(location, OrderedDict())[pos] = None
+
+    def pop_oldest(self):
+        entry = self.records[self.head]
+        recorded_at, rid, location, _ = entry
+        if rid is not None and self.by_id.get(rid) == self.head:
+            del self.by_id[rid]
+        if location is not None:
+            positions = self.by_location.get(location)
+            if positions is not None:
+                positions.pop(self.head, None)
+                if not positions:
+                    del self.by_location[location]
+        self.evicted_seq = max(self.evicted_seq, self.seqs[self.head])
+        self.records[self.head] = None
+        self.head += 1
+        # compact once most of the list is dead space; positions shift by `head`
+        if self.head > 1024 and self.head * 2 > len(self.records):
+            self._compact()
+        return entry
+
+    def _compact(self):
+        shift = self.head
+        self.records = self.records[shift:]
+        self.times = self.times[shift:]
+        self.seqs = self.seqs[shift:]
+        self.head = 0
+        self.by_id = {rid: pos - shift for rid, pos in self.by_id.items()}
+        self.by_location = {
+            loc: OrderedDict((pos - shift, None) for pos in positions)
+            for loc, positions in self.by_location.items()
+        }
+
+
+class InMemoryStorage:
+    def __init__(self, max_records: Optional[Dict[str, int]] = None, max_age_seconds: Optional[float] = None):
+        self.max_records = {"incident": 10000, "plan": 10000, "log": 20000}
+        self.max_records.update(max_records or {})
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._kinds = {k: _KindIndex() for k in KINDS}
+
+    def write_batch(self, items: Iterable[tuple]):
+        """items: (kind, recorded_at, record) tuples, in write order."""
+        with self._lock:
+            for kind, recorded_at, record in items:
+                index = self._kinds.setdefault(kind, _KindIndex())
+                index.append(recorded_at, record_id(kind, record), record.get("location"), record)
+                limit = self.max_records.get(kind)
+                while limit is not None and len(index) > limit:
+                    index.pop_oldest()
+            self._apply_max_age()
+
+    def compact(self):
+        with self._lock:
+            self._apply_max_age()
+
+    def get(self, kind: str, rid) -> Optional[Dict]:
+        with self._lock:
+            index = self._kinds.get(kind)
+            pos = index.by_id.get(rid) if index else None
+            return index.records[pos][3] if pos is not None else None
+
+    def by_location(self, kind: str, location: str, limit: Optional[int] = None) -> List[Dict]:
+        with self._lock:
+            index = self._kinds.get(kind)
+            positions = list(index.by_location.get(location, ())) if index else []
+            if limit is not None:
+                positions = positions[-limit:]
+            return [index.records[p][3] for p in positions]
+
+    def time_range(self, kind: str, start: float, end: Optional[float] = None) -> List[Dict]:
+        end = time.time() if end is None else end
+        with self._lock:
+            index = self._kinds.get(kind)
+            if not index:
+                return []
+            lo = max(index.head, bisect.bisect_left(index.times, start))
+            hi = bisect.bisect_right(index.times, end)
+            return [index.records[p][3] for p in range(lo, hi)]
+
+    def since(self, kind: str, cursor: int, limit: Optional[int] = None) -> List[Dict]:
+        """Records whose "seq" is greater than `cursor`, oldest first."""
+        with self._lock:
+            index = self._kinds.get(kind)
+            if not index:
+                return []
+            lo = max(index.head, bisect.bisect_right(index.seqs, cursor))
+            hi = len(index.records) if limit is None else min(len(index.records), lo + limit)
+            return [index.records[p][3] for p in range(lo, hi)]
+
+    def evicted_seq(self, kind: str) -> int:
+        """Highest seq of `kind` already dropped by retention (0 if none)."""
+        index = self._kinds.get(kind)
+        return index.evicted_seq if index else 0
+
+    def recent(self, kind: str, limit: Optional[int] = None) -> List[Dict]:
+        with self._lock:
+            index = self._kinds.get(kind)
+            if not index:
+                return []
+            lo = index.head if limit is None else max(index.head, len(index.records) - limit)
+            return [entry[3] for entry in index.records[lo:]]
+
+    def count(self, kind: str) -> int:
+        index = self._kinds.get(kind)
+        return len(index) if index else 0
+
+    def _apply_max_age(self):
+        if not self.max_age_seconds:
+            return
+        cutoff = time.time() - self.max_age_seconds
+        for index in self._kinds.values():
+            while len(index) and index.times[index.head] < cutoff:
+                index.pop_oldest()
+
+    def close(self):
+        pass
+
+
+class SQLiteStorage:
+    def __init__(self, path: str, max_records: Optional[Dict[str, int]] = None,
+                 max_age_seconds: Optional[float] = None):
+        self.path = path
+        self.max_records = {"incident": 200000, "plan": 200000, "log": 500000}
+        self.max_records.update(max_records or {})
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS records (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                rid TEXT,
+                location TEXT,
+                recorded_at REAL NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_records_kind_rid ON records(kind, rid);
+            CREATE INDEX IF NOT EXISTS idx_records_kind_location ON records(kind, location);
+            CREATE INDEX IF NOT EXISTS idx_records_kind_time ON records(kind, recorded_at);
+            """
+        )
+        self._conn.commit()
+
+    def write_batch(self, items: Iterable[tuple]):
+        rows = []
+        for kind, recorded_at, record in items:
+            rid = record_id(kind, record)
+            rows.append((kind, None if rid is None else str(rid), record.get("location"), recorded_at,
+                         json.dumps(record, default=str)))
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO records (kind, rid, location, recorded_at, data) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def compact(self):
+        """Apply retention: drop rows past max age, then trim each kind to max_records."""
+        with self._lock:
+            if self.max_age_seconds:
+                self._conn.execute("DELETE FROM records WHERE recorded_at < ?", (time.time() - self.max_age_seconds,))
+            for kind, limit in self.max_records.items():
+                self._conn.execute(
+                    "DELETE FROM records WHERE kind = ? AND seq <= "
+                    "(SELECT seq FROM records WHERE kind = ? ORDER BY seq DESC LIMIT 1 OFFSET ?)",
+                    (kind, kind, limit),
+                )
+            self._conn.commit()
+
+    def get(self, kind: str, rid) -> Optional[Dict]:
+        rows = self._query(
+            "SELECT data FROM records WHERE kind = ? AND rid = ? ORDER BY seq DESC LIMIT 1", (kind, str(rid))
+        )
+        return rows[0] if rows else None
+
+    def by_location(self, kind: str, location: str, limit: Optional[int] = None) -> List[Dict]:
+        sql = "SELECT data FROM records WHERE kind = ? AND location = ? ORDER BY seq DESC"
+        params = (kind, location)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (int(limit),)
+        return list(reversed(self._query(sql, params)))
+
+    def time_range(self, kind: str, start: float, end: Optional[float] = None) -> List[Dict]:
+        end = time.time() if end is None else end
+        return self._query(
+            "SELECT data FROM records WHERE kind = ? AND recorded_at BETWEEN ? AND ? ORDER BY seq", (kind, start, end)
+        )
+
+    def recent(self, kind: str, limit: Optional[int] = None) -> List[Dict]:
+        sql = "SELECT data FROM records WHERE kind = ? ORDER BY seq DESC"
+        params = (kind,)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (int(limit),)
+        return list(reversed(self._query(sql, params)))
+
+    def recent_entries(self, kind: str, limit: int) -> List[tuple]:
+        """Most recent (recorded_at, record) pairs, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT recorded_at, data FROM records WHERE kind = ? ORDER BY seq DESC LIMIT ?", (kind, int(limit))
+            ).fetchall()
+        return [(r[0], json.loads(r[1])) for r in reversed(rows)]
+
+    def count(self, kind: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM records WHERE kind = ?", (kind,)).fetchone()[0]
+
+    def _query(self, sql, params):
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,62 @@
+# backend/tests/test_alert_dedup.py
+"""Merging duplicate reports into incidents with stable ids."""
+from memory.alert_dedup import AlertDeduplicator
+
+
+def report(rid, source, lat=13.08, lon=80.27, type="flood", time="2026-10-17T00:00:00+00:00", confidence=0.6):
+    return {"id": rid, "type": type, "location": "Chennai", "time": time, "source": source,
+            "confidence": confidence, "payload": {"lat": lat, "lon": lon}}
+
+
+def test_reports_of_one_event_merge_into_one_incident():
+    dedup = AlertDeduplicator()
+    new, updated = dedup.merge([report("r1", "feed-a"), report("r2", "feed-b", lat=13.10)])
+    assert len(new) == 1 and updated == []
+    incident = new[0]
+    assert incident["report_count"] == 2
+    assert incident["sources"] == ["feed-a", "feed-b"]
+    assert incident["confidence"] == 0.84      # noisy-OR of 0.6 and 0.6
+
+
+def test_distinct_events_stay_apart():
+    dedup = AlertDeduplicator()
+    new, _ = dedup.merge([
+        report("r1", "a"),
+        report("r2", "a", type="cyclone"),                          # other hazard
+        report("r3", "a", lat=19.07, lon=72.87),                    # other place
+        report("r4", "a", time="2026-10-17T12:00:00+00:00"),        # other time window
+    ])
+    assert len(new) == 4
+    assert len({a["id"] for a in new}) == 4
+
+
+def test_ids_are_stable_and_repeats_ignored():
+    first, _ = AlertDeduplicator().merge([report("r1", "a")])
+    dedup = AlertDeduplicator()
+    again, _ = dedup.merge([report("r1", "a")])
+    assert again[0]["id"] == first[0]["id"]
+    new, updated = dedup.merge([report("r1", "a")])
+    assert new == [] and updated == []
+    assert dedup.stats()["repeats"] == 1
+
+
+def test_later_reports_come_back_as_changes():
+    dedup = AlertDeduplicator()
+    new, _ = dedup.merge([report("r1", "a")])
+    stored = dict(new[0])
+    _, updated = dedup.merge([report("r2", "b")])
+    [(incident, changes)] = updated
+    assert incident["id"] == new[0]["id"]
+    assert new[0] == stored                 # the stored incident is not touched
+    assert changes["report_count"] == 2 and changes["sources"] == ["a", "b"]
+    assert [r["id"] for r in changes["reports"]] == ["r1", "r2"]
+    assert changes["confidence"] == 0.84
+
+
+def test_nearby_reports_across_longitude_cells_merge():
+    # 13.7 km apart (radius 15 km) but two 0.15-degree longitude cells apart at 39.8 N
+    dedup = AlertDeduplicator()
+    new, _ = dedup.merge([report("r1", "a", lat=39.80, lon=-89.5501)])
+    new2, updated = dedup.merge([report("r2", "b", lat=39.80, lon=-89.39)])
+    assert new2 == []
+    assert [inc["id"] for inc, _ in updated] == [new[0]["id"]]
@@ -0,0 +1,62 @@
+# backend/tests/test_alert_store.py
+"""AlertStore delta cursors, eviction and per-key views."""
+from memory.alert_store import AlertStore
+
+
+def alert(i, location="Chennai", type="flood"):
+    return {"id": f"a{i}", "type": type, "location": location, "time": "2026-10-17T00:00:00+00:00",
+            "source": "test", "confidence": 0.5, "payload": {}}
+
+
+def ids(alerts):
+    return [a["id"] for a in alerts]
+
+
+def test_since_returns_changes_in_seq_order():
+    store = AlertStore()
+    store.add_many([alert(i) for i in range(3)])
+    _, cursor = store.since(0)
+    assert cursor == store.last_seq == 3
+
+    store.update("a0", {"risk": 0.9})
+    store.add(alert(3))
+    changed, cursor = store.since(cursor)
+    assert ids(changed) == ["a0", "a3"]
+    assert store.since(cursor) == ([], cursor)
+
+
+def test_since_limit_pages_without_gaps():
+    store = AlertStore()
+    store.add_many([alert(i) for i in range(5)])
+    store.update("a1", {"risk": 0.4})      # a1 moves to the end
+    seen, cursor = [], 0
+    while True:
+        page, cursor = store.since(cursor, limit=2)
+        if not page:
+            break
+        assert len(page) <= 2
+        seen += ids(page)
+    assert seen == ["a0", "a2", "a3", "a4", "a1"]
+
+
+def test_eviction_drops_oldest_and_its_changes():
+    store = AlertStore(max_alerts=2)
+    store.add_many([alert(i) for i in range(3)])
+    assert ids(store.all()) == ["a1", "a2"]
+    assert "a0" not in store
+    assert ids(store.since(0)[0]) == ["a1", "a2"]
+
+
+def test_location_and_type_views_follow_writes():
+    store = AlertStore()
+    store.add_many([alert(0), alert(1, location="Mumbai"), alert(2, type="cyclone")])
+    view = store.by_location("Chennai")
+    assert ids(view) == ["a0", "a2"]
+    assert store.by_location("Chennai") is view     # unchanged key: same snapshot, no rebuild
+
+    store.update("a0", {"location": "Mumbai"})
+    assert ids(store.by_location("Chennai")) == ["a2"]
+    assert sorted(ids(store.by_location("Mumbai"))) == ["a0", "a1"]
+    assert ids(view) == ["a0", "a2"]                # old snapshot is immutable
+    assert ids(store.by_type("cyclone")) == ["a2"]
+    assert store.by_location("Nowhere") == ()
@@ -0,0 +1,141 @@
+# backend/tests/test_http_client.py
+"""Pooled HTTP client against a local stub server: retries, timeouts, connection reuse."""
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tools import http_client
+from tools.http_client import AsyncHttpClient, HttpClient, HttpStatusError, http_stats
+
+
+class _Stub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"     # keep-alive, so the client can reuse its connection
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            hits = server.hits[self.path]
+            server.peers.add(self.client_address)
+        if self.path.startswith("/flaky"):
+            # 503 (with Retry-After) for the first two calls, then 200
+            self._reply(503 if hits <= 2 else 200, b"busy" if hits <= 2 else b"ok", {"Retry-After": "0"})
+        elif self.path.startswith("/down"):
+            self._reply(503, b"down")
+        elif self.path.startswith("/missing"):
+            self._reply(404, b"missing")
+        elif self.path.startswith("/slow"):
+            time.sleep(0.5)
+            self._reply(200, b"late")
+        else:
+            self._reply(200, b"ok")
+
+    def _reply(self, status, body, headers=None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Stub)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.hits, server.peers = {}, set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(http_client, "HTTP_BACKOFF_BASE", 0.0)
+
+
+def test_retries_transient_status_then_succeeds(stub):
+    server, base = stub
+    client = HttpClient(retries=2)
+    try:
+        r = client.get(f"{base}/flaky", endpoint="stub.flaky")
+    finally:
+        client.close()
+    assert r.status_code == 200 and r.text == "ok"
+    assert server.hits["/flaky"] == 3
+    stats = http_stats()["stub.flaky"]
+    assert stats["retries"] == 2 and stats["status"] == {"503": 2, "200": 1}
+
+
+def test_gives_up_after_retries(stub):
+    server, base = stub
+    client = HttpClient(retries=1)
+    try:
+        with pytest.raises(HttpStatusError) as err:
+            client.get(f"{base}/down")
+    finally:
+        client.close()
+    assert err.value.status_code == 503
+    assert server.hits["/down"] == 2
+
+
+def test_client_errors_are_not_retried(stub):
+    server, base = stub
+    client = HttpClient(retries=3)
+    try:
+        with pytest.raises(HttpStatusError) as err:
+            client.get(f"{base}/missing")
+    finally:
+        client.close()
+    assert err.value.status_code == 404
+    assert server.hits["/missing"] == 1
+
+
+def test_timeout_raises_transport_error(stub):
+    server, base = stub
+    client = HttpClient(retries=1)
+    try:
+        started = time.monotonic()
+        with pytest.raises(client._transient):
+            client.get(f"{base}/slow", timeout=0.1, endpoint="stub.slow")
+        # two attempts, each cut off at the timeout instead of waiting for the server
+        assert time.monotonic() - started < 0.9
+    finally:
+        client.close()
+    assert http_stats()["stub.slow"]["errors"] == 2
+
+
+def test_connection_is_reused(stub):
+    server, base = stub
+    client = HttpClient()
+    try:
+        for i in range(5):
+            assert client.get(f"{base}/ok?i={i}").status_code == 200
+    finally:
+        client.close()
+    # every request came over the same keep-alive connection (same client port)
+    assert len(server.peers) == 1
+
+
+def test_async_client_retries(stub):
+    server, base = stub
+
+    async def run():
+        client = AsyncHttpClient(retries=2)
+        try:
+            return await client.get(f"{base}/flaky-async")
+        finally:
+            await client.aclose()
+
+    r = asyncio.run(run())
+    assert r.status_code == 200
+    assert server.hits["/flaky-async"] == 3
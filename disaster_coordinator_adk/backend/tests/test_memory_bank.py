@@ -0,0 +1,64 @@
+# backend/tests/test_memory_bank.py
+"""MemoryBank write-behind persistence, restart warm-up and seq ordering."""
+import threading
+
+import pytest
+
+from memory.memory_bank import MemoryBank
+from memory.storage import SQLiteStorage
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "memory.sqlite")
+
+
+def test_write_behind_persists_after_flush(db):
+    bank = MemoryBank(storage=SQLiteStorage(db), flush_interval=0.05)
+    try:
+        bank.write_incident({"id": "i1", "location": "Chennai"})
+        assert bank.get_incident("i1")["seq"] == 1      # served from the hot tier right away
+        assert bank.flush()
+        assert bank.storage.get("incident", "i1")["location"] == "Chennai"
+        assert bank.stats()["flushed"] == 2             # the incident and its log entry
+    finally:
+        bank.close()
+
+
+def test_restart_warms_hot_tier_and_continues_seqs(db):
+    bank = MemoryBank(storage=SQLiteStorage(db), flush_interval=0.05)
+    bank.write_incident({"id": "i1", "location": "Chennai"})
+    bank.write_plan({"event_id": "i1", "tasks": []})
+    last = bank.last_seq
+    bank.close()
+
+    bank = MemoryBank(storage=SQLiteStorage(db), flush_interval=0.05)
+    try:
+        assert [r["id"] for r in bank.incidents] == ["i1"]
+        assert bank.get_plan("i1") is not None
+        assert bank.last_seq == last
+        bank.log({"type": "note"})
+        assert bank.last_seq == last + 1
+    finally:
+        bank.close()
+
+
+def test_concurrent_writes_land_in_seq_order():
+    bank = MemoryBank()
+    seen = []
+    bank.add_listener(lambda kind, record: seen.append(record["seq"]))
+
+    def writer(n):
+        for i in range(200):
+            bank.log({"type": "w", "n": n, "i": i})
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    seqs = [r["seq"] for r in bank.since("log", 0)]
+    assert seqs == list(range(1, 801))
+    assert sorted(seen) == seqs
+    # a delta read from the middle returns exactly the tail
+    assert [r["seq"] for r in bank.since("log", 400)] == list(range(401, 801))
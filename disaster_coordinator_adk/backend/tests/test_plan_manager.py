@@ -0,0 +1,68 @@
+# backend/tests/test_plan_manager.py
+"""PlanManager single-flight builds, fingerprints and batches."""
+import threading
+import time
+
+from agents.plan_manager import COALESCED, HIT, MISS, REFRESH, PlanManager
+
+ALERT = {"id": "a1", "type": "flood", "location": "Chennai", "confidence": 0.8, "payload": {}}
+
+
+class Builder:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, alert_id, alert, refresh):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        time.sleep(self.delay)
+        return {"event_id": alert_id, "build": n}
+
+    def many(self, items, refresh):
+        return {alert_id: self(alert_id, alert, refresh) for alert_id, alert in items}
+
+
+def test_concurrent_requests_share_one_build():
+    build = Builder(delay=0.2)
+    plans = PlanManager(build)
+    out = []
+
+    def request():
+        out.append(plans.get_plan("a1", ALERT))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert build.calls == 1
+    assert sorted(status for _, status in out) == [COALESCED] * 7 + [MISS]
+    assert {entry["plan"]["build"] for entry, _ in out} == {1}
+
+
+def test_stored_plan_until_alert_changes():
+    build = Builder()
+    plans = PlanManager(build)
+    assert plans.get_plan("a1", ALERT)[1] == MISS
+    # producer write-backs and geocoded coordinates don't count as a change
+    touched = dict(ALERT, seq=9, risk=0.7, payload={"lat": 13.0, "lon": 80.2})
+    assert plans.get_plan("a1", touched)[1] == HIT
+    assert plans.get_plan("a1", dict(ALERT, confidence=0.9))[1] == MISS
+    assert plans.get_plan("a1", dict(ALERT, confidence=0.9), force=True)[1] == REFRESH
+    assert build.calls == 3
+
+
+def test_get_many_joins_in_flight_build():
+    build = Builder(delay=0.2)
+    plans = PlanManager(build, build_many=build.many)
+    single = threading.Thread(target=plans.get_plan, args=("a1", ALERT))
+    single.start()
+    time.sleep(0.05)
+    results, errors = plans.get_many([("a1", ALERT), ("a2", dict(ALERT, id="a2"))])
+    single.join()
+    assert errors == {}
+    assert results["a1"][1] == COALESCED and results["a2"][1] == MISS
+    assert build.calls == 2
@@ -0,0 +1,37 @@
+# backend/tests/test_producer.py
+"""One producer cycle: merged reports reach stored incidents through ALERTS.update, with their scores."""
+import pytest
+
+import main
+
+
+def report(rid, source, lat=-33.87, lon=151.21):
+    return {"id": rid, "type": "bushfire", "location": "Sydney", "time": "2026-10-17T03:00:00+00:00",
+            "source": source, "confidence": 0.6, "payload": {"lat": lat, "lon": lon}}
+
+
+@pytest.fixture(autouse=True)
+def no_llm_refine(monkeypatch):
+    monkeypatch.setattr(main, "RISK_BATCH_LLM", False)
+
+
+def test_merged_report_bumps_seq_and_rescores_heuristic():
+    [incident] = main.run_producer_cycle([report("p1", "a")])
+    first = dict(main.ALERTS.get(incident["id"]))
+    assert first["risk_source"] == "heuristic"
+
+    main.run_producer_cycle([report("p2", "b")])
+    stored = main.ALERTS.get(incident["id"])
+    assert stored["report_count"] == 2 and stored["confidence"] == 0.84
+    assert stored["seq"] > first["seq"]
+    assert stored["risk"] > first["risk"]       # two sources: more confident, higher risk
+
+
+def test_merged_report_keeps_riskagent_score():
+    [incident] = main.run_producer_cycle([report("q1", "a", lat=-34.5)])
+    main.ALERTS.update(incident["id"], {"risk": 0.91, "risk_source": "llm"})
+
+    main.run_producer_cycle([report("q2", "b", lat=-34.5)])
+    stored = main.ALERTS.get(incident["id"])
+    assert stored["report_count"] == 2
+    assert (stored["risk"], stored["risk_source"]) == (0.91, "llm")
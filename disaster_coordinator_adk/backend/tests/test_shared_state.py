@@ -0,0 +1,218 @@
+# backend/tests/test_shared_state.py
+"""Several workers on one backend: leader election and failover, replication, journal, shared plans and pools."""
+import threading
+import time
+
+import pytest
+
+from agents.plan_manager import HIT, MISS, PlanManager
+from memory.alert_dedup import AlertDeduplicator
+from memory.alert_store import AlertStore
+from memory.memory_bank import MemoryBank
+from memory.shared_state import PRODUCER_LEASE, SQLiteSharedState, SharedJournal, StateSync
+from tools.volunteer_pool import VolunteerPool
+
+
+@pytest.fixture
+def backends(tmp_path):
+    path = str(tmp_path / "shared.sqlite")
+    opened = [SQLiteSharedState(path), SQLiteSharedState(path)]
+    yield opened
+    for backend in opened:
+        backend.close()
+
+
+def alert(i, **fields):
+    a = {"id": f"a{i}", "type": "flood", "location": "Chennai", "time": "2026-10-17T00:00:00+00:00",
+         "source": "test", "confidence": 0.5, "payload": {}}
+    a.update(fields)
+    return a
+
+
+def test_lease_has_one_holder_until_it_expires(backends):
+    a, b = backends
+    assert a.acquire_lease("job", "w1", 0.2)
+    assert not b.acquire_lease("job", "w2", 0.2)
+    assert a.acquire_lease("job", "w1", 0.2)          # the holder renews
+    assert b.lease_holder("job") == "w1"
+    time.sleep(0.25)
+    assert b.acquire_lease("job", "w2", 0.2)
+    a.release_lease("job", "w1")                      # not the holder any more: no effect
+    assert a.lease_holder("job") == "w2"
+
+
+def test_one_leader_and_follower_replicates(backends):
+    stores = [AlertStore(), AlertStore()]
+    syncs = [StateSync(backend, store, worker_id=f"w{i}", lease_seconds=0.3)
+             for i, (backend, store) in enumerate(zip(backends, stores))]
+    for sync in syncs:
+        sync.tick()
+    assert [s.leader for s in syncs] == [True, False]
+    assert backends[1].lease_holder(PRODUCER_LEASE) == "w0"
+
+    stores[0].add_many([alert(i) for i in range(3)])
+    stores[0].update("a1", {"risk": 0.6})
+    syncs[0].tick()
+    syncs[1].tick()
+    assert stores[1].last_seq == stores[0].last_seq
+    assert stores[1].get("a1")["risk"] == 0.6
+
+
+def test_follower_takes_over_when_leader_stops_renewing(backends):
+    stores = [AlertStore(), AlertStore()]
+    promoted = []
+    syncs = [StateSync(backend, store, worker_id=f"w{i}", lease_seconds=0.3,
+                       on_promote=lambda i=i: promoted.append(i))
+             for i, (backend, store) in enumerate(zip(backends, stores))]
+    syncs[0].tick()
+    syncs[1].tick()
+    stores[0].add_many([alert(i) for i in range(2)])
+    syncs[0].tick()
+
+    time.sleep(0.35)                                  # w0 is gone: its lease runs out
+    syncs[1]._next_lease = 0.0
+    syncs[1].tick()
+    assert syncs[1].leader and promoted == [0, 1]
+    # the new leader caught up before producing, and continues the same seqs
+    assert stores[1].last_seq == stores[0].last_seq
+    stores[1].add(alert(2))
+    assert stores[1].get("a2")["seq"] == stores[0].last_seq + 1
+
+    syncs[0]._next_lease = 0.0
+    syncs[0].tick()                                   # the old leader finds the lease taken
+    assert not syncs[0].leader
+
+
+def test_journal_orders_rows_across_workers(backends):
+    journals = [SharedJournal(backend, worker_id=f"w{i}") for i, backend in enumerate(backends)]
+    seen = [[], []]
+    for i, journal in enumerate(journals):
+        journal.subscribe(("log",), lambda kind, seq, at, data, own, i=i: seen[i].append((seq, data, own)))
+
+    journals[0].append("log", {"n": 1})
+    journals[1].append_many("log", [{"n": 2}, {"n": 3}])
+    journals[0].pump()
+    assert [s for s, _, _ in seen[0]] == [s for s, _, _ in seen[1]] == [1, 2, 3]
+    assert [own for _, _, own in seen[0]] == [True, False, False]
+    assert [own for _, _, own in seen[1]] == [False, True, True]
+
+
+def test_plans_are_shared_and_deleted_everywhere(backends):
+    a, b = backends
+    entry = {"plan": {"event_id": "a1"}, "fingerprint": "f", "computed_at": time.time()}
+    a.put_plan("a1", entry)
+    assert b.get_plan("a1") == entry
+    b.delete_plan("a1")
+    assert a.get_plan("a1") is None
+
+
+def test_apply_changes_keeps_origin_seqs():
+    leader, follower = AlertStore(), AlertStore()
+    leader.add_many([alert(i) for i in range(3)])
+    leader.update("a1", {"risk": 0.7})
+    follower.apply_changes(leader.since(0)[0])
+    assert follower.last_seq == leader.last_seq
+    assert [(a["id"], a["seq"]) for a in follower.since(0)[0]] == [(a["id"], a["seq"]) for a in leader.since(0)[0]]
+    assert follower.get("a1")["risk"] == 0.7
+    # replays at or below the cursor are ignored
+    assert follower.apply_changes(leader.since(0)[0]) == []
+
+
+def test_apply_changes_swaps_in_new_dicts():
+    leader, follower = AlertStore(), AlertStore()
+    leader.add_many([alert(i) for i in range(2)])
+    follower.apply_changes(leader.since(0)[0])
+    old, snapshot, view = follower.get("a0"), follower.all(), follower.by_location("Chennai")
+
+    leader.update("a0", {"risk": 0.8, "location": "Mumbai"})
+    cursor = follower.last_seq
+    follower.apply_changes(leader.since(cursor)[0])
+    # what readers already hold is never edited under them
+    assert "risk" not in old and old["location"] == "Chennai"
+    assert snapshot[0] is old and view[0] is old
+    new = follower.get("a0")
+    assert new is not old and new["risk"] == 0.8
+    assert [a["id"] for a in follower.all()] == ["a0", "a1"] and follower.all()[0] is new
+    assert [a["id"] for a in follower.by_location("Chennai")] == ["a1"]
+    assert follower.by_location("Mumbai") == (new,)
+
+
+def test_journal_gives_every_worker_the_same_memory(backends):
+    banks = [MemoryBank(), MemoryBank()]
+    journals = [SharedJournal(backend, worker_id=f"w{i}") for i, backend in enumerate(backends)]
+    for bank, journal in zip(banks, journals):
+        bank.attach_journal(journal)
+
+    banks[0].write_incident({"id": "i1", "location": "Chennai"})
+    banks[1].log({"type": "note"})
+    journals[0].pump()
+    journals[1].pump()
+
+    records = [[(r["seq"], r.get("id"), r["type"]) for r in bank.since("log", 0)] for bank in banks]
+    assert records[0] == records[1] == [(2, "i1", "incident"), (3, None, "note")]
+    assert banks[1].get_incident("i1")["seq"] == 1
+    assert banks[0].last_seq == banks[1].last_seq == 3
+
+
+def test_invalidated_plan_is_gone_on_every_worker(backends):
+    calls = []
+
+    def build(alert_id, a, refresh):
+        calls.append(alert_id)
+        return {"event_id": alert_id}
+
+    workers = [PlanManager(build, shared=backend, owner=f"w{i}") for i, backend in enumerate(backends)]
+    workers[0].get_plan("a1", alert(1))
+    assert workers[1].get_plan("a1", alert(1))[1] == HIT        # built by the other worker
+    assert workers[1].has_plan("a1", alert(1))
+
+    workers[1].invalidate("a1")
+    assert not workers[0].has_plan("a1", alert(1))
+    assert workers[0].get_plan("a1", alert(1))[1] == MISS
+    assert len(calls) == 2
+
+
+def test_volunteer_pool_is_one_capacity_across_workers(backends):
+    capacity = {"Chennai": 5, "Mumbai": 10}
+    pools = [VolunteerPool(capacity), VolunteerPool(capacity)]
+    for pool, backend in zip(pools, backends):
+        pool.attach_shared(backend)
+    a = pools[0].reserve("Chennai", 3, alert_id="a1")
+    assert pools[1].available("Chennai") == 2
+    # the other worker sees the reservation and returns it instead of reserving again
+    assert pools[1].reserve("Chennai", 3, alert_id="a1")["reservation_id"] == a["reservation_id"]
+
+    def grab(pool, i):
+        pool.reserve("Mumbai", 1, alert_id=f"m{i}")
+
+    threads = [threading.Thread(target=grab, args=(pools[i % 2], i)) for i in range(14)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # never more than the capacity, however the two workers interleave
+    assert pools[0].status()["regions"]["Mumbai"]["reserved"] == 10
+    assert pools[1].status()["reservations"] == 11
+
+    pools[1].release(alert_id="a1")
+    assert pools[0].available("Chennai") == 5
+
+
+def test_promoted_producer_merges_into_replicated_incidents():
+    def report(rid, source, lat=13.08):
+        return alert(0, id=rid, source=source, confidence=0.6, payload={"lat": lat, "lon": 80.27})
+
+    new, _ = AlertDeduplicator().merge([report("r1", "a")])
+    replicated = AlertStore()
+    replicated.apply_changes([dict(new[0], seq=1)])      # what a follower holds
+
+    promoted = AlertDeduplicator()
+    promoted.seed(replicated.all())
+    new2, updated = promoted.merge([report("r1", "a"), report("r2", "b")])
+    assert new2 == []
+    assert [inc["id"] for inc, _ in updated] == [new[0]["id"]]
+    assert updated[0][1]["report_count"] == 2
+
+    # another event in the same cell and window gets a fresh id, not the stored incident's
+    other, _ = promoted.merge([report("r3", "c", lat=13.30)])
+    assert other and other[0]["id"] != new[0]["id"]
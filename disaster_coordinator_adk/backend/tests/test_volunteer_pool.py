@@ -0,0 +1,82 @@
+# backend/tests/test_volunteer_pool.py
+"""Volunteer reservations, neighbour borrowing and batch allocation."""
+from tools.volunteer_pool import VolunteerPool
+
+# Chennai-Bangalore is ~290 km, within the default borrow radius; Mumbai is far from both
+CAPACITY = {"Chennai": 5, "Bangalore": 4, "Mumbai": 10}
+
+
+def test_reserve_borrows_from_nearest_neighbour():
+    pool = VolunteerPool(CAPACITY)
+    r = pool.reserve("Chennai", 7, alert_id="a1")
+    assert r["assigned"] == 7
+    assert r["sources"] == {"Chennai": 5, "Bangalore": 2}
+    assert pool.available("Chennai") == 0 and pool.available("Bangalore") == 2
+    assert pool.available("Mumbai") == 10
+
+
+def test_reserve_is_idempotent_per_alert_and_release_frees():
+    pool = VolunteerPool(CAPACITY)
+    first = pool.reserve("Chennai", 3, alert_id="a1")
+    again = pool.reserve("Chennai", 3, alert_id="a1")
+    assert again["reservation_id"] == first["reservation_id"]
+    assert pool.available("Chennai") == 2
+
+    assert pool.release(alert_id="a1")["reservation_id"] == first["reservation_id"]
+    assert pool.available("Chennai") == 5
+    assert pool.reservation_for("a1") is None
+    assert pool.release(alert_id="a1") is None
+
+
+def test_reservations_expire():
+    pool = VolunteerPool(CAPACITY)
+    pool.reserve("Chennai", 5, alert_id="a1", ttl_seconds=-1)
+    assert pool.available("Chennai") == 5
+    assert pool.status()["reservations"] == 0
+
+
+def test_short_pool_gives_partial_and_no_empty_reservation():
+    pool = VolunteerPool({"Mumbai": 2})
+    assert pool.reserve("Mumbai", 5, alert_id="a1")["assigned"] == 2
+    empty = pool.reserve("Mumbai", 1, alert_id="a2")
+    assert empty["assigned"] == 0 and empty["reservation_id"] is None
+    assert pool.reservation_for("a2") is None
+
+
+def test_allocate_batch_prefers_high_risk_and_keeps_request_order():
+    pool = VolunteerPool({"Chennai": 4})
+    held = pool.reserve("Chennai", 1, alert_id="held")
+    requests = [
+        {"alert_id": "low", "location": "Chennai", "required": 3, "risk": 0.2},
+        {"alert_id": "held", "location": "Chennai", "required": 1, "risk": 0.1},
+        {"alert_id": "high", "location": "Chennai", "required": 2, "risk": 0.9},
+    ]
+    out = pool.allocate_batch(requests)
+    assert [a["alert_id"] for a in out] == ["low", "held", "high"]
+    assert out[1]["reservation_id"] == held["reservation_id"]
+    assert out[2]["assigned"] == 2 and out[0]["assigned"] == 1
+    assert pool.available("Chennai") == 3          # a dry run reserves nothing
+
+    committed = pool.allocate_batch(requests, commit=True)
+    assert pool.available("Chennai") == 0
+    assert pool.reservation_for("high")["reservation_id"] == committed[2]["reservation_id"]
+
+
+def test_allocate_batch_splits_a_location_by_risk_and_distance():
+    pool = VolunteerPool({"Chennai": 3, "Bangalore": 3})
+    requests = [
+        {"alert_id": "c-low", "location": "Chennai", "required": 3, "risk": 0.3},
+        {"alert_id": "c-high", "location": "Chennai", "required": 2, "risk": 0.8},
+        {"alert_id": "b", "location": "Bangalore", "required": 2, "risk": 0.5},
+    ]
+    out = {a["alert_id"]: a for a in pool.allocate_batch(requests)}
+    assert out["c-high"]["sources"] == {"Chennai": 2}      # highest risk draws on the nearest region
+    assert out["b"]["sources"] == {"Bangalore": 2}
+    assert out["c-low"]["sources"] == {"Chennai": 1, "Bangalore": 1}
+
+
+def test_every_capacity_region_has_coordinates():
+    from tools.geocode_tool import gazetteer_lookup
+    from tools.volunteer_api_tool import REGIONAL_CAPACITY
+
+    assert [r for r in REGIONAL_CAPACITY if not gazetteer_lookup(r)] == []
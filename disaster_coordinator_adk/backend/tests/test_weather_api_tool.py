@@ -0,0 +1,72 @@
+# backend/tests/test_weather_api_tool.py
+"""OpenWeather One Call alerts -> our alert dicts -> the ingest validation boundary."""
+from datetime import datetime
+
+import main
+from tools.weather_api_tool import epoch_to_iso, parse_openweather_alerts
+
+# trimmed One Call 2.5 response (the "alerts" block as the API sends it)
+ONE_CALL = {
+    "lat": 13.0827,
+    "lon": 80.2707,
+    "timezone": "Asia/Kolkata",
+    "timezone_offset": 19800,
+    "current": {"dt": 1700035200, "temp": 299.1, "weather": [{"id": 502, "main": "Rain"}]},
+    "alerts": [
+        {
+            "sender_name": "India Meteorological Department",
+            "event": "Heavy Rain",
+            "start": 1700035200,
+            "end": 1700121600,
+            "description": "Heavy to very heavy rainfall at isolated places over Chennai.",
+            "tags": ["Rain", "Flood"],
+        },
+        {
+            "sender_name": "India Meteorological Department",
+            "event": "Thunderstorm",
+            "start": 1700042400,
+            "end": 1700064000,
+            "description": "Thunderstorm with lightning likely.",
+            "tags": ["Thunderstorm"],
+        },
+    ],
+}
+
+
+def test_epoch_to_iso():
+    assert epoch_to_iso(1700035200) == "2023-11-15T08:00:00+00:00"
+    assert epoch_to_iso(1700035200.5).startswith("2023-11-15T08:00:00.5")
+    assert epoch_to_iso("1700035200") is None
+    assert epoch_to_iso(True) is None
+    assert epoch_to_iso(None) is None
+
+
+def test_parse_one_call_alerts_uses_iso_times():
+    alerts = parse_openweather_alerts("Chennai", ONE_CALL)
+    assert [a["type"] for a in alerts] == ["Heavy Rain", "Thunderstorm"]
+    first = alerts[0]
+    assert first["time"] == "2023-11-15T08:00:00+00:00"
+    assert first["payload"]["ends"] == "2023-11-16T08:00:00+00:00"
+    assert first["payload"]["sender"] == "India Meteorological Department"
+    assert datetime.fromisoformat(alerts[1]["time"]).timestamp() == 1700042400
+
+
+def test_parsed_alerts_pass_ingest_validation():
+    for alert in parse_openweather_alerts("Chennai", ONE_CALL):
+        assert main.validate_alert(main.normalize_alert(alert)), alert
+
+
+def test_normalize_alert_converts_epoch_time():
+    alert = main.normalize_alert({"id": "x", "type": "flood", "location": "Chennai", "time": 1700035200,
+                                  "source": "feed", "confidence": 0.7})
+    assert alert["time"] == "2023-11-15T08:00:00+00:00"
+    assert main.validate_alert(alert)
+
+
+def test_normalize_alert_coerces_confidence():
+    base = {"id": "x", "type": "flood", "location": "Chennai", "time": "2023-11-15T08:00:00+00:00", "source": "feed"}
+    assert main.normalize_alert(dict(base, confidence="0.7"))["confidence"] == 0.7
+    assert main.normalize_alert(dict(base, confidence=0))["confidence"] == 0.0
+    for junk in (None, "high", [0.7]):
+        assert main.normalize_alert(dict(base, confidence=junk))["confidence"] == 0.5
+    assert main.normalize_alert(dict(base))["confidence"] == 0.5
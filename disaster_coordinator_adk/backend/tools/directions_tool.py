@@ -1,37 +1,158 @@
 import os
-import requests
+import logging
 from dotenv import load_dotenv
+from tools.cache import TTLCache
+from tools.http_client import get_http_client
+from tools.shelter_index import haversine_m
+from tools.tracing import traced
 load_dotenv()
 
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY", "")
+GOOGLE_MAPS_API_BASE = os.getenv("GOOGLE_MAPS_API_BASE", "https://maps.googleapis.com").rstrip("/")
 
+# route cache: keyed on coordinates rounded to ~11 m
+ROUTE_CACHE_TTL = float(os.getenv("ROUTE_CACHE_TTL_SECONDS", "900"))
+ROUTE_COORD_DECIMALS = 4
+# local estimator: great-circle distance * road factor at an average driving speed
+ROUTE_ROAD_FACTOR = float(os.getenv("ROUTE_ROAD_FACTOR", "1.3"))
+ROUTE_FALLBACK_SPEED_KMH = float(os.getenv("ROUTE_FALLBACK_SPEED_KMH", "40"))
+# Distance Matrix API request limits
+_MATRIX_MAX_SIDE = 25
+_MATRIX_MAX_ELEMENTS = 100
+
+logger = logging.getLogger("disaster-backend.directions")
+
+_route_cache = TTLCache(maxsize=20000, ttl_seconds=ROUTE_CACHE_TTL)    # single routes (with polyline)
+_matrix_cache = TTLCache(maxsize=50000, ttl_seconds=ROUTE_CACHE_TTL)   # matrix elements
+
+
+def _key(lat, lon):
+    return (round(float(lat), ROUTE_COORD_DECIMALS), round(float(lon), ROUTE_COORD_DECIMALS))
+
+
+def route_cache_stats():
+    return {"routes": _route_cache.stats(), "matrix": _matrix_cache.stats()}
+
+
+def estimate_local(origin_lat, origin_lon, dest_lat, dest_lon):
+    """
+    Instant local estimate: {distance_m, duration_s, polyline: None, source: "estimate"}.
+    """
+    distance_m = haversine_m(origin_lat, origin_lon, dest_lat, dest_lon) * ROUTE_ROAD_FACTOR
+    duration_s = distance_m / (ROUTE_FALLBACK_SPEED_KMH * 1000.0 / 3600.0)
+    return {"distance_m": int(round(distance_m)), "duration_s": int(round(duration_s)), "polyline": None, "source": "estimate"}
+
+
+@traced("tool.estimate_route")
 def estimate_route(origin_lat, origin_lon, dest_lat, dest_lon):
     """
-    Return dict: {distance_m, duration_s, polyline}
-    If no API key, return None-valued fields as fallback.
+    Return dict: {distance_m, duration_s, polyline, source}
+    Uses the Directions API when a key is configured (cached); otherwise, or on API failure,
+    falls back to the local estimator (polyline None).
     """
-    if not GOOGLE_MAPS_API_KEY:
-        return {"distance_m": None, "duration_s": None, "polyline": None}
-    url = "https://maps.googleapis.com/maps/api/directions/json"
-    params = {
-        "origin": f"{origin_lat},{origin_lon}",
-        "destination": f"{dest_lat},{dest_lon}",
-        "key": GOOGLE_MAPS_API_KEY,
-        "mode": "driving"
-    }
-    try:
-        r = requests.get(url, params=params, timeout=10)
-        r.raise_for_status()
-        j = r.json()
-        if j.get("routes"):
-            route = j["routes"][0]
-            leg = route["legs"][0]
-            return {
-                "distance_m": leg.get("distance", {}).get("value"),
-                "duration_s": leg.get("duration", {}).get("value"),
-                "polyline": route.get("overview_polyline", {}).get("points")
+    key = (_key(origin_lat, origin_lon), _key(dest_lat, dest_lon))
+    cached = _route_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+
+    route = None
+    if GOOGLE_MAPS_API_KEY:
+        url = f"{GOOGLE_MAPS_API_BASE}/maps/api/directions/json"
+        params = {
+            "origin": f"{origin_lat},{origin_lon}",
+            "destination": f"{dest_lat},{dest_lon}",
+            "key": GOOGLE_MAPS_API_KEY,
+            "mode": "driving"
+        }
+        try:
+            r = get_http_client().get(url, params=params, timeout=10, endpoint="maps.directions")
+            j = r.json()
+            if j.get("routes"):
+                first = j["routes"][0]
+                leg = first["legs"][0]
+                route = {
+                    "distance_m": leg.get("distance", {}).get("value"),
+                    "duration_s": leg.get("duration", {}).get("value"),
+                    "polyline": first.get("overview_polyline", {}).get("points"),
+                    "source": "directions"
+                }
+        except Exception as e:
+            # don't crash the server for API issues — use the local estimate and log
+            logger.warning("Directions API failed: %s", e)
+
+    if route is None:
+        route = estimate_local(origin_lat, origin_lon, dest_lat, dest_lon)
+        # don't pin an estimate for the full TTL when the API is configured but failing
+        _route_cache.set(key, route, ttl_seconds=60 if GOOGLE_MAPS_API_KEY else None)
+    else:
+        _route_cache.set(key, route)
+    return dict(route)
+
+
+@traced("tool.estimate_routes")
+def estimate_routes(origins, destinations):
+    """
+    Batched routing. `origins` / `destinations` are sequences of (lat, lon).
+    Returns a len(origins) x len(destinations) matrix of {distance_m, duration_s, source} dicts.
+    Cached pairs are served locally; the rest go to the Distance Matrix API in as few requests
+    as its limits allow, and anything it can't answer is filled by the local estimator.
+    """
+    origins = [_key(*o) for o in origins]
+    destinations = [_key(*d) for d in destinations]
+    matrix = [[None] * len(destinations) for _ in origins]
+
+    missing_o, missing_d = {}, {}
+    for i, o in enumerate(origins):
+        for j, d in enumerate(destinations):
+            cached = _matrix_cache.get((o, d))
+            if cached is not None:
+                matrix[i][j] = dict(cached)
+            else:
+                missing_o.setdefault(o, None)
+                missing_d.setdefault(d, None)
+
+    if missing_o and GOOGLE_MAPS_API_KEY:
+        _fetch_distance_matrix(list(missing_o), list(missing_d))
+
+    for i, o in enumerate(origins):
+        for j, d in enumerate(destinations):
+            if matrix[i][j] is not None:
+                continue
+            element = _matrix_cache.get((o, d))
+            if element is None:
+                element = estimate_local(o[0], o[1], d[0], d[1])
+                element.pop("polyline", None)
+                _matrix_cache.set((o, d), element, ttl_seconds=60 if GOOGLE_MAPS_API_KEY else None)
+            matrix[i][j] = dict(element)
+    return matrix
+
+
+def _fetch_distance_matrix(origins, destinations):
+    """Fill _matrix_cache from the Distance Matrix API, chunked to the API's per-request limits."""
+    url = f"{GOOGLE_MAPS_API_BASE}/maps/api/distancematrix/json"
+    for oi in range(0, len(origins), _MATRIX_MAX_SIDE):
+        o_chunk = origins[oi:oi + _MATRIX_MAX_SIDE]
+        d_step = max(1, min(_MATRIX_MAX_SIDE, _MATRIX_MAX_ELEMENTS // len(o_chunk)))
+        for di in range(0, len(destinations), d_step):
+            d_chunk = destinations[di:di + d_step]
+            params = {
+                "origins": "|".join(f"{lat},{lon}" for lat, lon in o_chunk),
+                "destinations": "|".join(f"{lat},{lon}" for lat, lon in d_chunk),
+                "key": GOOGLE_MAPS_API_KEY,
+                "mode": "driving"
             }
-    except Exception as e:
-        # don't crash the server for API issues — return safe fallback and log
-        print("Directions API failed:", e)
-    return {"distance_m": None, "duration_s": None, "polyline": None}
\ No newline at end of file
+            try:
+                r = get_http_client().get(url, params=params, timeout=10, endpoint="maps.distance_matrix")
+                rows = r.json().get("rows", [])
+            except Exception as e:
+                logger.warning("Distance Matrix API failed: %s", e)
+                continue
+            for o, row in zip(o_chunk, rows):
+                for d, el in zip(d_chunk, row.get("elements", [])):
+                    if el.get("status") != "OK":
+                        continue
+                    _matrix_cache.set((o, d), {
+                        "distance_m": el.get("distance", {}).get("value"),
+                        "duration_s": el.get("duration", {}).get("value"),
+                        "source": "distance_matrix"
+                    })
@@ -0,0 +1,85 @@
+# backend/tools/fast_json.py
+"""
+Pre-encoded JSON for the hot read endpoints (/api/poll_alerts, /api/incidents, /api/alerts/tiles).
+
+- dumps(): compact JSON bytes, through orjson when it is installed, else the stdlib encoder
+- RecordEncoder: JSON bytes per record, projected onto a fixed field list (a response model's
+  fields, missing ones as null, like the model would serialize them) and cached per key and
+  version (an alert's id and seq). A list response is the cached pieces joined, so a record that
+  did not change is not copied, validated or encoded again per request. It can observe an
+  AlertStore (AlertStore.add_observer), which drops a record's bytes as soon as it changes or leaves
+  and so bounds it; otherwise `maxsize` does (oldest encodings dropped first)
+
+Whole responses are cached per ETag by the endpoints themselves.
+"""
+import json
+import threading
+from typing import Callable, Dict, Hashable, Iterable, Optional, Sequence
+
+try:
+    import orjson
+except ImportError:     # stdlib fallback: same output, slower
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class RecordEncoder:
+    def __init__(self, fields: Sequence[str], maxsize: Optional[int] = None):
+        self.fields = tuple(fields)
+        self.maxsize = maxsize
+        # key -> (version, bytes); plain dict reads, the lock only serializes evictions
+        self._data: Dict[Hashable, tuple] = {}
+        self._evict_lock = threading.Lock()
+        self.hits = 0
+        self.encoded = 0
+
+    def encode(self, key: Hashable, version, record: Dict) -> bytes:
+        """`record` projected onto the fields, as JSON bytes; reused while `version` is unchanged."""
+        cached = self._data.get(key)
+        if cached is not None and cached[0] == version:
+            self.hits += 1
+            return cached[1]
+        data = dumps({f: record.get(f) for f in self.fields})
+        self.encoded += 1
+        self._data[key] = (version, data)
+        if self.maxsize is not None and len(self._data) > self.maxsize:
+            with self._evict_lock:
+                try:
+                    while len(self._data) > self.maxsize:
+                        self._data.pop(next(iter(self._data)), None)
+                except RuntimeError:
+                    pass    # a reader inserted meanwhile; the next insert evicts again
+        return data
+
+    def encode_list(self, records: Iterable[Dict], key: Callable[[Dict], Hashable] = lambda r: r["id"],
+                    version: Callable[[Dict], object] = lambda r: r.get("seq")) -> bytes:
+        """A JSON array of the records, built from their cached encodings."""
+        return b"[" + b",".join(self.encode(key(r), version(r), r) for r in records) + b"]"
+
+    # AlertStore observer interface: changed / removed records lose their bytes right away
+    def upsert(self, key: Hashable, record: Dict):
+        self._data.pop(key, None)
+
+    def remove(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> Dict:
+        total = self.hits + self.encoded
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.encoded,
+            "hit_ratio": (self.hits / total) if total else 0.0,
+            "backend": JSON_BACKEND,
+        }
@@ -0,0 +1,117 @@
+# backend/tools/feed_sources.py
+"""
+Alert feed sources for the ingestion scheduler (tools/ingest.py).
+
+A source has a name, a poll interval and an async fetch(client) returning a list of raw alert
+dicts. `client` is the scheduler's shared tools.http_client.AsyncHttpClient (pooled, rate
+limited per host, retried).
+
+- MockFeedSource: the synthetic generator (poll_alerts_tool_func)
+- OpenWeatherFeedSource: One Call alerts for many cities, fetched concurrently
+"""
+import asyncio
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+
+from tools.geocode_tool import gazetteer_lookup, geocode_location
+from tools.weather_api_tool import LOCATIONS, OPENWEATHER_API_KEY, OPENWEATHER_URL, parse_openweather_alerts, poll_alerts_tool_func
+
+logger = logging.getLogger("disaster-backend.feeds")
+
+
+class FeedSource(ABC):
+    name = "source"
+
+    def __init__(self, interval: float, timeout: Optional[float] = None):
+        self.interval = float(interval)
+        # a poll may not run past its own interval, so cycles never pile up
+        self.timeout = float(timeout) if timeout else self.interval
+
+    @abstractmethod
+    async def fetch(self, client) -> List[Dict]:
+        ...
+
+
+class MockFeedSource(FeedSource):
+    name = "mock"
+
+    async def fetch(self, client) -> List[Dict]:
+        return poll_alerts_tool_func()
+
+
+class OpenWeatherFeedSource(FeedSource):
+    name = "openweather"
+
+    def __init__(self, cities: Iterable[str], api_key: str = OPENWEATHER_API_KEY, interval: float = 300.0,
+                 concurrency: int = 20, timeout: Optional[float] = None):
+        super().__init__(interval, timeout)
+        self.cities = [c for c in cities if c]
+        self.api_key = api_key
+        self.concurrency = max(1, int(concurrency))
+        self.city_failures = 0
+        self._coords: Dict[str, Optional[tuple]] = {}
+
+    async def fetch(self, client) -> List[Dict]:
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def one(city):
+            async with sem:
+                try:
+                    return await self._fetch_city(client, city)
+                except Exception as e:
+                    self.city_failures += 1
+                    logger.warning("openweather: %s failed: %s", city, e)
+                    return None
+
+        results = await asyncio.gather(*(one(c) for c in self.cities))
+        if self.cities and all(r is None for r in results):
+            # nothing came back at all: let the scheduler back off / trip the breaker
+            raise RuntimeError(f"openweather: all {len(self.cities)} cities failed")
+        return [a for r in results if r for a in r]
+
+    async def _fetch_city(self, client, city):
+        coords = await self._resolve(city)
+        if coords is None:
+            return []
+        params = {"lat": coords[0], "lon": coords[1], "exclude": "minutely,hourly,daily", "appid": self.api_key}
+        r = await client.get(OPENWEATHER_URL, params=params, endpoint="openweather.onecall")
+        return parse_openweather_alerts(city, r.json())
+
+    async def _resolve(self, city):
+        if city not in self._coords:
+            coords = gazetteer_lookup(city)
+            if coords is None:
+                # beyond the gazetteer: tiered geocoder (cached), off the event loop
+                coords = await asyncio.to_thread(geocode_location, city)
+            self._coords[city] = coords
+        return self._coords[city]
+
+
+def sources_from_env() -> List[FeedSource]:
+    """
+    ALERT_SOURCES: comma-separated source names (default "mock", plus "openweather" when an
+    OPENWEATHER_API_KEY is configured).
+    ALERT_POLL_INTERVAL / OPENWEATHER_POLL_INTERVAL: per-source intervals in seconds.
+    OPENWEATHER_CITIES: comma-separated city list (default: the mock feed's locations).
+    """
+    default = "mock,openweather" if OPENWEATHER_API_KEY else "mock"
+    names = [n.strip().lower() for n in os.getenv("ALERT_SOURCES", default).split(",") if n.strip()]
+    sources: List[FeedSource] = []
+    for name in names:
+        if name == "mock":
+            sources.append(MockFeedSource(interval=float(os.getenv("ALERT_POLL_INTERVAL", "10"))))
+        elif name == "openweather":
+            if not OPENWEATHER_API_KEY:
+                logger.warning("openweather source requested but OPENWEATHER_API_KEY is not set; skipping")
+                continue
+            cities = [c.strip() for c in os.getenv("OPENWEATHER_CITIES", "").split(",") if c.strip()] or LOCATIONS
+            sources.append(OpenWeatherFeedSource(
+                cities,
+                interval=float(os.getenv("OPENWEATHER_POLL_INTERVAL", "300")),
+                concurrency=int(os.getenv("OPENWEATHER_CONCURRENCY", "20")),
+            ))
+        else:
+            logger.warning("unknown alert source %r; skipping", name)
+    return sources
@@ -1,24 +1,190 @@
 # backend/tools/geocode_tool.py
-import os, requests
+"""
+Tiered geocoder. Lookup order for a place name:
+  1) in-process LRU (TTL)
+  2) on-disk SQLite cache (survives restarts)
+  3) local gazetteer file (tools/data/gazetteer.json or GAZETTEER_PATH, JSON or CSV)
+  4) Google Geocoding API
+Concurrent misses for the same name share one remote request.
+"""
+import csv
+import json
+import logging
+import os
+import threading
+
 from dotenv import load_dotenv
+
+from tools.cache import SingleFlight, SQLiteCache, TTLCache
+from tools.http_client import get_http_client
+from tools.tracing import traced
+
 load_dotenv()
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY", "")
+GOOGLE_MAPS_API_BASE = os.getenv("GOOGLE_MAPS_API_BASE", "https://maps.googleapis.com").rstrip("/")
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", os.path.join(_HERE, "data", "gazetteer.json"))
+# set GEOCODE_CACHE_DB="" to disable the on-disk tier
+GEOCODE_CACHE_DB = os.getenv(
+    "GEOCODE_CACHE_DB", os.path.normpath(os.path.join(_HERE, "..", "data", "geocode_cache.sqlite"))
+)
+GEOCODE_CACHE_TTL = float(os.getenv("GEOCODE_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+GEOCODE_NEGATIVE_TTL = float(os.getenv("GEOCODE_NEGATIVE_TTL_SECONDS", "300"))
+GEOCODE_LRU_SIZE = int(os.getenv("GEOCODE_LRU_SIZE", "4096"))
+
+logger = logging.getLogger("disaster-backend.geocode")
+
+
+def _normalize_name(name) -> str:
+    return " ".join(str(name).split()).casefold()
+
+
+# --------------------------
+# Gazetteer (local tier)
+# --------------------------
+_gazetteer = {}
+_gazetteer_lock = threading.Lock()
+
+
+def load_gazetteer(path: str = None) -> int:
+    """
+    (Re)load the local gazetteer. JSON: {"places": [{"name", "lat", "lon", "aliases": [...]}]}
+    or CSV with name,lat,lon[,aliases] columns (aliases separated by '|'). Returns entry count.
+    """
+    global _gazetteer
+    path = path or GAZETTEER_PATH
+    table = {}
+    try:
+        if path.endswith(".csv"):
+            with open(path, newline="", encoding="utf-8") as fh:
+                for row in csv.DictReader(fh):
+                    aliases = [x for x in (row.get("aliases") or "").split("|") if x]
+                    _add_place(table, row["name"], row["lat"], row["lon"], aliases)
+        else:
+            with open(path, encoding="utf-8") as fh:
+                data = json.load(fh)
+            for place in data.get("places", []):
+                _add_place(table, place["name"], place["lat"], place["lon"], place.get("aliases", []))
+    except FileNotFoundError:
+        logger.warning("gazetteer not found: %s", path)
+    except Exception:
+        logger.exception("failed to load gazetteer %s", path)
+    with _gazetteer_lock:
+        _gazetteer = table
+    return len(table)
+
+
+def _add_place(table, name, lat, lon, aliases):
+    coords = (float(lat), float(lon))
+    for n in [name, *aliases]:
+        table[_normalize_name(n)] = coords
+
+
+def gazetteer_lookup(location_name):
+    """Return (lat, lon) from the local gazetteer only, or None."""
+    if not location_name:
+        return None
+    return _gazetteer.get(_normalize_name(location_name))
+
+
+load_gazetteer()
 
+
+# --------------------------
+# Cache tiers
+# --------------------------
+_lru = TTLCache(maxsize=GEOCODE_LRU_SIZE, ttl_seconds=GEOCODE_CACHE_TTL)
+_disk = None
+if GEOCODE_CACHE_DB:
+    try:
+        _disk = SQLiteCache(GEOCODE_CACHE_DB, table="geocode", ttl_seconds=GEOCODE_CACHE_TTL)
+    except Exception:
+        logger.exception("geocode disk cache unavailable at %s", GEOCODE_CACHE_DB)
+_inflight = SingleFlight()
+
+_counters = {"lru_hits": 0, "disk_hits": 0, "gazetteer_hits": 0, "remote_calls": 0, "remote_failures": 0, "misses": 0}
+_counters_lock = threading.Lock()
+
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def geocode_stats() -> dict:
+    with _counters_lock:
+        out = dict(_counters)
+    out["coalesced"] = _inflight.coalesced
+    out["lru"] = _lru.stats()
+    out["disk"] = _disk.stats() if _disk is not None else None
+    out["gazetteer_size"] = len(_gazetteer)
+    return out
+
+
+@traced("tool.geocode_location")
 def geocode_location(location_name: str):
+    """
+    Return (lat, lon) for a place name, or None if no tier can resolve it.
+    """
+    if not location_name:
+        return None
+    key = _normalize_name(location_name)
+
+    cached = _lru.get(key, False)
+    if cached is not False:
+        _count("lru_hits")
+        return tuple(cached) if cached else None
+
+    return _inflight.do(key, lambda: _resolve_uncached(key, location_name))
+
+
+def _resolve_uncached(key, location_name):
+    if _disk is not None:
+        stored = _disk.get(key)
+        if stored:
+            _count("disk_hits")
+            coords = (stored[0], stored[1])
+            _lru.set(key, coords)
+            return coords
+
+    coords = _gazetteer.get(key)
+    if coords:
+        _count("gazetteer_hits")
+        _lru.set(key, coords)
+        return coords
+
+    coords = _geocode_remote(location_name)
+    if coords:
+        _lru.set(key, coords)
+        if _disk is not None:
+            try:
+                _disk.set(key, list(coords))
+            except Exception:
+                logger.exception("geocode disk cache write failed")
+    else:
+        _count("misses")
+        # remember failures briefly so an unknown name doesn't hammer the API
+        _lru.set(key, None, ttl_seconds=GEOCODE_NEGATIVE_TTL)
+    return coords
+
+
+def _geocode_remote(location_name):
     """
     Return (lat, lon) using Google Geocoding API.
     """
     if not GOOGLE_MAPS_API_KEY:
         return None
-    url = "https://maps.googleapis.com/maps/api/geocode/json"
+    _count("remote_calls")
+    url = f"{GOOGLE_MAPS_API_BASE}/maps/api/geocode/json"
     params = {"address": location_name, "key": GOOGLE_MAPS_API_KEY}
     try:
-        r = requests.get(url, params=params, timeout=8)
-        r.raise_for_status()
+        r = get_http_client().get(url, params=params, timeout=8, endpoint="maps.geocode")
         data = r.json()
         if data.get("results"):
             loc = data["results"][0]["geometry"]["location"]
             return (loc["lat"], loc["lng"])
     except Exception as e:
-        print("Geocode failed", e)
+        _count("remote_failures")
+        logger.warning("Geocode failed for %r: %s", location_name, e)
     return None
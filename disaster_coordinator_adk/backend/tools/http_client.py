@@ -0,0 +1,358 @@
+# backend/tools/http_client.py
+"""
+Shared HTTP client layer for the tools (Maps, Places, Directions, OpenWeather).
+
+- one keep-alive connection pool per process (sync) / per event loop (async), HTTP/2 when the
+  optional `h2` package is installed (httpx); falls back to a pooled requests.Session without httpx
+- per-host concurrency limits (HTTP_MAX_PER_HOST)
+- client-side rate limiting per host (HTTP_RATE_LIMITS="maps.googleapis.com=50,api.openweathermap.org=1")
+  so bursts stay under API quotas instead of turning into 429s
+- retries on connection errors, timeouts, 429 and 5xx with full-jitter exponential backoff,
+  honouring Retry-After (HTTP_RETRIES, HTTP_BACKOFF_BASE_SECONDS, HTTP_BACKOFF_MAX_SECONDS)
+- per-endpoint latency histograms and error counters (http_stats())
+- each call is an http.get trace span (CLIENT) when made inside a trace (tools/tracing.py)
+
+Base URLs of the upstream APIs are configurable in the tools (GOOGLE_MAPS_API_BASE,
+OPENWEATHER_API_BASE), so everything can be pointed at a local stub server.
+"""
+import asyncio
+import bisect
+import importlib.util
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from tools.tracing import span
+
+try:
+    import httpx
+except ImportError:     # requests-only fallback (sync); async calls run it in a worker thread
+    httpx = None
+
+_HTTP2 = importlib.util.find_spec("h2") is not None     # httpx speaks HTTP/2 only with h2 installed
+
+import requests
+
+logger = logging.getLogger("disaster-backend.http")
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "20"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE_SECONDS", "0.2"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX_SECONDS", "5"))
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def _parse_rate_limits(spec: str) -> Dict[str, float]:
+    out = {}
+    for item in spec.split(","):
+        host, _, rate = item.partition("=")
+        if host.strip() and rate.strip():
+            try:
+                out[host.strip().lower()] = float(rate)
+            except ValueError:
+                logger.warning("ignoring bad HTTP_RATE_LIMITS entry %r", item)
+    return out
+
+
+HTTP_RATE_LIMITS = _parse_rate_limits(os.getenv("HTTP_RATE_LIMITS", ""))
+
+
+class HttpStatusError(Exception):
+    def __init__(self, status_code: int, url: str):
+        super().__init__(f"HTTP {status_code} for {url}")
+        self.status_code = status_code
+
+
+# --------------------------
+# Rate limiting
+# --------------------------
+class RateLimiter:
+    """
+    Token bucket as virtual scheduling: reserve() books the next free slot and returns how long
+    the caller must wait for it, so sync callers sleep and async callers await the same limiter.
+    """
+
+    def __init__(self, rate_per_second: float, burst: Optional[int] = None):
+        self.interval = 1.0 / rate_per_second
+        self.burst = max(1, int(burst if burst is not None else max(1, rate_per_second)))
+        self._next = 0.0     # starts with a full bucket
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            # allow up to `burst` requests back-to-back after an idle period
+            self._next = max(self._next, now - (self.burst - 1) * self.interval)
+            wait = max(0.0, self._next - now)
+            self._next += self.interval
+            return wait
+
+
+# --------------------------
+# Latency histograms
+# --------------------------
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)    # last slot: > largest bucket
+        self.count = 0
+        self.sum_ms = 0.0
+        self.errors = 0
+        self.retries = 0
+        self.status: Dict[str, int] = {}
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bucket bound containing the q-quantile (None for the overflow bucket / no data)."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return float(self.buckets[i]) if i < len(self.buckets) else None
+        return None
+
+    def snapshot(self) -> Dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "status": dict(self.status),
+            "avg_ms": self.sum_ms / self.count if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets_ms": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.counts)),
+        }
+
+
+_histograms: Dict[str, LatencyHistogram] = {}
+_histograms_lock = threading.Lock()
+_limiters: Dict[str, Optional[RateLimiter]] = {}
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+_policy_lock = threading.Lock()
+
+
+def _endpoint(url: str, name: Optional[str]) -> str:
+    if name:
+        return name
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}"
+
+
+def _record(endpoint, ms=None, status=None, error=False, retry=False):
+    with _histograms_lock:
+        h = _histograms.get(endpoint)
+        if h is None:
+            h = _histograms[endpoint] = LatencyHistogram()
+        if ms is not None:
+            h.observe(ms)
+        if status is not None:
+            h.status[str(status)] = h.status.get(str(status), 0) + 1
+        if error:
+            h.errors += 1
+        if retry:
+            h.retries += 1
+
+
+def http_stats() -> Dict:
+    with _histograms_lock:
+        return {name: h.snapshot() for name, h in sorted(_histograms.items())}
+
+
+def _limiter(host) -> Optional[RateLimiter]:
+    with _policy_lock:
+        if host not in _limiters:
+            rate = HTTP_RATE_LIMITS.get(host)
+            _limiters[host] = RateLimiter(rate) if rate else None
+        return _limiters[host]
+
+
+def _host_slot(host) -> threading.BoundedSemaphore:
+    with _policy_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(HTTP_MAX_PER_HOST)
+        return slot
+
+
+def _backoff(attempt: int, retry_after=None) -> float:
+    if retry_after:
+        try:
+            return min(HTTP_BACKOFF_MAX, float(retry_after))
+        except (TypeError, ValueError):
+            pass
+    # full jitter: uniform(0, base * 2^attempt), capped
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+
+def _should_retry(status_code) -> bool:
+    return status_code in _RETRY_STATUS
+
+
+# --------------------------
+# Sync client
+# --------------------------
+class HttpClient:
+    def __init__(self, timeout: float = HTTP_TIMEOUT, retries: int = HTTP_RETRIES):
+        self.timeout = timeout
+        self.retries = retries
+        if httpx is not None:
+            limits = httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS)
+            self._client = httpx.Client(http2=_HTTP2, limits=limits, timeout=timeout)
+            self._transient = (httpx.TransportError,)
+        else:
+            self._client = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_MAX_CONNECTIONS, pool_maxsize=HTTP_MAX_CONNECTIONS)
+            self._client.mount("http://", adapter)
+            self._client.mount("https://", adapter)
+            self._transient = (requests.ConnectionError, requests.Timeout)
+
+    def get(self, url: str, params=None, timeout: Optional[float] = None, endpoint: Optional[str] = None):
+        """
+        GET with pooling, per-host limits and retries. Returns the response (status < 400);
+        raises HttpStatusError for final 4xx/5xx responses, or the transport error.
+        """
+        with span("http.get", kind="CLIENT", **{"http.endpoint": _endpoint(url, endpoint)}) as s:
+            r = self._get(url, params, timeout, endpoint)
+            if s is not None:
+                s.set_attribute("http.status_code", r.status_code)
+            return r
+
+    def _get(self, url, params, timeout, endpoint):
+        host = (urlsplit(url).hostname or "").lower()
+        name = _endpoint(url, endpoint)
+        limiter = _limiter(host)
+        for attempt in range(self.retries + 1):
+            if limiter is not None:
+                wait = limiter.reserve()
+                if wait > 0:
+                    time.sleep(wait)
+            started = time.perf_counter()
+            try:
+                with _host_slot(host):
+                    r = self._client.get(url, params=params, timeout=timeout or self.timeout)
+            except self._transient as e:
+                _record(name, (time.perf_counter() - started) * 1000.0, error=True)
+                if attempt >= self.retries:
+                    raise
+                _record(name, retry=True)
+                logger.debug("GET %s failed (%s); retrying", name, e)
+                time.sleep(_backoff(attempt))
+                continue
+            _record(name, (time.perf_counter() - started) * 1000.0, status=r.status_code, error=r.status_code >= 400)
+            if _should_retry(r.status_code) and attempt < self.retries:
+                _record(name, retry=True)
+                time.sleep(_backoff(attempt, r.headers.get("Retry-After")))
+                continue
+            if r.status_code >= 400:
+                raise HttpStatusError(r.status_code, name)
+            return r
+
+    def close(self):
+        self._client.close()
+
+
+# --------------------------
+# Async client
+# --------------------------
+class AsyncHttpClient:
+    """Async counterpart of HttpClient. Create it inside the event loop that will use it."""
+
+    def __init__(self, timeout: float = HTTP_TIMEOUT, retries: int = HTTP_RETRIES):
+        self.timeout = timeout
+        self.retries = retries
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+        self._client = None
+        self._sync = None
+        if httpx is not None:
+            limits = httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS)
+            self._client = httpx.AsyncClient(http2=_HTTP2, limits=limits, timeout=timeout)
+        else:
+            self._sync = HttpClient(timeout, retries=0)
+
+    async def get(self, url: str, params=None, timeout: Optional[float] = None, endpoint: Optional[str] = None):
+        with span("http.get", kind="CLIENT", **{"http.endpoint": _endpoint(url, endpoint)}) as s:
+            r = await self._get(url, params, timeout, endpoint)
+            if s is not None:
+                s.set_attribute("http.status_code", r.status_code)
+            return r
+
+    async def _get(self, url, params, timeout, endpoint):
+        host = (urlsplit(url).hostname or "").lower()
+        name = _endpoint(url, endpoint)
+        limiter = _limiter(host)
+        slot = self._slots.get(host)
+        if slot is None:
+            slot = self._slots[host] = asyncio.Semaphore(HTTP_MAX_PER_HOST)
+        for attempt in range(self.retries + 1):
+            if limiter is not None:
+                wait = limiter.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            started = time.perf_counter()
+            try:
+                async with slot:
+                    if self._client is not None:
+                        r = await self._client.get(url, params=params, timeout=timeout or self.timeout)
+                    else:
+                        r = await asyncio.to_thread(self._sync._client.get, url, params=params,
+                                                    timeout=timeout or self.timeout)
+            except Exception as e:
+                if isinstance(e, asyncio.CancelledError) or not self._is_transient(e):
+                    raise
+                _record(name, (time.perf_counter() - started) * 1000.0, error=True)
+                if attempt >= self.retries:
+                    raise
+                _record(name, retry=True)
+                await asyncio.sleep(_backoff(attempt))
+                continue
+            _record(name, (time.perf_counter() - started) * 1000.0, status=r.status_code, error=r.status_code >= 400)
+            if _should_retry(r.status_code) and attempt < self.retries:
+                _record(name, retry=True)
+                await asyncio.sleep(_backoff(attempt, r.headers.get("Retry-After")))
+                continue
+            if r.status_code >= 400:
+                raise HttpStatusError(r.status_code, name)
+            return r
+
+    @staticmethod
+    def _is_transient(e) -> bool:
+        if httpx is not None and isinstance(e, httpx.TransportError):
+            return True
+        return isinstance(e, (requests.ConnectionError, requests.Timeout))
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+        if self._sync is not None:
+            self._sync.close()
+
+
+_shared: Optional[HttpClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Process-wide sync client (created on first use)."""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = HttpClient()
+    return _shared
@@ -0,0 +1,230 @@
+# backend/tools/ingest.py
+"""
+Async ingestion scheduler for alert feed sources (tools/feed_sources.py).
+
+One asyncio event loop (in its own daemon thread) drives every source on its own schedule:
+
+- per-source interval with +/- jitter so sources don't align
+- a poll is cancelled if it runs past the source's timeout (defaults to its interval)
+- failures back off exponentially (capped) instead of retrying every interval
+- a circuit breaker opens after `breaker_threshold` consecutive failures and stays open for
+  `breaker_cooldown` seconds; the next poll is a single half-open trial
+- every source shares one AsyncHttpClient (tools/http_client.py: keep-alive pool, per-host
+  limits, rate limiting, retries)
+
+Fetched batches are handed to `sink(source_name, alerts)` on a worker thread, so slow
+enrichment / commit never blocks the loop or other sources.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from tools.http_client import AsyncHttpClient
+
+logger = logging.getLogger("disaster-backend.ingest")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int = 5, cooldown: float = 60.0):
+        self.threshold = max(1, int(threshold))
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return CLOSED
+        return HALF_OPEN if time.monotonic() - self.opened_at >= self.cooldown else OPEN
+
+    def allow(self) -> bool:
+        return self.state != OPEN
+
+    def remaining(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.threshold:
+            if self.state != OPEN:
+                self.trips += 1
+            self.opened_at = time.monotonic()
+
+
+class _SourceState:
+    def __init__(self, source, breaker: CircuitBreaker):
+        self.source = source
+        self.breaker = breaker
+        self.polls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.consecutive_failures = 0
+        self.alerts = 0
+        self.last_count = 0
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+        self.last_error: Optional[str] = None
+        self.last_poll: Optional[float] = None
+        self.next_poll: Optional[float] = None
+
+    def stats(self) -> Dict:
+        return {
+            "interval": self.source.interval,
+            "polls": self.polls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "consecutive_failures": self.consecutive_failures,
+            "alerts": self.alerts,
+            "last_count": self.last_count,
+            "last_ms": self.last_ms,
+            "max_ms": self.max_ms,
+            "last_error": self.last_error,
+            "last_poll": self.last_poll,
+            "next_in_s": max(0.0, self.next_poll - time.time()) if self.next_poll else None,
+            "breaker": self.breaker.state,
+            "breaker_trips": self.breaker.trips,
+        }
+
+
+class IngestScheduler:
+    def __init__(self, sources, sink: Callable[[str, List[Dict]], None], jitter: float = 0.1,
+                 max_backoff: float = 300.0, breaker_threshold: int = 5, breaker_cooldown: float = 60.0,
+                 sink_workers: int = 1):
+        self.sink = sink
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self._states = {s.name: _SourceState(s, CircuitBreaker(breaker_threshold, breaker_cooldown)) for s in sources}
+        self._sink_workers = sink_workers
+        self._sink_pool: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    # --------------------------
+    # Lifecycle
+    # --------------------------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        # a fresh pool per run, so a stopped scheduler can be started again (producer failover)
+        self._sink_pool = ThreadPoolExecutor(max_workers=self._sink_workers, thread_name_prefix="ingest-sink")
+        self._thread = threading.Thread(target=self._run, name="alert-ingest", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        if self._loop is not None and self._stopping is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._sink_pool is not None:
+            self._sink_pool.shutdown(wait=False)
+
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._main())
+        except Exception:
+            logger.exception("ingest loop crashed")
+        finally:
+            self._loop.close()
+
+    async def _main(self):
+        self._stopping = asyncio.Event()
+        client = AsyncHttpClient()
+        logger.info("ingest scheduler started: %s", ", ".join(self._states) or "no sources")
+        tasks = [asyncio.create_task(self._source_loop(st, client)) for st in self._states.values()]
+        try:
+            await self._stopping.wait()
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await client.aclose()
+
+    # --------------------------
+    # Per-source loop
+    # --------------------------
+    async def _source_loop(self, st: _SourceState, client):
+        # stagger the first polls a little as well
+        await asyncio.sleep(random.uniform(0, self.jitter * st.source.interval))
+        while True:
+            if st.breaker.allow():
+                await self.poll(st.source.name, client)
+            delay = self._next_delay(st)
+            st.next_poll = time.time() + delay
+            await asyncio.sleep(delay)
+
+    def _next_delay(self, st: _SourceState) -> float:
+        interval = st.source.interval
+        if st.breaker.state == OPEN:
+            return st.breaker.remaining()
+        if st.consecutive_failures:
+            interval = min(self.max_backoff, interval * (2 ** min(st.consecutive_failures, 10)))
+        return max(0.0, interval * (1.0 + random.uniform(-self.jitter, self.jitter)))
+
+    async def poll(self, name: str, client=None) -> int:
+        """Poll one source now and hand its alerts to the sink. Returns the number of alerts fetched."""
+        st = self._states[name]
+        started = time.perf_counter()
+        st.polls += 1
+        st.last_poll = time.time()
+        try:
+            alerts = await asyncio.wait_for(st.source.fetch(client), timeout=st.source.timeout)
+        except asyncio.TimeoutError:
+            st.timeouts += 1
+            self._failed(st, f"timed out after {st.source.timeout:.1f}s", started)
+            return 0
+        except Exception as e:
+            self._failed(st, str(e), started)
+            return 0
+
+        alerts = [a for a in (alerts or []) if isinstance(a, dict)]
+        st.breaker.record_success()
+        st.consecutive_failures = 0
+        st.last_error = None
+        st.last_count = len(alerts)
+        st.alerts += len(alerts)
+        self._timed(st, started)
+        if alerts:
+            loop = asyncio.get_running_loop()
+            loop.run_in_executor(self._sink_pool, self._deliver, name, alerts)
+        return len(alerts)
+
+    def _deliver(self, name, alerts):
+        try:
+            self.sink(name, alerts)
+        except Exception:
+            logger.exception("ingest sink failed for %s (%d alerts)", name, len(alerts))
+
+    def _failed(self, st: _SourceState, error: str, started: float):
+        st.failures += 1
+        st.consecutive_failures += 1
+        st.last_error = error
+        st.breaker.record_failure()
+        self._timed(st, started)
+        logger.warning("source %s poll failed (%d in a row, breaker %s): %s",
+                       st.source.name, st.consecutive_failures, st.breaker.state, error)
+
+    @staticmethod
+    def _timed(st: _SourceState, started: float):
+        st.last_ms = (time.perf_counter() - started) * 1000.0
+        st.max_ms = max(st.max_ms, st.last_ms)
+
+    def stats(self) -> Dict:
+        return {name: st.stats() for name, st in self._states.items()}
@@ -0,0 +1,243 @@
+# backend/tools/metrics.py
+"""
+Minimal Prometheus-style metrics registry (text exposition format 0.0.4), no dependencies.
+
+- Counter / Gauge / Histogram with labels, updated on the hot paths (cheap: one lock + dict op)
+- collectors: callables run at scrape time that turn existing stats dicts (caches, HTTP client,
+  alert store) into metric families, so those modules don't need to know about metrics at all
+- REGISTRY.render() produces the body served at GET /metrics
+
+All metric names are prefixed with METRICS_PREFIX (default "disaster_").
+"""
+import bisect
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("disaster-backend.metrics")
+
+METRICS_PREFIX = os.getenv("METRICS_PREFIX", "disaster_")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds; covers sub-millisecond lock sections up to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LOCK_BUCKETS = (0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.1)
+COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+def _fmt(value) -> str:
+    if value is None:
+        return "NaN"
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if value.is_integer():
+            return str(int(value))
+        return repr(value)
+    return str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = METRICS_PREFIX + name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, object] = {}
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._values.items())
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (math.inf,), counts):
+                cumulative += c
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, ('le', _fmt(float(bound))))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricFamily:
+    """A metric computed at scrape time by a collector."""
+
+    def __init__(self, name: str, kind: str, documentation: str):
+        self.name = METRICS_PREFIX + name
+        self.kind = kind
+        self.documentation = documentation
+        self.samples: List[Tuple[str, Dict, float]] = []
+
+    def add(self, value, suffix: str = "", **labels):
+        self.samples.append((suffix, labels, value))
+        return self
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples:
+            lines.append(f"{self.name}{suffix}{_labels(labels.keys(), labels.values())} {_fmt(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, fn: Callable[[], Iterable[MetricFamily]]):
+        with self._lock:
+            self._collectors.append(fn)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for fn in collectors:
+            try:
+                for family in fn():
+                    lines.extend(family.render())
+            except Exception:
+                # one broken collector must not take the whole scrape down
+                logger.exception("metrics collector %s failed", getattr(fn, "__name__", fn))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+# --------------------------
+# Helpers for stats dicts
+# --------------------------
+def cache_families(caches: Dict[str, Optional[Dict]]) -> List[MetricFamily]:
+    """
+    hits / misses / hit ratio / size per cache from {cache_name: TTLCache/SQLiteCache-style stats}.
+    Entries without hit counters (or None, e.g. a disabled disk tier) are skipped.
+    """
+    hits = MetricFamily("cache_hits_total", "counter", "Cache hits per cache")
+    misses = MetricFamily("cache_misses_total", "counter", "Cache misses per cache")
+    ratio = MetricFamily("cache_hit_ratio", "gauge", "Cache hit ratio since start per cache")
+    size = MetricFamily("cache_entries", "gauge", "Entries held per in-memory cache")
+    for name, st in sorted(caches.items()):
+        if not st or "hits" not in st:
+            continue
+        hits.add(st["hits"], cache=name)
+        misses.add(st["misses"], cache=name)
+        ratio.add(st.get("hit_ratio", 0.0), cache=name)
+        if "size" in st:
+            size.add(st["size"], cache=name)
+    return [hits, misses, ratio, size]
+
+
+def millisecond_histogram_family(name: str, documentation: str, snapshots: Dict[str, Dict],
+                                 label: str) -> MetricFamily:
+    """
+    Convert tools.http_client-style histogram snapshots ({"buckets_ms": {bound: count}, "count",
+    "avg_ms"}, non-cumulative) into one Prometheus histogram in seconds.
+    """
+    family = MetricFamily(name, "histogram", documentation)
+    for key, snap in sorted(snapshots.items()):
+        cumulative = 0
+        for bound, c in snap.get("buckets_ms", {}).items():
+            cumulative += c
+            le = "+Inf" if bound == "+Inf" else _fmt(float(bound) / 1000.0)
+            family.add(cumulative, "_bucket", **{label: key, "le": le})
+        count = snap.get("count", 0)
+        family.add(snap.get("avg_ms", 0.0) * count / 1000.0, "_sum", **{label: key})
+        family.add(count, "_count", **{label: key})
+    return family
@@ -0,0 +1,230 @@
+# backend/tools/shelter_index.py
+"""
+Local shelter registry backed by a lat/lon grid index.
+
+Shelters are bucketed into fixed-size degree cells; k-nearest and radius queries only
+visit the cells around the query point and rank candidates by haversine distance, so
+lookups stay well under a millisecond for registries of 100k+ shelters.
+Registries load from CSV (id,name,lat,lon,capacity,occupancy) or GeoJSON point features.
+"""
+import csv
+import heapq
+import json
+import logging
+import math
+import os
+import threading
+from typing import Dict, List, Optional
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEG_LAT = 111320.0
+
+logger = logging.getLogger("disaster-backend.shelters")
+
+
+def haversine_m(lat1, lon1, lat2, lon2) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+class ShelterRegistry:
+    def __init__(self, cell_deg: float = 0.1):
+        self.cell_deg = float(cell_deg)
+        self._lon_cells = int(round(360.0 / self.cell_deg))
+        self._lock = threading.Lock()
+        self._shelters: Dict[str, Dict] = {}
+        self._grid: Dict[tuple, List[Dict]] = {}
+
+    def __len__(self):
+        return len(self._shelters)
+
+    # --------------------------
+    # Loading / updates
+    # --------------------------
+    def load(self, path: str) -> int:
+        """Load shelters from a .csv or .geojson/.json file. Returns number of shelters loaded."""
+        if path.endswith(".csv"):
+            with open(path, newline="", encoding="utf-8") as fh:
+                rows = list(csv.DictReader(fh))
+        else:
+            with open(path, encoding="utf-8") as fh:
+                data = json.load(fh)
+            rows = []
+            for feat in data.get("features", []):
+                geom = feat.get("geometry") or {}
+                if geom.get("type") != "Point":
+                    continue
+                lon, lat = geom["coordinates"][:2]
+                rows.append({**(feat.get("properties") or {}), "lat": lat, "lon": lon})
+        count = 0
+        for row in rows:
+            try:
+                self.add(row)
+                count += 1
+            except (KeyError, TypeError, ValueError):
+                logger.warning("skipping malformed shelter row: %s", row)
+        return count
+
+    def add(self, row: Dict) -> Dict:
+        lat, lon = float(row["lat"]), float(row["lon"])
+        shelter_id = str(row.get("id") or f"shelter-{lat:.5f},{lon:.5f}")
+        shelter = {
+            "id": shelter_id,
+            "name": row.get("name") or shelter_id,
+            "lat": lat,
+            "lon": lon,
+            "capacity": int(float(row.get("capacity") or 0)),
+            "occupancy": int(float(row.get("occupancy") or 0)),
+        }
+        with self._lock:
+            old = self._shelters.get(shelter_id)
+            if old is not None:
+                self._grid[self._cell(old["lat"], old["lon"])].remove(old)
+            self._shelters[shelter_id] = shelter
+            self._grid.setdefault(self._cell(lat, lon), []).append(shelter)
+        return shelter
+
+    def update_occupancy(self, shelter_id: str, occupancy: Optional[int] = None, delta: int = 0) -> Optional[Dict]:
+        """Set (or adjust by `delta`) a shelter's current occupancy."""
+        with self._lock:
+            shelter = self._shelters.get(shelter_id)
+            if shelter is None:
+                return None
+            value = shelter["occupancy"] if occupancy is None else int(occupancy)
+            shelter["occupancy"] = max(0, value + int(delta))
+            return dict(shelter)
+
+    # --------------------------
+    # Queries
+    # --------------------------
+    def nearest(self, lat: float, lon: float, k: int = 5, min_available: int = 0,
+                max_distance_m: Optional[float] = None) -> List[Dict]:
+        """k nearest shelters with at least `min_available` free places, closest first."""
+        if not self._shelters or k <= 0:
+            return []
+        ci, cj = self._cell(lat, lon)
+        best = []   # max-heap via negated distance: (-d, id, shelter)
+        max_ring = self._max_ring(lat, max_distance_m)
+        ring = 0
+        while ring <= max_ring:
+            if (2 * ring + 1) ** 2 > 4 * len(self._grid):
+                # sparse registry: scanning every shelter is cheaper than widening the search
+                return self._nearest_scan(lat, lon, k, min_available, max_distance_m)
+            for cell in self._ring_cells(ci, cj, ring):
+                for s in self._grid.get(cell, ()):
+                    if s["capacity"] - s["occupancy"] < min_available:
+                        continue
+                    d = haversine_m(lat, lon, s["lat"], s["lon"])
+                    if max_distance_m is not None and d > max_distance_m:
+                        continue
+                    item = (-d, s["id"], s)
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif -best[0][0] > d:
+                        heapq.heapreplace(best, item)
+            # anything in ring+1 or further is at least this far away
+            if len(best) >= k and -best[0][0] <= self._ring_min_distance_m(lat, ring):
+                break
+            ring += 1
+        return [self._result(s, -neg_d) for neg_d, _, s in sorted(best, reverse=True)]
+
+    def _nearest_scan(self, lat, lon, k, min_available, max_distance_m):
+        scored = []
+        for s in list(self._shelters.values()):
+            if s["capacity"] - s["occupancy"] < min_available:
+                continue
+            d = haversine_m(lat, lon, s["lat"], s["lon"])
+            if max_distance_m is None or d <= max_distance_m:
+                scored.append((d, s))
+        return [self._result(s, d) for d, s in heapq.nsmallest(k, scored, key=lambda x: x[0])]
+
+    def within_radius(self, lat: float, lon: float, radius_m: float, min_available: int = 0,
+                      limit: Optional[int] = None) -> List[Dict]:
+        """All shelters within `radius_m` (sorted by distance) with at least `min_available` free places."""
+        if not self._shelters:
+            return []
+        dlat = radius_m / METERS_PER_DEG_LAT
+        cos_lat = max(math.cos(math.radians(min(89.9, abs(lat) + dlat))), 1e-6)
+        dlon = min(180.0, radius_m / (METERS_PER_DEG_LAT * cos_lat))
+        i0, j0 = self._cell(lat - dlat, lon - dlon)
+        i1 = self._cell(lat + dlat, lon)[0]
+        span = min(self._lon_cells - 1, int(math.ceil(2 * dlon / self.cell_deg)) + 1)
+        found = []
+        for i in range(i0, i1 + 1):
+            for dj in range(span + 1):
+                for s in self._grid.get((i, (j0 + dj) % self._lon_cells), ()):
+                    if s["capacity"] - s["occupancy"] < min_available:
+                        continue
+                    d = haversine_m(lat, lon, s["lat"], s["lon"])
+                    if d <= radius_m:
+                        found.append((d, s))
+        found.sort(key=lambda x: x[0])
+        if limit is not None:
+            found = found[:limit]
+        return [self._result(s, d) for d, s in found]
+
+    # --------------------------
+    # Internals
+    # --------------------------
+    def _cell(self, lat, lon):
+        return (int(math.floor(lat / self.cell_deg)), int(math.floor((lon + 180.0) / self.cell_deg)) % self._lon_cells)
+
+    def _ring_cells(self, ci, cj, ring):
+        if ring == 0:
+            yield (ci, cj)
+            return
+        for di in range(-ring, ring + 1):
+            step = 1 if abs(di) == ring else 2 * ring
+            for dj in range(-ring, ring + 1, step):
+                yield (ci + di, (cj + dj) % self._lon_cells)
+
+    def _ring_min_distance_m(self, lat, ring):
+        # lower bound on the distance from the query point to any cell outside `ring`
+        reach_deg = ring * self.cell_deg
+        cos_lat = max(math.cos(math.radians(min(89.9, abs(lat) + reach_deg + self.cell_deg))), 1e-6)
+        return reach_deg * METERS_PER_DEG_LAT * cos_lat
+
+    def _max_ring(self, lat, max_distance_m):
+        if max_distance_m is None:
+            return self._lon_cells // 2
+        cos_lat = max(math.cos(math.radians(min(89.9, abs(lat) + max_distance_m / METERS_PER_DEG_LAT))), 1e-6)
+        return int(math.ceil(max_distance_m / (METERS_PER_DEG_LAT * cos_lat * self.cell_deg))) + 1
+
+    @staticmethod
+    def _result(shelter, distance_m):
+        out = dict(shelter)
+        out["available"] = max(0, shelter["capacity"] - shelter["occupancy"])
+        out["distance_m"] = round(distance_m, 1)
+        out["source"] = "registry"
+        return out
+
+
+# --------------------------
+# Process-wide registry (loaded lazily on first use)
+# --------------------------
+_HERE = os.path.dirname(os.path.abspath(__file__))
+SHELTER_REGISTRY_PATH = os.getenv("SHELTER_REGISTRY_PATH", os.path.join(_HERE, "data", "shelters_sample.csv"))
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_shelter_registry() -> ShelterRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                reg = ShelterRegistry()
+                if SHELTER_REGISTRY_PATH:
+                    try:
+                        n = reg.load(SHELTER_REGISTRY_PATH)
+                        logger.info("loaded %d shelters from %s", n, SHELTER_REGISTRY_PATH)
+                    except FileNotFoundError:
+                        logger.warning("shelter registry not found: %s", SHELTER_REGISTRY_PATH)
+                    except Exception:
+                        logger.exception("failed to load shelter registry %s", SHELTER_REGISTRY_PATH)
+                _registry = reg
+    return _registry
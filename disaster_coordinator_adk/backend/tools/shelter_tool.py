@@ -1,18 +1,34 @@
 # backend/tools/shelter_tool.py
-import os, requests
+import os
+import logging
 from dotenv import load_dotenv
+from tools.http_client import get_http_client
+from tools.shelter_index import get_shelter_registry
+from tools.tracing import traced
 load_dotenv()
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY", "")
+GOOGLE_MAPS_API_BASE = os.getenv("GOOGLE_MAPS_API_BASE", "https://maps.googleapis.com").rstrip("/")
 
-def find_nearby_shelters(lat, lon, radius_m=5000, type_filter="school"):
+logger = logging.getLogger("disaster-backend.shelters")
+
+@traced("tool.find_nearby_shelters")
+def find_nearby_shelters(lat, lon, radius_m=5000, type_filter="school", min_available=1, limit=10):
     """
-    Use Google Places nearbysearch for shelters. Google Places may classify shelters as 'church',
-    'school', 'community_center' etc. You can also maintain your own shelters DB.
+    Nearby shelters, closest first. The local shelter registry (tools/shelter_index.py) is queried
+    first; Google Places nearbysearch is only used when the registry has nothing within radius_m.
+    Google Places may classify shelters as 'church', 'school', 'community_center' etc.
     """
+    try:
+        local = get_shelter_registry().within_radius(lat, lon, radius_m, min_available=min_available, limit=limit)
+        if local:
+            return local
+    except Exception:
+        logger.exception("shelter registry query failed")
+
     if not GOOGLE_MAPS_API_KEY:
         # fallback: return empty list or local mock
         return [{"name": "Central Shelter", "lat": lat+0.01, "lon": lon+0.01, "capacity": 200}]
-    url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+    url = f"{GOOGLE_MAPS_API_BASE}/maps/api/place/nearbysearch/json"
     params = {
         "key": GOOGLE_MAPS_API_KEY,
         "location": f"{lat},{lon}",
@@ -20,14 +36,13 @@ def find_nearby_shelters(lat, lon, radius_m=5000, type_filter="school"):
         "keyword": "shelter OR community center OR school"
     }
     try:
-        r = requests.get(url, params=params, timeout=8)
-        r.raise_for_status()
+        r = get_http_client().get(url, params=params, timeout=8, endpoint="maps.places_nearby")
         data = r.json()
         results = []
-        for ritem in data.get("results", [])[:10]:
+        for ritem in data.get("results", [])[:limit]:
             loc = ritem["geometry"]["location"]
-            results.append({"name": ritem.get("name"), "lat": loc["lat"], "lon": loc["lng"], "place_id": ritem.get("place_id")})
+            results.append({"name": ritem.get("name"), "lat": loc["lat"], "lon": loc["lng"], "place_id": ritem.get("place_id"), "source": "places"})
         return results
     except Exception as e:
-        print("Places nearby search failed", e)
+        logger.warning("Places nearby search failed: %s", e)
         return []
@@ -0,0 +1,329 @@
+# backend/tools/tracing.py
+"""
+Lightweight in-process tracing with an OpenTelemetry-compatible span model.
+
+- start_trace(name) opens a root span (sampled with probability TRACE_SAMPLE_RATE); span(name)
+  opens a child of the current span, and is a no-op outside a sampled trace, so instrumented
+  code paths (tools, MemoryBank, HTTP client) cost one ContextVar lookup when nobody traces them
+- the current span lives in a ContextVar: it follows asyncio tasks, and run_in_context(fn)
+  carries it onto worker threads (ThreadPoolExecutor does not copy context by itself)
+- spans carry OTel field names (trace_id / span_id as 32 / 16 hex chars, parent_span_id,
+  start/end_time_unix_nano, attributes, status {code, message}), so exported traces can be
+  replayed into an OTel collector later
+- finished traces go to an in-memory ring buffer (TRACE_BUFFER traces, served by
+  /api/traces) and, when TRACE_FILE is set, are appended to it as JSON lines
+- TraceLogFilter adds the current trace id to log records
+
+Spans that end after their root (e.g. a plan stage that missed its deadline) still appear in the
+in-memory trace, flagged "late", but not in the file export.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import random
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger("disaster-backend.tracing")
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+TRACE_BUFFER = int(os.getenv("TRACE_BUFFER", "500"))
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+
+STATUS_UNSET, STATUS_OK, STATUS_ERROR = "UNSET", "OK", "ERROR"
+
+_current: contextvars.ContextVar = contextvars.ContextVar("disaster_current_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_span_id", "name", "kind", "start_ns", "end_ns",
+                 "attributes", "status", "status_message", "thread")
+
+    def __init__(self, trace: "_Trace", name: str, parent_span_id: Optional[str] = None,
+                 kind: str = "INTERNAL", attributes: Optional[Dict] = None):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes or {})
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self.thread = threading.current_thread().name
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def set_status(self, status: str, message: str = ""):
+        self.status = status
+        self.status_message = message
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.trace.span_ended(self)
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "attributes": dict(self.attributes, **{"thread.name": self.thread}),
+            "status": {"code": self.status, "message": self.status_message},
+        }
+
+
+class _Trace:
+    def __init__(self, tracer: "Tracer"):
+        self.tracer = tracer
+        self.trace_id = secrets.token_hex(16)
+        self.root: Optional[Span] = None
+        self.spans: List[Span] = []
+        self.exported = False
+        self._lock = threading.Lock()
+
+    def span_ended(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+            if self.exported:
+                span.attributes["late"] = True
+                return
+            if span is not self.root:
+                return
+            self.exported = True
+        self.tracer.export(self)
+
+
+# --------------------------
+# Exporters
+# --------------------------
+class InMemoryExporter:
+    """Keeps the most recent `maxlen` traces for /api/traces."""
+
+    def __init__(self, maxlen: int = TRACE_BUFFER):
+        self.maxlen = maxlen
+        self._traces: "OrderedDict[str, _Trace]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def export(self, trace: _Trace):
+        with self._lock:
+            self._traces[trace.trace_id] = trace
+            while len(self._traces) > self.maxlen:
+                self._traces.popitem(last=False)
+
+    def get(self, trace_id: str) -> Optional[_Trace]:
+        with self._lock:
+            return self._traces.get(trace_id)
+
+    def recent(self) -> List[_Trace]:
+        with self._lock:
+            return list(reversed(self._traces.values()))
+
+
+class FileExporter:
+    """Appends each finished trace as one JSON line: {"trace_id", "spans": [...]}."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def export(self, trace: _Trace):
+        line = json.dumps({"trace_id": trace.trace_id, "spans": [s.to_dict() for s in list(trace.spans)]},
+                          default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+# --------------------------
+# Tracer
+# --------------------------
+class Tracer:
+    def __init__(self, sample_rate: float = TRACE_SAMPLE_RATE, exporters=None):
+        self.sample_rate = sample_rate
+        self.memory = InMemoryExporter()
+        self.exporters = [self.memory] + list(exporters or [])
+        self.started = 0
+        self.sampled_out = 0
+
+    def export(self, trace: _Trace):
+        for exporter in self.exporters:
+            try:
+                exporter.export(trace)
+            except Exception:
+                logger.exception("trace exporter %s failed", type(exporter).__name__)
+
+    @contextmanager
+    def start_trace(self, name: str, kind: str = "SERVER", attributes: Optional[Dict] = None):
+        """Root span of a new trace, or None (and no child spans) when sampled out."""
+        self.started += 1
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self.sampled_out += 1
+            token = _current.set(None)
+            try:
+                yield None
+            finally:
+                _current.reset(token)
+            return
+        trace = _Trace(self)
+        trace.root = Span(trace, name, kind=kind, attributes=attributes)
+        with self._activate(trace.root) as s:
+            yield s
+
+    @contextmanager
+    def span(self, name: str, kind: str = "INTERNAL", attributes: Optional[Dict] = None):
+        """Child of the current span; a no-op (yields None) outside a sampled trace."""
+        parent = _current.get()
+        if parent is None:
+            yield None
+            return
+        with self._activate(Span(parent.trace, name, parent.span_id, kind, attributes)) as s:
+            yield s
+
+    @contextmanager
+    def _activate(self, span: Span):
+        token = _current.set(span)
+        try:
+            yield span
+            if span.status == STATUS_UNSET:
+                span.status = STATUS_OK
+        except BaseException as e:
+            span.set_status(STATUS_ERROR, f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current.reset(token)
+            span.end()
+
+    def stats(self) -> Dict:
+        return {"sample_rate": self.sample_rate, "started": self.started, "sampled_out": self.sampled_out,
+                "buffered": len(self.memory.recent())}
+
+
+def tracer_from_env() -> Tracer:
+    exporters = [FileExporter(TRACE_FILE)] if TRACE_FILE else []
+    return Tracer(TRACE_SAMPLE_RATE, exporters)
+
+
+TRACER = tracer_from_env()
+
+
+# --------------------------
+# Module-level helpers
+# --------------------------
+def start_trace(name: str, **attributes):
+    return TRACER.start_trace(name, attributes=attributes)
+
+
+def span(name: str, kind: str = "INTERNAL", **attributes):
+    return TRACER.span(name, kind=kind, attributes=attributes)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator: run the function inside span(name or its qualified name)."""
+    def wrap(fn):
+        span_name = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            with TRACER.span(span_name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def current_trace_id() -> Optional[str]:
+    s = _current.get()
+    return s.trace_id if s is not None else None
+
+
+def run_in_context(fn: Callable, *args, **kwargs):
+    """
+    Callable for executor.submit() that runs fn in a copy of the caller's context, so spans opened
+    on the worker thread become children of the submitting span.
+    """
+    ctx = contextvars.copy_context()
+    return functools.partial(ctx.run, fn, *args, **kwargs)
+
+
+def waterfall(trace_id: str) -> Optional[Dict]:
+    """
+    The trace as a waterfall: spans ordered by start with offset / duration in ms from the root
+    and their depth in the span tree.
+    """
+    trace = TRACER.memory.get(trace_id)
+    if trace is None:
+        return None
+    spans = sorted(list(trace.spans), key=lambda s: s.start_ns)
+    root = trace.root
+    t0 = root.start_ns
+    depth = {root.span_id: 0}
+    by_id = {s.span_id: s for s in spans}
+
+    def depth_of(s):
+        if s.span_id not in depth:
+            parent = by_id.get(s.parent_span_id)
+            depth[s.span_id] = depth_of(parent) + 1 if parent is not None else 1
+        return depth[s.span_id]
+
+    rows = []
+    for s in spans:
+        row = s.to_dict()
+        row["offset_ms"] = (s.start_ns - t0) / 1e6
+        row["duration_ms"] = ((s.end_ns or s.start_ns) - s.start_ns) / 1e6
+        row["depth"] = depth_of(s)
+        rows.append(row)
+    return {
+        "trace_id": trace_id,
+        "name": root.name,
+        "duration_ms": ((root.end_ns or root.start_ns) - t0) / 1e6,
+        "status": root.status,
+        "span_count": len(rows),
+        "spans": rows,
+    }
+
+
+def recent_traces(limit: int = 50, min_ms: float = 0.0) -> List[Dict]:
+    """Summaries of buffered traces, newest first, optionally only those slower than min_ms."""
+    out = []
+    for trace in TRACER.memory.recent():
+        root = trace.root
+        duration = ((root.end_ns or root.start_ns) - root.start_ns) / 1e6
+        if duration < min_ms:
+            continue
+        out.append({"trace_id": trace.trace_id, "name": root.name, "duration_ms": duration,
+                    "status": root.status, "span_count": len(trace.spans),
+                    "start_time_unix_nano": root.start_ns, "attributes": dict(root.attributes)})
+        if len(out) >= limit:
+            break
+    return out
+
+
+class TraceLogFilter(logging.Filter):
+    """Sets record.trace_id ("-" outside a trace) so handlers can format it."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = current_trace_id() or "-"
+        return True
@@ -1,13 +1,53 @@
 # backend/tools/volunteer_api_tool.py
-from typing import Dict
+import os
+from typing import Dict, List
 
-# in a real system, you'd call your volunteer DB or Airtable. We implement a simple allocation simulation.
-REGIONAL_CAPACITY = {"Springfield": 120, "Greendale": 80}
+from tools.tracing import traced
+from tools.volunteer_pool import VolunteerPool
 
+# in a real system, you'd call your volunteer DB or Airtable. We keep a stateful in-process pool
+# (tools/volunteer_pool.py): assignments are reserved against regional capacity until released/expired.
+# every region must be in the gazetteer (tools/data/gazetteer.json): its coordinates are what
+# neighbour borrowing measures distances from
+REGIONAL_CAPACITY = {
+    "Springfield": 120,
+    "Hyderabad": 100,
+    "Mumbai": 120,
+    "Chennai": 100,
+    "Delhi": 120,
+    "Bengaluru": 100,
+    "Visakhapatnam": 60,
+    "Pune": 80,
+}
+
+VOLUNTEER_POOL = VolunteerPool(
+    REGIONAL_CAPACITY,
+    max_borrow_km=float(os.getenv("VOLUNTEER_MAX_BORROW_KM", "300")),
+    reservation_ttl=float(os.getenv("VOLUNTEER_RESERVATION_TTL_SECONDS", str(6 * 3600))) or None,
+)
+
+@traced("tool.assign_volunteers")
 def assign_volunteers_tool_func(params: Dict) -> Dict:
     location = params.get("location", "unknown")
     required = int(params.get("required", 10))
-    available = REGIONAL_CAPACITY.get(location, 0)
-    assigned = min(required, available)
-    # reduce pool for demo persistency could be added in a real DB
-    return {"status": "ok", "assigned": assigned, "location": location, "required": required}
+    reservation = VOLUNTEER_POOL.reserve(location, required, alert_id=params.get("alert_id"))
+    return {
+        "status": "ok",
+        "assigned": reservation["assigned"],
+        "location": location,
+        "required": required,
+        "reservation_id": reservation["reservation_id"],
+        "sources": reservation["sources"],
+    }
+
+def release_volunteers_tool_func(params: Dict) -> Dict:
+    released = VOLUNTEER_POOL.release(reservation_id=params.get("reservation_id"), alert_id=params.get("alert_id"))
+    if released is None:
+        return {"status": "not_found"}
+    return {"status": "ok", "released": released["assigned"], "reservation_id": released["reservation_id"]}
+
+def allocate_volunteers_batch(requests: List[Dict], commit: bool = False) -> List[Dict]:
+    """
+    requests: [{"alert_id", "location", "required", "risk"}] -> per-alert allocations, solved jointly.
+    """
+    return VOLUNTEER_POOL.allocate_batch(requests, commit=commit)
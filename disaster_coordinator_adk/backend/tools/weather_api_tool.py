@@ -1,41 +1,55 @@
 # backend/tools/weather_api_tool.py
-import os, requests
+import os
 from datetime import datetime, timezone,timedelta
 import random
+from tools.geocode_tool import gazetteer_lookup
+from tools.http_client import get_http_client
 OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY", "")
+OPENWEATHER_API_BASE = os.getenv("OPENWEATHER_API_BASE", "https://api.openweathermap.org").rstrip("/")
 
-# example: get alerts by searching weather for a list of city names
-CITY_TO_COORD = {
-  "Hyderabad": {"lat":17.3850, "lon":78.4867},
-  "Pune": {"lat":18.5204, "lon":73.8567},
-  "Vizag": {"lat":17.6868, "lon":83.2185}
-}
+OPENWEATHER_URL = f"{OPENWEATHER_API_BASE}/data/2.5/onecall"
 
-def fetch_openweather_alerts_for_city(city):
-    coords = CITY_TO_COORD.get(city)
-    if not coords or not OPENWEATHER_API_KEY:
+def epoch_to_iso(ts):
+    """Unix seconds (One Call's start / end) as an ISO-8601 UTC string; None if not a number."""
+    if isinstance(ts, bool) or not isinstance(ts, (int, float)):
         return None
-    lat, lon = coords["lat"], coords["lon"]
-    url = f"https://api.openweathermap.org/data/2.5/onecall?lat={lat}&lon={lon}&exclude=minutely,hourly,daily&appid={OPENWEATHER_API_KEY}"
-    r = requests.get(url, timeout=10)
-    r.raise_for_status()
-    data = r.json()
+    try:
+        return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+    except (OverflowError, OSError, ValueError):
+        return None
+
+def parse_openweather_alerts(city, data):
+    """Convert a One Call response's "alerts" into our alert dicts."""
     # parse as needed — this returns "alerts" if present
     alerts = data.get("alerts", [])
     out = []
     for a in alerts:
-        payload = {"description": a.get("description"), "tags": a.get("tags", [])}
+        payload = {"description": a.get("description"), "tags": a.get("tags", []),
+                   "sender": a.get("sender_name"), "ends": epoch_to_iso(a.get("end"))}
         out.append({
             "id": a.get("event", "") + "-" + str(int(datetime.now().timestamp())),
             "type": a.get("event", "weather"),
             "location": city,
-            "time": a.get("start", datetime.now(timezone.utc).isoformat()),
+            # One Call times are unix seconds; alerts carry ISO-8601 strings
+            "time": epoch_to_iso(a.get("start")) or datetime.now(timezone.utc).isoformat(),
             "source": "openweather",
             "confidence": 0.9,
             "payload": payload
         })
     return out
 
+# example: get alerts by searching weather for a list of city names
+# (city coordinates come from the shared gazetteer, tools/data/gazetteer.json)
+# The ingestion scheduler polls many cities concurrently via tools/feed_sources.OpenWeatherFeedSource.
+def fetch_openweather_alerts_for_city(city):
+    coords = gazetteer_lookup(city)
+    if not coords or not OPENWEATHER_API_KEY:
+        return None
+    lat, lon = coords
+    params = {"lat": lat, "lon": lon, "exclude": "minutely,hourly,daily", "appid": OPENWEATHER_API_KEY}
+    r = get_http_client().get(OPENWEATHER_URL, params=params, timeout=10, endpoint="openweather.onecall")
+    return parse_openweather_alerts(city, r.json())
+
 DISASTER_TYPES = [
     "rainfall",
     "flood",
@@ -1,9 +1,10 @@
-import React, {useState, useEffect} from "react";
+import React, {useState, useEffect, useRef} from "react";
 import AlertsList from "./components/AlertsList";
 import PlanView from "./components/PlanView";
 import LogsView from "./components/LogsView";
 import MapView from "./components/MapView";
 import RiskBadge from "./components/RiskBadge";
+import { StreamProvider, useEventStream, useStreamEvent } from "./stream";
 
 
 
@@ -23,11 +24,18 @@ function App(){
   const [alerts, setAlerts] = useState([]);
   const [selectedPlan, setSelectedPlan] = useState(null);
   const [loading, setLoading] = useState(false);
+  // stream cursor returned with the last snapshot (X-Stream-Cursor)
+  const cursorRef = useRef(null);
+  // the page's one /api/stream connection, shared with LogsView through StreamProvider
+  const [streamUrl, setStreamUrl] = useState(null);
+  const stream = useEventStream(streamUrl);
 
   async function pollAlerts(){
     setLoading(true);
     try {
       const res = await fetch(`${API_BASE}/api/poll_alerts`);
+      const cursor = res.headers.get("X-Stream-Cursor");
+      if (cursor !== null) cursorRef.current = cursor;
       const arr = await res.json();
       setAlerts(arr || []);
     } catch(e) {
@@ -36,6 +44,17 @@ function App(){
     } finally { setLoading(false); }
   }
 
+  // merge a new/changed alert from the stream (replace by id, else append)
+  function upsertAlert(alert){
+    setAlerts(prev => {
+      const idx = prev.findIndex(a => a.id === alert.id);
+      if (idx === -1) return [...prev, alert];
+      const next = prev.slice();
+      next[idx] = alert;
+      return next;
+    });
+  }
+
   async function createPlan(alertId){
   setLoading(true);
   try {
@@ -68,9 +87,22 @@ function App(){
 }
 
 
-  useEffect(()=> { pollAlerts(); }, []);
+  // initial snapshot, then live deltas over Server-Sent Events (resumes from the snapshot cursor)
+  useEffect(()=> {
+    let closed = false;
+    pollAlerts().then(() => {
+      if (closed) return;
+      const cursor = cursorRef.current !== null ? `?cursor=${cursorRef.current}` : "";
+      setStreamUrl(`${API_BASE}/api/stream${cursor}`);
+    });
+    return () => { closed = true; };
+  }, []);
+
+  useStreamEvent("alert", upsertAlert, stream);
+  useStreamEvent("reset", () => pollAlerts(), stream);
 
    return (
+  <StreamProvider stream={stream}>
   <div className="min-h-screen bg-slate-50 p-6">
     <header className="max-w-7xl mx-auto mb-6">
       <h1 className="text-3xl font-bold">Disaster Relief Coordinator — Demo</h1>
@@ -89,7 +121,7 @@ function App(){
             </button>
           </div>
         </div>
-        <MapView incidents={alerts} onSelect={(inc)=>createPlan(inc.id)} />
+        <MapView incidents={alerts} apiBase={API_BASE} onSelect={(inc)=>createPlan(inc.id)} />
       </div>
 
       {/* Middle column: alerts (scrollable) */}
@@ -110,7 +142,7 @@ function App(){
                     conf: {a.confidence} · {new Date(a.time).toLocaleString()}
                   </div>
                   <div className="mt-2">
-                    <RiskBadge risk={a._ui_risk ?? computeUiRisk(a)} />
+                    <RiskBadge risk={a.risk ?? a._ui_risk ?? computeUiRisk(a)} />
                   </div>
                 </div>
                 <div>
@@ -138,6 +170,7 @@ function App(){
 
     </main>
   </div>
+  </StreamProvider>
 );
 
 }
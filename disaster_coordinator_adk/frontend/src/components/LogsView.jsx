@@ -1,8 +1,10 @@
 // src/components/LogsView.jsx
 /*eslint-disable*/
 import React, { useEffect, useState, startTransition } from "react";
+import { useStreamEvent } from "../stream";
 
 const API_BASE = import.meta.env.VITE_API_BASE || "http://localhost:8000";
+const MAX_LOGS = 200;
 
 export default function LogsView() {
   const [logs, setLogs] = useState([]);
@@ -32,20 +34,24 @@ export default function LogsView() {
     let mounted = true;
     const isMounted = () => mounted;
 
-    // initial fetch (async)
+    // initial fetch (async), then append new entries pushed over the page's shared stream
     fetchLogsOnce(isMounted);
 
-    // poll every 5s
-    const id = setInterval(() => {
-      fetchLogsOnce(isMounted);
-    }, 5000);
-
     return () => {
       mounted = false;
-      clearInterval(id);
     };
   }, []);
 
+  useStreamEvent("log", (entry) => {
+    startTransition(() => {
+      // the stream resumes from the alerts snapshot, so it can replay entries the fetch already had
+      setLogs((prev) => (entry.seq != null && prev.some((l) => l.seq === entry.seq))
+        ? prev
+        : [...prev, entry].slice(-MAX_LOGS));
+    });
+  });
+  useStreamEvent("reset", () => fetchLogsOnce(() => true));
+
   return (
     <div className="max-h-48 overflow-auto">
       {logs.length === 0 && <div className="text-sm text-slate-500">No logs yet</div>}
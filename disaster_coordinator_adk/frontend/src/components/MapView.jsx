@@ -1,11 +1,13 @@
 // src/components/MapView.jsx
-import React, { useEffect, useRef } from "react";
+import React, { useEffect, useMemo, useRef, useState } from "react";
 import {
   MapContainer,
   TileLayer,
   Marker,
   Popup,
+  Tooltip,
   useMap,
+  useMapEvents,
   CircleMarker
 } from "react-leaflet";
 import L from "leaflet";
@@ -53,7 +55,55 @@ function createColoredIcon(color = "#2563eb") {
   });
 }
 
-export default function MapView({ incidents = [], onSelect = () => {} }) {
+// above this many incidents the map draws server-side clusters (/api/alerts/tiles) instead of one marker each
+const CLUSTER_THRESHOLD = 500;
+
+// fetches the clusters for the current viewport whenever the map moves or the alerts change
+function TileClusters({ apiBase, version, renderPoint }) {
+  const map = useMap();
+  const [tiles, setTiles] = useState({ cells: [], points: [] });
+  const [view, setView] = useState(0);
+  useMapEvents({ moveend: () => setView((v) => v + 1) });
+
+  useEffect(() => {
+    const controller = new AbortController();
+    const b = map.getBounds();
+    const bbox = [b.getWest(), b.getSouth(), b.getEast(), b.getNorth()]
+      .map((v, i) => Math.max(i % 2 ? -85 : -180, Math.min(i % 2 ? 85 : 180, v)).toFixed(4))
+      .join(",");
+    fetch(`${apiBase}/api/alerts/tiles?zoom=${map.getZoom()}&bbox=${bbox}`, { signal: controller.signal })
+      .then((res) => (res.ok ? res.json() : null))
+      .then((data) => { if (data) setTiles(data); })
+      .catch((e) => { if (e.name !== "AbortError") console.error("tiles fetch failed", e); });
+    return () => controller.abort();
+  }, [map, apiBase, version, view]);
+
+  return (
+    <>
+      {tiles.cells.map((c) => {
+        const color = riskColor(c.max_risk);
+        const types = Object.entries(c.types).sort((a, b) => b[1] - a[1]);
+        return (
+          <CircleMarker
+            key={`${c.z}/${c.x}/${c.y}`}
+            center={[c.lat, c.lon]}
+            radius={8 + 4 * Math.log10(c.count)}
+            pathOptions={{ color, fillOpacity: 0.5 }}
+            eventHandlers={{ click: () => map.setView([c.lat, c.lon], map.getZoom() + 2) }}
+          >
+            <Tooltip>
+              <div className="font-semibold">{c.count} alerts (max risk {c.max_risk.toFixed(2)})</div>
+              {types.slice(0, 4).map(([t, n]) => <div key={t} className="text-xs">{t}: {n}</div>)}
+            </Tooltip>
+          </CircleMarker>
+        );
+      })}
+      {tiles.points.map(renderPoint)}
+    </>
+  );
+}
+
+export default function MapView({ incidents = [], onSelect = () => {}, apiBase = "" }) {
   // pick first incident with coords or default center
   const first = incidents.find(i => i.payload && i.payload.lat && i.payload.lon);
   const center = first ? [first.payload.lat, first.payload.lon] : [20.5937, 78.9629];
@@ -61,6 +111,17 @@ export default function MapView({ incidents = [], onSelect = () => {} }) {
   // markerRefs map to allow programmatic openPopup if needed
   const markerRefs = useRef({});
 
+  const clustered = incidents.length > CLUSTER_THRESHOLD;
+  const byId = useMemo(
+    () => (clustered ? new Map(incidents.map((i) => [i.id, i])) : null),
+    [clustered, incidents]
+  );
+  // any new / changed alert bumps the highest seq, which refetches the visible clusters
+  const version = useMemo(
+    () => (clustered ? incidents.reduce((m, i) => Math.max(m, i.seq || 0), 0) : 0),
+    [clustered, incidents]
+  );
+
   // ensure markers are clickable: handle click to both open popup and call onSelect
   function handleMarkerClick(inc, markerRef) {
     // open popup programmatically (works across versions)
@@ -75,6 +136,54 @@ export default function MapView({ incidents = [], onSelect = () => {} }) {
     try { onSelect(inc); } catch (e) { console.error("onSelect error", e); }
   }
 
+  function renderIncident(inc) {
+    const lat = inc?.payload?.lat;
+    const lon = inc?.payload?.lon;
+    if (!lat || !lon) return null;
+
+    const risk = inc.risk ?? inc._ui_risk ?? 0.4;
+    const color = riskColor(risk);
+    // create a unique ref for each marker
+    if (!markerRefs.current[inc.id]) markerRefs.current[inc.id] = React.createRef();
+
+    // Use a real Marker (with icon) so clicking works consistently, but also render a circle marker for radius feel
+    return (
+      <React.Fragment key={inc.id}>
+        <Marker
+          position={[lat, lon]}
+          icon={createColoredIcon(color)}
+          ref={markerRefs.current[inc.id]}
+          eventHandlers={{
+            click: () => handleMarkerClick(inc, markerRefs.current[inc.id])
+          }}
+        >
+          <Popup>
+            <div className="min-w-[180px]">
+              <div className="font-semibold">{inc.type} — {inc.location}</div>
+              <div className="text-xs">Risk: {(risk).toFixed(2)}</div>
+              <div className="text-xs">Time: {new Date(inc.time).toLocaleString()}</div>
+              <div className="mt-2 text-xs text-slate-600">Click the marker to plan / select</div>
+            </div>
+          </Popup>
+        </Marker>
+
+        {/* optional: visual circle under the marker */}
+        <CircleMarker
+          center={[lat, lon]}
+          radius={10}
+          pathOptions={{ color, fillOpacity: 0.2 }}
+          interactive={false}
+        />
+      </React.Fragment>
+    );
+  }
+
+  // a point from the tile endpoint: full incident when we have it, else what the tile carries
+  function renderPoint(p) {
+    const inc = byId.get(p.id) || { id: p.id, type: p.type, risk: p.risk, payload: { lat: p.lat, lon: p.lon } };
+    return renderIncident(inc);
+  }
+
   return (
     <div className="w-full h-[520px] rounded shadow overflow-hidden relative">
       <MapContainer
@@ -89,47 +198,9 @@ export default function MapView({ incidents = [], onSelect = () => {} }) {
           url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
         />
 
-        {incidents.map((inc) => {
-          const lat = inc?.payload?.lat;
-          const lon = inc?.payload?.lon;
-          if (!lat || !lon) return null;
-
-          const risk = inc._ui_risk ?? 0.4;
-          const color = riskColor(risk);
-          // create a unique ref for each marker
-          if (!markerRefs.current[inc.id]) markerRefs.current[inc.id] = React.createRef();
-
-          // Use a real Marker (with icon) so clicking works consistently, but also render a circle marker for radius feel
-          return (
-            <React.Fragment key={inc.id}>
-              <Marker
-                position={[lat, lon]}
-                icon={createColoredIcon(color)}
-                ref={markerRefs.current[inc.id]}
-                eventHandlers={{
-                  click: () => handleMarkerClick(inc, markerRefs.current[inc.id])
-                }}
-              >
-                <Popup>
-                  <div className="min-w-[180px]">
-                    <div className="font-semibold">{inc.type} — {inc.location}</div>
-                    <div className="text-xs">Risk: {(risk).toFixed(2)}</div>
-                    <div className="text-xs">Time: {new Date(inc.time).toLocaleString()}</div>
-                    <div className="mt-2 text-xs text-slate-600">Click the marker to plan / select</div>
-                  </div>
-                </Popup>
-              </Marker>
-
-              {/* optional: visual circle under the marker */}
-              <CircleMarker
-                center={[lat, lon]}
-                radius={10}
-                pathOptions={{ color, fillOpacity: 0.2 }}
-                interactive={false}
-              />
-            </React.Fragment>
-          );
-        })}
+        {clustered
+          ? <TileClusters apiBase={apiBase} version={version} renderPoint={renderPoint} />
+          : incidents.map(renderIncident)}
       </MapContainer>
     </div>
   );
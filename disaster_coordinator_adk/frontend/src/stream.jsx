@@ -0,0 +1,73 @@
+// src/stream.jsx
+// One EventSource to /api/stream for the whole page; views subscribe to its event types
+// (alert, log, reset, ...) instead of each opening a connection of their own.
+import React, { createContext, useContext, useEffect, useRef, useState } from "react";
+
+const StreamContext = createContext(null);
+
+function createStream() {
+  const handlers = new Map(); // event type -> Set of callbacks
+  const bound = new Set();    // event types with a dispatcher on the current EventSource
+  let source = null;
+
+  function bind(type) {
+    if (!source || bound.has(type)) return;
+    bound.add(type);
+    source.addEventListener(type, (e) => {
+      let data = e.data;
+      try { data = JSON.parse(e.data); } catch (err) { /* plain-text event */ }
+      for (const fn of handlers.get(type) || []) fn(data);
+    });
+  }
+
+  return {
+    attach(s) {
+      source = s;
+      bound.clear();
+      handlers.forEach((_, type) => bind(type));
+    },
+    detach() {
+      source = null;
+      bound.clear();
+    },
+    subscribe(type, fn) {
+      if (!handlers.has(type)) handlers.set(type, new Set());
+      handlers.get(type).add(fn);
+      bind(type);
+      return () => handlers.get(type).delete(fn);
+    },
+  };
+}
+
+// Open (and own) the shared stream; connects once `url` is set, reconnects when it changes.
+export function useEventStream(url) {
+  const [stream] = useState(createStream);
+  useEffect(() => {
+    if (!url) return undefined;
+    const source = new EventSource(url);
+    stream.attach(source);
+    return () => {
+      stream.detach();
+      source.close();
+    };
+  }, [stream, url]);
+  return stream;
+}
+
+export function StreamProvider({ stream, children }) {
+  return <StreamContext.Provider value={stream}>{children}</StreamContext.Provider>;
+}
+
+// Call handler(data) for every `type` event; `stream` defaults to the one from StreamProvider.
+export function useStreamEvent(type, handler, stream) {
+  const fromContext = useContext(StreamContext);
+  const target = stream || fromContext;
+  const handlerRef = useRef(handler);
+  useEffect(() => {
+    handlerRef.current = handler;
+  });
+  useEffect(() => {
+    if (!target) return undefined;
+    return target.subscribe(type, (data) => handlerRef.current(data));
+  }, [target, type]);
+}